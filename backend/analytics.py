@@ -0,0 +1,307 @@
+# analytics.py
+"""
+Department and function-area analytics, served from in-memory aggregates.
+
+Everything is counted per department into small NumPy arrays, once, from
+two set-based reads of employees and employee_skills (shared with the
+similarity index at warm-up, see recommendations.load_employee_skill_bits):
+
+    active[d, s]      employees in department d holding any skill of specialization s
+    overlap_sum[d, s] the sum of those employees' overlap with s (for mean coverage)
+    proficient[d, s]  employees already at MAX_OVERLAP_PERCENT of s or more
+    holders[d, k]     employees holding skill k
+    function_active[d, f]  employees holding any skill of function area f
+
+A profile write only moves one employee's contributions, so it is applied
+as a delta (`update_employee_skills`) instead of a rebuild; requests then
+read a few rows of these arrays. A skill gap is an employee who works in a
+specialization (holds some of its skills) but lacks that skill, so gaps per
+skill are `active[d, spec(k)] - holders[d, k]`.
+
+Leadership scores are kept as one array, rescored in full when the model
+version or the date (tenure) changes and per employee after profile writes.
+Queries and updates share one lock; both only touch a few array rows.
+"""
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+import leadership
+from recommendations import MAX_OVERLAP_PERCENT, load_employee_skill_bits
+
+SCORE_BINS = np.arange(0, 101, 10)  # Leadership score histogram: 0-9, 10-19, ..., 90-100
+TOP_GAPS = 10
+
+
+class WorkforceAnalytics:
+    def __init__(self, max_age: float = 3600.0):
+        self.max_age = max_age  # Full rebuild after this long, to pick up writes made outside the API
+        self.catalog = None
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.catalog is not None
+
+    def _stale(self) -> bool:
+        return self._built_at is None or bool(self.max_age and time.monotonic() - self._built_at > self.max_age)
+
+    def ensure_current(self, cursor, catalog, skill_bits=None):
+        """
+        Builds on first use, and again when the catalog changes or the
+        aggregates are older than max_age. `skill_bits` (from
+        load_employee_skill_bits) is used for the build instead of reading
+        the tables again, if it was loaded for this catalog.
+        """
+        if self.catalog is not catalog or self._stale():
+            with self._lock:
+                if self.catalog is not catalog or self._stale():
+                    if skill_bits is None or skill_bits.catalog is not catalog:
+                        skill_bits = load_employee_skill_bits(cursor, catalog)
+                    self._load(cursor, catalog, skill_bits)
+        return self
+
+    # --- Building ---
+
+    def _load(self, cursor, catalog, skill_bits):
+        started = time.perf_counter()
+        cursor.execute("SELECT function_id, function_name FROM function_areas")
+        function_names = {row.function_id: row.function_name for row in cursor.fetchall()}
+
+        self.employee_ids = skill_bits.employee_ids
+        self.row_of = skill_bits.row_of
+        departments = [row.department for row in skill_bits.employees]
+        self.departments = sorted(set(departments), key=lambda d: (d is None, d or ""))
+        self.department_code = {department: i for i, department in enumerate(self.departments)}
+        self.employee_department = np.array([self.department_code[d] for d in departments], dtype=np.int64)
+
+        # Catalog columns: specializations in catalog order, skills by their catalog bit
+        n_specs, n_skills = len(catalog.spec_ids), len(catalog.skill_bit)
+        self.function_ids = sorted({f for f in catalog.spec_functions if f is not None})
+        function_column = {function_id: i for i, function_id in enumerate(self.function_ids)}
+        self.function_names = [function_names.get(f, str(f)) for f in self.function_ids]
+        self.spec_function = np.array([function_column.get(f, -1) for f in catalog.spec_functions], dtype=np.int64)
+        self.skill_ids = [0] * n_skills
+        for skill_id, bit in catalog.skill_bit.items():
+            self.skill_ids[bit] = skill_id
+        self.skill_spec = np.array([catalog.skill_to_spec_column[skill_id] for skill_id in self.skill_ids], dtype=np.int64)
+        self.spec_totals = catalog.spec_totals_array
+
+        # Every employee's skills as catalog bits, grouped by employee row
+        rows, bits = skill_bits.rows, skill_bits.bits
+        bounds = np.searchsorted(rows, np.arange(len(self.employee_ids) + 1))
+        self.employee_skills = [bits[bounds[i]:bounds[i + 1]] for i in range(len(self.employee_ids))]
+
+        n_departments, n_functions = len(self.departments), len(self.function_ids)
+        self.headcount = np.bincount(self.employee_department, minlength=n_departments)
+        self.skill_total = np.bincount(self.employee_department[rows], minlength=n_departments)
+        self.holders = np.bincount(self.employee_department[rows] * n_skills + bits,
+                                   minlength=n_departments * n_skills).reshape(n_departments, n_skills)
+
+        # Employee x specialization overlap, one block of employees at a time to bound memory
+        self.active = np.zeros((n_departments, n_specs), dtype=np.int64)
+        self.overlap_sum = np.zeros((n_departments, n_specs), dtype=np.int64)
+        self.proficient = np.zeros((n_departments, n_specs), dtype=np.int64)
+        self.function_active = np.zeros((n_departments, n_functions), dtype=np.int64)
+        spec_of_pair = self.skill_spec[bits]
+        in_spec = spec_of_pair >= 0
+        block_rows = 5000
+        for start in range(0, len(self.employee_ids), block_rows):
+            stop = min(start + block_rows, len(self.employee_ids))
+            lo, hi = np.searchsorted(rows, [start, stop])
+            keep = in_spec[lo:hi]
+            overlap = np.bincount((rows[lo:hi][keep] - start) * n_specs + spec_of_pair[lo:hi][keep],
+                                  minlength=(stop - start) * n_specs).reshape(stop - start, n_specs)
+            self._add(self.employee_department[start:stop], overlap, 1)
+
+        self.catalog = catalog
+        self.scores = np.full(len(self.employee_ids), np.nan)
+        self._score_key = None
+        self._dirty_scores = set()
+        self._built_at = time.monotonic()
+        print(f"✅ Workforce analytics built for {len(self.employee_ids)} employees in "
+              f"{n_departments} departments ({time.perf_counter() - started:.2f}s).")
+
+    def _overlap_row(self, bits) -> np.ndarray:
+        specs = self.skill_spec[bits]
+        return np.bincount(specs[specs >= 0], minlength=len(self.spec_totals))
+
+    def _add(self, departments, overlap, sign):
+        """Adds (sign=1) or removes (sign=-1) employees' overlap rows from the department aggregates."""
+        percent = np.zeros(overlap.shape, dtype=np.float64)
+        np.divide(overlap * 100.0, self.spec_totals, out=percent, where=self.spec_totals > 0)
+        active = overlap > 0
+        function_active = np.zeros((len(overlap), len(self.function_ids)), dtype=bool)
+        in_function = self.spec_function >= 0
+        if in_function.any():
+            employee_index, spec_index = np.nonzero(active[:, in_function])
+            function_active[employee_index, self.spec_function[in_function][spec_index]] = True
+        np.add.at(self.active, departments, sign * active)
+        np.add.at(self.overlap_sum, departments, sign * overlap)
+        np.add.at(self.proficient, departments, sign * (active & (percent >= MAX_OVERLAP_PERCENT)))
+        np.add.at(self.function_active, departments, sign * function_active)
+
+    # --- Incremental maintenance, called after the corresponding write commits ---
+
+    def update_employee_skills(self, employee_id: str, skill_ids):
+        """Moves one employee's contributions from their old skill set to `skill_ids`."""
+        with self._lock:
+            if not self.loaded or employee_id not in self.row_of:
+                return  # Picked up by the next rebuild
+            row = self.row_of[employee_id]
+            department = self.employee_department[row:row + 1]
+            old_bits = self.employee_skills[row]
+            new_bits = np.array(sorted({self.catalog.skill_bit[s] for s in skill_ids if s in self.catalog.skill_bit}),
+                                dtype=np.int64)
+            self._add(department, self._overlap_row(old_bits)[None, :], -1)
+            self._add(department, self._overlap_row(new_bits)[None, :], 1)
+            np.subtract.at(self.holders[department[0]], old_bits, 1)
+            np.add.at(self.holders[department[0]], new_bits, 1)
+            self.skill_total[department[0]] += len(new_bits) - len(old_bits)
+            self.employee_skills[row] = new_bits
+            self._dirty_scores.add(employee_id)
+
+    def invalidate_scores(self, employee_ids=None):
+        """Rescores these employees (None: everyone) on the next read, after their leadership features changed."""
+        with self._lock:
+            if not self.loaded:
+                return
+            if employee_ids is None:
+                self._score_key = None
+            else:
+                self._dirty_scores.update(e for e in employee_ids if e in self.row_of)
+
+    def ensure_scores(self, cursor, model, feature_store):
+        """Scores everyone when the model or the date changed, otherwise only employees changed since."""
+        if model is None:
+            return
+        key = (model.version, date.today())
+        with self._lock:
+            if key != self._score_key:
+                employee_ids = self.employee_ids
+            elif self._dirty_scores:
+                employee_ids = sorted(self._dirty_scores)
+            else:
+                return
+            raw_features = feature_store.get_or_load(cursor, employee_ids)
+            scorable = [e for e in employee_ids if e in raw_features and raw_features[e][0] is not None]
+            rows = np.array([self.row_of[e] for e in employee_ids], dtype=np.int64)
+            self.scores[rows] = np.nan
+            if scorable:
+                features_array = leadership.build_feature_matrix(raw_features, scorable)
+                self.scores[[self.row_of[e] for e in scorable]] = model.predict_scores(features_array)
+            self._score_key = key
+            self._dirty_scores.clear()
+
+    # --- Queries ---
+
+    def _department_rows(self, department):
+        code = self.department_code.get(department)
+        if code is None:
+            raise KeyError(department)
+        return code
+
+    def _leadership(self, mask) -> dict:
+        scores = self.scores[mask]
+        scores = scores[~np.isnan(scores)]
+        if not len(scores):
+            return {"scored": 0}
+        counts, _ = np.histogram(scores, bins=SCORE_BINS)
+        p25, median, p75 = np.percentile(scores, [25, 50, 75])
+        return {
+            "scored": int(len(scores)),
+            "mean": round(float(scores.mean()), 2),
+            "p25": float(p25), "median": float(median), "p75": float(p75),
+            "histogram": [{"from": int(lo), "to": int(hi) - 1 if hi < 100 else 100, "employees": int(count)}
+                          for lo, hi, count in zip(SCORE_BINS[:-1], SCORE_BINS[1:], counts)],
+        }
+
+    def _gaps(self, department_codes, skill_columns=None, limit: int = TOP_GAPS) -> list:
+        active = self.active[department_codes].sum(axis=0)
+        holders = self.holders[department_codes].sum(axis=0)
+        in_spec = self.skill_spec >= 0
+        missing = np.where(in_spec, active[np.maximum(self.skill_spec, 0)] - holders, 0)
+        if skill_columns is not None:
+            missing = np.where(skill_columns, missing, 0)
+        # Most employees missing first; ties by skill name
+        names = self.catalog.skill_names
+        ranked = sorted(np.flatnonzero(missing > 0), key=lambda k: (-missing[k], names[self.skill_ids[k]]))[:limit]
+        return [{
+            "skill": names[self.skill_ids[k]],
+            "specialization": self.catalog.spec_names[self.skill_spec[k]],
+            "employees_missing": int(missing[k]),
+            "employees_in_specialization": int(active[self.skill_spec[k]]),
+        } for k in ranked]
+
+    def departments_summary(self) -> list:
+        with self._lock:
+            results = []
+            for code, department in enumerate(self.departments):
+                headcount = int(self.headcount[code])
+                results.append({
+                    "department": department,
+                    "headcount": headcount,
+                    "average_skills": round(float(self.skill_total[code]) / headcount, 2) if headcount else 0.0,
+                    "specializations_covered": int((self.active[code] > 0).sum()),
+                    "leadership": self._leadership(self.employee_department == code),
+                })
+            return results
+
+    def department(self, department, limit: int = TOP_GAPS) -> dict:
+        with self._lock:
+            code = self._department_rows(department)
+            headcount = int(self.headcount[code])
+            active, overlap_sum, proficient = self.active[code], self.overlap_sum[code], self.proficient[code]
+            specializations = []
+            for s in np.flatnonzero(active > 0):
+                specializations.append({
+                    "specialization": self.catalog.spec_names[s],
+                    "function_area": self.function_names[self.spec_function[s]] if self.spec_function[s] >= 0 else None,
+                    "employees": int(active[s]),
+                    "share_percent": round(float(active[s]) * 100.0 / headcount, 2),
+                    "mean_coverage_percent": round(float(overlap_sum[s]) * 100.0 / (active[s] * self.spec_totals[s]), 2),
+                    "proficient": int(proficient[s]),
+                })
+            specializations.sort(key=lambda item: (-item["employees"], item["specialization"]))
+            return {
+                "department": department,
+                "headcount": headcount,
+                "average_skills": round(float(self.skill_total[code]) / headcount, 2) if headcount else 0.0,
+                "specializations": specializations,
+                "top_gaps": self._gaps([code], limit=limit),
+                "leadership": self._leadership(self.employee_department == code),
+            }
+
+    def function_areas(self, department=None, limit: int = 5) -> dict:
+        with self._lock:
+            codes = [self._department_rows(department)] if department is not None else list(range(len(self.departments)))
+            headcount = int(self.headcount[codes].sum())
+            active, overlap_sum = self.active[codes].sum(axis=0), self.overlap_sum[codes].sum(axis=0)
+            function_active = self.function_active[codes].sum(axis=0)
+            results = []
+            for f, name in enumerate(self.function_names):
+                specs = np.flatnonzero(self.spec_function == f)
+                working = active[specs] > 0
+                coverage = overlap_sum[specs][working] * 100.0 / (active[specs][working] * self.spec_totals[specs][working])
+                results.append({
+                    "function_area": name,
+                    "specializations": int(len(specs)),
+                    "skills": int(np.isin(self.skill_spec, specs).sum()),
+                    "employees": int(function_active[f]),
+                    "share_percent": round(float(function_active[f]) * 100.0 / headcount, 2) if headcount else 0.0,
+                    "mean_coverage_percent": round(float(coverage.mean()), 2) if len(coverage) else 0.0,
+                    "top_gaps": self._gaps(codes, np.isin(self.skill_spec, specs), limit=limit),
+                })
+            results.sort(key=lambda item: (-item["employees"], item["function_area"]))
+            return {"department": department, "headcount": headcount, "function_areas": results}
+
+    def leadership_distribution(self, department=None) -> dict:
+        with self._lock:
+            if department is None:
+                mask = np.ones(len(self.employee_ids), dtype=bool)
+            else:
+                mask = self.employee_department == self._department_rows(department)
+            return {"department": department, "headcount": int(mask.sum()), "leadership": self._leadership(mask)}
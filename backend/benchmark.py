@@ -0,0 +1,303 @@
+# benchmark.py
+"""
+End-to-end load and latency benchmark for the API.
+
+    python benchmark.py --employees 100000 --concurrency 32 --requests 500 --output bench.json
+
+Builds a synthetic SQLite database (or reuses one with --db), starts the
+stub LLM and the API under uvicorn in a subprocess, waits for /readyz and
+then drives every endpoint with --requests requests from --concurrency
+concurrent clients. The report (JSON, on stdout or in --output) has p50,
+p95 and p99 latency, throughput and error counts per endpoint, plus the
+start-up times, so runs can be compared. --base-url benchmarks a server
+that is already running instead; --db must then point at its database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+
+import synthetic_data
+from stub_llm import Faults, start_stub_server
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_EMPLOYEES = 5000  # Employee ids drawn for requests
+BATCH_SIZE = 100  # Employees per batch-endpoint request
+IMPORT_RECORDS = 200  # Records per bulk-import request
+
+
+class Workload:
+    """One endpoint and a way to build a request for it: build(rng, i) -> (method, path, json_body or content)."""
+
+    def __init__(self, name, build, stream=False):
+        self.name = name
+        self.build = build
+        self.stream = stream
+
+
+def build_workloads(data) -> list:
+    employees, skills, specializations = data["employees"], data["skills"], data["specializations"]
+    departments = data["departments"]
+
+    def employee(rng):
+        return rng.choice(employees)
+
+    def chat(state, message):
+        return lambda rng, i: ("POST", "/api/chatbot", {"employee_id": employee(rng), "state": state, "message": message(rng, i)})
+
+    # Writes walk the sample in order, so concurrent requests touch different employees
+    # and the numbers measure the write path rather than lock contention
+    def writes_to(i):
+        return employees[i % len(employees)]
+
+    def import_body(rng, i):
+        lines = [json.dumps({"employee_id": writes_to(i * IMPORT_RECORDS + n), "skills": rng.sample(skills, 5)})
+                 for n in range(IMPORT_RECORDS)]
+        return "POST", "/api/employees/import", "\n".join(lines).encode()
+
+    return [
+        Workload("healthz", lambda rng, i: ("GET", "/healthz", None)),
+        Workload("readyz", lambda rng, i: ("GET", "/readyz", None)),
+        Workload("metrics", lambda rng, i: ("GET", "/metrics", None)),
+        Workload("employee", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}", None)),
+        Workload("employee_details", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}/details", None)),
+        Workload("employee_dashboard", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}/dashboard", None)),
+        Workload("career_recommendations", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}/career_recommendations", None)),
+        Workload("career_recommendations_batch", lambda rng, i: (
+            "POST", "/api/career_recommendations/batch", {"employee_ids": rng.sample(employees, min(BATCH_SIZE, len(employees)))})),
+        Workload("leadership_potential", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}/leadership_potential", None)),
+        Workload("leadership_potential_batch", lambda rng, i: (
+            "POST", "/api/leadership_potential/batch", {"employee_ids": rng.sample(employees, min(BATCH_SIZE, len(employees)))})),
+        Workload("employee_similar", lambda rng, i: ("GET", f"/api/employee/{employee(rng)}/similar", None)),
+        Workload("analytics_departments", lambda rng, i: ("GET", "/api/analytics/departments", None)),
+        Workload("analytics_department", lambda rng, i: (
+            "GET", f"/api/analytics/departments/{quote(rng.choice(departments))}", None)),
+        Workload("analytics_function_areas", lambda rng, i: ("GET", "/api/analytics/function_areas", None)),
+        Workload("export_profiles", lambda rng, i: (
+            "GET", f"/api/export/profiles?after={quote(rng.choice(employees))}&limit=200", None)),
+        Workload("chatbot_start", chat("START", lambda rng, i: "hi")),
+        Workload("chatbot_llm", chat("MAIN_MENU", lambda rng, i: f"How can I grow into a leadership role? ({i})")),
+        Workload("chatbot_mentor", chat("AWAITING_MENTOR_QUERY", lambda rng, i: rng.choice(skills))),
+        Workload("chatbot_upskill", chat("AWAITING_UPSKILL_TARGET", lambda rng, i: rng.choice(specializations))),
+        Workload("chatbot_stream", lambda rng, i: ("POST", "/api/chatbot/stream", {
+            "employee_id": employee(rng), "state": "MAIN_MENU", "message": f"What should I learn next? ({i})"}), stream=True),
+        Workload("employee_update", lambda rng, i: ("POST", f"/api/employee/{writes_to(i)}/update", {
+            "skills": rng.sample(skills, rng.randint(5, 20)),
+            "experiences": [{"type": "Program", "organization": "PSA Singapore", "program": f"Benchmark {i}",
+                             "period": {"start": "2022-01-01", "end": None}, "focus": "Benchmark"}]})),
+        Workload("employees_import", import_body),
+    ]
+
+
+def load_request_data(db_path: str, seed: int) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        employees = [row[0] for row in conn.execute("SELECT employee_id FROM employees")]
+        skills = [row[0] for row in conn.execute("SELECT skill_name FROM skills")]
+        specializations = [row[0] for row in conn.execute("SELECT specialization_name FROM specializations")]
+        departments = [row[0] for row in conn.execute(
+            "SELECT DISTINCT department FROM employees WHERE department IS NOT NULL")]
+    finally:
+        conn.close()
+    rng = random.Random(seed)
+    return {"employees": rng.sample(employees, min(SAMPLE_EMPLOYEES, len(employees))),
+            "skills": skills, "specializations": specializations, "departments": departments}
+
+
+def summarize(latencies, errors, elapsed, first_bytes=None) -> dict:
+    ms = np.array(latencies) * 1000
+    summary = {"requests": len(latencies), "errors": errors,
+               "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None}
+    if len(ms):
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        summary.update({"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                        "mean_ms": round(float(ms.mean()), 2), "max_ms": round(float(ms.max()), 2)})
+    if first_bytes:
+        summary["first_byte_p50_ms"] = round(float(np.percentile(np.array(first_bytes) * 1000, 50)), 2)
+    return summary
+
+
+async def run_workload(client, workload, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies, first_bytes, status_errors = [], [], {}
+    counter = iter(range(warmup + requests))
+
+    async def send(i):
+        method, path, body = workload.build(rng, i)
+        kwargs = {"content": body} if isinstance(body, bytes) else {"json": body} if body is not None else {}
+        started = time.perf_counter()
+        first_byte = None
+        async with client.stream(method, path, **kwargs) as response:
+            async for _ in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+        return time.perf_counter() - started, first_byte, response.status_code
+
+    async def worker():
+        for i in counter:
+            try:
+                latency, first_byte, status = await send(i)
+            except httpx.HTTPError as e:
+                latency, first_byte, status = None, None, type(e).__name__
+            if i < warmup:
+                continue
+            if status != 200:
+                status_errors[str(status)] = status_errors.get(str(status), 0) + 1
+            elif latency is not None:
+                latencies.append(latency)
+                if workload.stream and first_byte is not None:
+                    first_bytes.append(first_byte)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, status_errors, elapsed, first_bytes)
+
+
+async def run_all(base_url, workloads, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        for workload in workloads:
+            results[workload.name] = await run_workload(
+                client, workload, args.requests, args.concurrency, args.warmup, args.seed)
+            r = results[workload.name]
+            print(f"   {workload.name:<30} p50 {r.get('p50_ms', '-'):>9} ms  p95 {r.get('p95_ms', '-'):>9} ms  "
+                  f"p99 {r.get('p99_ms', '-'):>9} ms  {r['throughput_rps']:>9} req/s  errors {sum(r['errors'].values())}",
+                  file=sys.stderr)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(db_path: str, llm_url: str, args):
+    """Starts uvicorn on a free port; returns (process, base_url, config_path)."""
+    config = {"DB_BACKEND": "sqlite", "SQLITE_PATH": db_path, "API_URL": llm_url, "API_KEY": "benchmark",
+              "DB_POOL_SIZE": max(args.concurrency, 10)}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        config[key] = value
+    fd, config_path = tempfile.mkstemp(prefix="psa_bench_", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(config, f)
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, "PSA_CONFIG": config_path})
+    return process, f"http://127.0.0.1:{port}", config_path
+
+
+def wait_until_ready(base_url: str, process, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"❌ The API exited with code {process.returncode} during start-up.")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit(f"❌ The API wasn't ready after {timeout}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the PSA API.")
+    parser.add_argument("--db", help="SQLite database to use (generated if it doesn't exist).")
+    parser.add_argument("--employees", type=int, default=10000, help="Employees to generate.")
+    parser.add_argument("--skills-per-employee", type=int, default=15)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint first.")
+    parser.add_argument("--endpoints", help="Comma-separated endpoint names to run (default: all).")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="Stub LLM seconds per reply.")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="Stub LLM seconds per streamed word.")
+    parser.add_argument("--llm-fail-rate", type=float, default=0.0, help="Share of stub LLM calls answered with a 503.")
+    parser.add_argument("--llm-hang-rate", type=float, default=0.0, help="Share of stub LLM calls that stall for 30s.")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Extra API config, e.g. LLM_CACHE_SIZE=0.")
+    parser.add_argument("--base-url", help="Benchmark a running API instead of starting one.")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db or os.path.join(tempfile.gettempdir(), f"psa_bench_{args.employees}.db"))
+    generated_seconds = None
+    if not os.path.exists(db_path):
+        if args.base_url:
+            raise SystemExit("❌ --base-url needs --db pointing at the server's database.")
+        print(f"Generating {args.employees} employees into {db_path}...", file=sys.stderr)
+        started = time.perf_counter()
+        synthetic_data.generate(db_path, args.employees, args.skills_per_employee, args.seed)
+        generated_seconds = round(time.perf_counter() - started, 2)
+    data = load_request_data(db_path, args.seed)
+
+    workloads = build_workloads(data)
+    if args.endpoints:
+        wanted = set(args.endpoints.split(","))
+        workloads = [w for w in workloads if w.name in wanted]
+
+    process, config_path, stub = None, None, None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+        else:
+            stub, llm_url = start_stub_server(0, args.llm_delay, args.llm_token_delay,
+                                              Faults(fail_rate=args.llm_fail_rate, hang_rate=args.llm_hang_rate, seed=args.seed))
+            process, base_url, config_path = start_api(db_path, llm_url, args)
+        ready_seconds = wait_until_ready(base_url, process, args.timeout)
+        health = httpx.get(f"{base_url}/healthz", timeout=5).json()
+        print(f"API ready in {ready_seconds:.2f}s; running {len(workloads)} endpoints "
+              f"x {args.requests} requests at concurrency {args.concurrency}...", file=sys.stderr)
+        results = asyncio.run(run_all(base_url, workloads, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if stub is not None:
+            stub.shutdown()
+        if config_path:
+            os.remove(config_path)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "database": db_path, "employees": len(data["employees"]) if args.base_url else None,
+            "generated_employees": args.employees if generated_seconds is not None else None,
+            "generate_seconds": generated_seconds,
+            "concurrency": args.concurrency, "requests": args.requests, "warmup": args.warmup,
+            "workers": args.workers, "llm_delay": args.llm_delay, "config": args.set,
+            "llm_fail_rate": args.llm_fail_rate, "llm_hang_rate": args.llm_hang_rate,
+            "ready_seconds": round(ready_seconds, 3), "import_seconds": health.get("import_seconds"),
+        },
+        "endpoints": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
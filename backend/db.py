@@ -0,0 +1,458 @@
+# db.py
+"""
+Pooled, thread-safe database access shared by the API and the offline scripts.
+
+Endpoints run inside `transaction()` (or the `@transactional` decorator) and
+grab cursors with `cursor()`. Nested calls, e.g. the chatbot calling
+`get_career_recommendations`, reuse the connection that is already checked
+out for the request instead of taking a second one from the pool.
+"""
+import contextvars
+import hashlib
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache, wraps
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+# --- Backends ---
+
+class MSSQLBackend:
+    """SQL Server through pyodbc, as used in production."""
+    name = "mssql"
+    supports_batches = True  # Several SELECTs in one execute, read back with nextset()
+
+    def __init__(self, conn_str: str):
+        self.conn_str = conn_str
+
+    def connect(self):
+        import pyodbc  # Imported lazily so SQLite-only environments don't need the ODBC driver
+        return pyodbc.connect(self.conn_str, autocommit=False)
+
+    def ping(self, conn):
+        conn.cursor().execute("SELECT 1").fetchone()
+
+
+class SQLiteBackend:
+    """Local SQLite stand-in with a pyodbc-compatible cursor, for tests and benchmarks."""
+    name = "sqlite"
+    supports_batches = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self):
+        raw = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA busy_timeout = 5000")
+        raw.create_function("ROW_HASH", -1, _row_hash, deterministic=True)
+        return SQLiteConnection(raw)
+
+    def ping(self, conn):
+        conn.cursor().execute("SELECT 1").fetchone()
+
+
+def backend_from_config(config: dict):
+    """Builds the backend described by the configuration (DB_BACKEND defaults to SQL Server)."""
+    backend = str(config.get('DB_BACKEND') or 'mssql').lower()
+    if backend == 'sqlite':
+        return SQLiteBackend(config.get('SQLITE_PATH') or 'psa_local.db')
+    conn_str = (
+        f"DRIVER={config['DRIVER']};"
+        f"SERVER={config['SERVER']};"
+        f"DATABASE={config['DATABASE']};"
+        "Trusted_Connection=yes;"
+        "MARS_Connection=yes;"
+    )
+    return MSSQLBackend(conn_str)
+
+
+# --- SQLite compatibility layer ---
+# Just enough of the pyodbc surface for the queries in main.py: positional `?`
+# params passed either as varargs or a sequence, attribute access on rows,
+# DATE and DATETIME columns returned as `date` and `datetime` objects and
+# `SELECT TOP n` rewritten to LIMIT.
+# ROW_HASH(values...) stands in for HASHBYTES, which SQLite lacks.
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+
+_TOP_PATTERN = re.compile(r"\bSELECT\s+TOP\s+(\d+)\s+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _translate_sql(sql: str) -> str:
+    """Rewrites the single outermost `SELECT TOP n` of a T-SQL statement into a LIMIT clause."""
+    match = _TOP_PATTERN.search(sql)
+    if not match:
+        return sql
+    body = (sql[:match.start()] + "SELECT " + sql[match.end():]).rstrip().rstrip(';')
+    return f"{body}\nLIMIT {match.group(1)}"
+
+
+def _row_hash(*values):
+    """A 32-bit hash of the values, NULLs and types included; not linear, so sums of it don't cancel out."""
+    return int.from_bytes(hashlib.blake2b(repr(values).encode(), digest_size=4).digest(), "big")
+
+
+@lru_cache(maxsize=256)
+def _row_class(columns: tuple):
+    return namedtuple("Row", columns, rename=True)
+
+
+def _row_factory(cursor, values):
+    return _row_class(tuple(column[0] for column in cursor.description))(*values)
+
+
+def _normalize_params(params):
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return tuple(params[0])
+    return params
+
+
+class SQLiteCursor:
+    def __init__(self, raw_cursor):
+        self._cursor = raw_cursor
+        self._cursor.row_factory = _row_factory
+        self.fast_executemany = False  # Accepted for pyodbc compatibility; SQLite batches natively
+
+    def execute(self, sql, *params):
+        self._cursor.execute(_translate_sql(sql), _normalize_params(params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(_translate_sql(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self):
+        return SQLiteCursor(self.raw.cursor())
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+
+# --- Statement timing ---
+
+class TimedCursor:
+    """
+    Wraps a driver cursor and reports every execute, executemany and fetch
+    to an observer as observer(sql, phase, seconds, rows). Everything else
+    (description, rowcount, fast_executemany, ...) passes straight through.
+    """
+
+    def __init__(self, cursor, observer):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_observer", observer)
+        object.__setattr__(self, "_sql", "")
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def _timed(self, phase, call, rows=None):
+        started = time.perf_counter()
+        result = call()
+        count = rows(result) if rows else 0
+        self._observer(self._sql, phase, time.perf_counter() - started, count)
+        return result
+
+    def execute(self, sql, *params):
+        object.__setattr__(self, "_sql", sql)
+        self._timed("execute", lambda: self._cursor.execute(sql, *params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        object.__setattr__(self, "_sql", sql)
+        self._timed("executemany", lambda: self._cursor.executemany(sql, seq_of_params))
+        return self
+
+    def fetchone(self):
+        return self._timed("fetch", self._cursor.fetchone, lambda row: 0 if row is None else 1)
+
+    def fetchall(self):
+        return self._timed("fetch", self._cursor.fetchall, len)
+
+    def fetchmany(self, size=None):
+        call = self._cursor.fetchmany if size is None else lambda: self._cursor.fetchmany(size)
+        return self._timed("fetch", call, len)
+
+    def __iter__(self):
+        # Reported once the rows run out, with only the time spent fetching
+        iterator, rows, seconds = iter(self._cursor), 0, 0.0
+        while True:
+            started = time.perf_counter()
+            row = next(iterator, None)
+            seconds += time.perf_counter() - started
+            if row is None:
+                self._observer(self._sql, "fetch", seconds, rows)
+                return
+            rows += 1
+            yield row
+
+
+# --- Connection pool ---
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB connections. Connections are opened on demand up to
+    `size`, health-checked when they have been idle for `ping_after` seconds,
+    recycled after `recycle_after` seconds and replaced if they turn out broken.
+    """
+
+    def __init__(self, backend, size: int = 10, timeout: float = 30.0,
+                 ping_after: float = 30.0, recycle_after: float = 1800.0):
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle_after = recycle_after
+        self._idle = queue.LifoQueue()  # LIFO keeps the warmest connections in use
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._in_use = 0
+
+    def _open(self) -> _PooledConnection:
+        try:
+            return _PooledConnection(self.backend.connect())
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    def _checkout(self, timeout=None) -> _PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._opened < self.size
+                    if can_open:
+                        self._opened += 1
+                if can_open:
+                    pooled = self._open()
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {timeout}s.")
+                try:
+                    pooled = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            now = time.monotonic()
+            if now - pooled.created_at > self.recycle_after:
+                self._discard(pooled)
+                continue
+            if now - pooled.last_used > self.ping_after:
+                try:
+                    self.backend.ping(pooled.conn)
+                except Exception:
+                    print("⚠️ WARNING: Dropping a broken database connection and reconnecting.")
+                    self._discard(pooled)
+                    continue
+            break
+
+        with self._lock:
+            self._in_use += 1
+        return pooled
+
+    def _checkin(self, pooled: _PooledConnection, broken: bool = False):
+        with self._lock:
+            self._in_use -= 1
+        if broken:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        self._idle.put(pooled)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Checks a connection out for the duration of the block, without transaction handling."""
+        pooled = self._checkout(timeout)
+        broken = False
+        try:
+            yield pooled.conn
+        except BaseException:
+            try:
+                pooled.conn.rollback()
+            except Exception:
+                broken = True  # A connection that cannot roll back is not safe to reuse
+            raise
+        finally:
+            self._checkin(pooled, broken)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the block in a transaction: commit on success, rollback on error.
+        Re-entrant within the same request, where the outer block owns the commit.
+        """
+        current = _current.get()
+        if current is not None and current[0] is self:
+            yield current[1]
+            return
+
+        with self.connection() as conn:
+            token = _current.set((self, conn))
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                _current.reset(token)
+
+    def check(self, timeout: float = 2.0):
+        """Raises unless a connection can be checked out within `timeout` seconds and answers a ping."""
+        with self.connection(timeout) as conn:
+            self.backend.ping(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.backend.name, "size": self.size, "open": self._opened,
+                    "in_use": self._in_use, "idle": self._idle.qsize()}
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+# --- Module-level pool used by the API ---
+
+_current = contextvars.ContextVar("psa_db_transaction", default=None)
+_pool = None
+_statement_observer = None
+
+
+def configure(backend, **pool_options) -> ConnectionPool:
+    """Installs the process-wide pool. Connections are only opened when first needed."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = ConnectionPool(backend, **pool_options)
+    return _pool
+
+
+def observe_statements(observer):
+    """Reports every statement run on `cursor()` cursors to observer(sql, phase, seconds, rows); None stops it."""
+    global _statement_observer
+    _statement_observer = observer
+
+
+def get_pool() -> ConnectionPool:
+    if _pool is None:
+        raise RuntimeError("Database pool is not configured.")
+    return _pool
+
+
+def transaction():
+    return get_pool().transaction()
+
+
+def cursor():
+    """Returns a cursor on the connection of the current transaction."""
+    current = _current.get()
+    if current is None:
+        raise RuntimeError("db.cursor() called outside of a transaction.")
+    cursor = current[1].cursor()
+    return cursor if _statement_observer is None else TimedCursor(cursor, _statement_observer)
+
+
+def fetch_batch(cursor, statements) -> list:
+    """
+    Runs independent SELECTs [(sql, params), ...] and returns (columns, rows)
+    for each. On SQL Server they go out as one batch, a single round trip
+    read back with nextset(); SQLite, which is in-process, runs them in turn.
+    """
+    current = _current.get()
+    if current is None:
+        raise RuntimeError("db.fetch_batch() called outside of a transaction.")
+    results = []
+    if current[0].backend.supports_batches and len(statements) > 1:
+        sql = ";\n".join(statement.strip().rstrip(";") for statement, _ in statements)
+        cursor.execute(sql, [param for _, params in statements for param in params])
+        for i in range(len(statements)):
+            if i and not cursor.nextset():
+                raise RuntimeError("The batch returned fewer result sets than statements.")
+            results.append(([column[0] for column in cursor.description], cursor.fetchall()))
+        return results
+    for statement, params in statements:
+        cursor.execute(statement, *params)
+        results.append(([column[0] for column in cursor.description], cursor.fetchall()))
+    return results
+
+
+def transactional(func):
+    """Runs a sync endpoint inside `transaction()`; FastAPI still sees the original signature."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with transaction():
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,99 @@
+# employee_cache.py
+"""
+Per-employee version counters and a cache keyed by them.
+
+Every write path that touches an employee's rows calls `bump(employee_id)`
+after it commits. Cached values remember the version they were computed
+from and are ignored as soon as it moves on, so stale data can't be served
+even when a write races a read. Changes that affect everyone, such as the
+skill catalog being rebuilt, call `bump_all()`.
+
+The same versions back the ETags on the employee read endpoints: a tag is a
+hash over the route, the employee's version and anything else the response
+depends on, so checking `If-None-Match` needs no database read.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class EmployeeVersions:
+    def __init__(self):
+        self._epoch = 0  # Bumped for changes that affect every employee
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, employee_id: str) -> tuple:
+        return (self._epoch, self._versions.get(employee_id, 0))
+
+    def bump(self, employee_id: str) -> tuple:
+        with self._lock:
+            self._versions[employee_id] = self._versions.get(employee_id, 0) + 1
+            return (self._epoch, self._versions[employee_id])
+
+    def bump_all(self):
+        with self._lock:
+            self._epoch += 1
+
+
+def make_etag(*parts) -> str:
+    """A strong ETag over `parts`, e.g. (route, employee_id, version)."""
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest()[:24] + '"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as GET revalidation uses)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class VersionedCache:
+    """
+    An LRU of (employee_id, key) -> value, valid only while the employee's
+    version is unchanged. `ttl` is a safety net for writes made outside the
+    API, which cannot bump the version.
+    """
+
+    def __init__(self, versions: EmployeeVersions, max_entries: int = 10000, ttl: float = 300.0):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (employee_id, key) -> (version, expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, employee_id: str, key=None):
+        version = self.versions.get(employee_id)
+        with self._lock:
+            entry = self._entries.get((employee_id, key))
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self._entries.move_to_end((employee_id, key))
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, employee_id: str, value, key=None, version=None):
+        """Stores `value` as computed at `version` (read it *before* computing)."""
+        if version is None:
+            version = self.versions.get(employee_id)
+        with self._lock:
+            self._entries[(employee_id, key)] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((employee_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, employee_id: str, compute, key=None):
+        """Returns the cached value, or computes and caches it. None results are not cached."""
+        version = self.versions.get(employee_id)
+        value = self.get(employee_id, key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(employee_id, value, key=key, version=version)
+        return value
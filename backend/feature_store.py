@@ -0,0 +1,132 @@
+# feature_store.py
+"""
+Per-employee leadership features kept in memory and maintained incrementally.
+
+Stores (hire_date, num_promotions, num_skills) per employee. Tenure is not
+stored: `days_with_company` is derived from hire_date whenever features are
+read, so the store never goes stale with the calendar. The API updates
+num_skills after its own writes, and both serving and training read from
+here instead of re-aggregating the raw tables.
+
+Position history is written by HR systems rather than the API, so every
+`check_interval` seconds the store compares the table's row count and
+highest history_id with what it last saw, and re-reads just the employees
+that have new rows. Anything that isn't a plain insert (a deleted or moved
+row), and any write made outside this process, is picked up by the full
+reload every `max_age` seconds.
+"""
+import threading
+import time
+
+import leadership
+
+POSITIONS_SIGNATURE_SQL = "SELECT COUNT(*) AS row_count, MAX(history_id) AS last_id FROM position_history"
+
+
+class LeadershipFeatureStore:
+    def __init__(self, max_age: float = 3600.0, check_interval: float = 30.0, on_refresh=None):
+        self.max_age = max_age  # Full reload after this long
+        self.check_interval = check_interval  # Seconds between checks for new position history rows
+        self.on_refresh = on_refresh  # Called with the re-read employee ids, or None after a full reload
+        self._rows = {}  # employee_id -> (hire_date, num_promotions, num_skills)
+        self._loaded_at = None
+        self._checked_at = None
+        self._positions = None  # (row count, highest history_id) when last checked
+        self._lock = threading.Lock()  # Guards _rows
+        self._refresh_lock = threading.Lock()  # One load or check at a time
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _positions_signature(self, cursor):
+        row = cursor.execute(POSITIONS_SIGNATURE_SQL).fetchone()
+        return row.row_count, row.last_id or 0
+
+    def load(self, cursor):
+        """(Re)builds the whole store with one grouped query per table."""
+        positions = self._positions_signature(cursor)  # First, so rows added during the load are re-read, not missed
+        rows = leadership.fetch_all_raw_features(cursor)
+        with self._lock:
+            self._rows = rows
+        self._positions = positions
+        reloaded = self._loaded_at is not None
+        self._loaded_at = self._checked_at = time.monotonic()
+        print(f"✅ Leadership feature store loaded for {len(rows)} employees.")
+        if reloaded and self.on_refresh is not None:
+            self.on_refresh(None)
+
+    def ensure_current(self, cursor):
+        """Loads on first use or after max_age, and applies new position history rows every check_interval."""
+        now = time.monotonic()
+        stale = self._loaded_at is None or (self.max_age and now - self._loaded_at > self.max_age)
+        if not stale and now - self._checked_at < self.check_interval:
+            return self
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._loaded_at is None or (self.max_age and now - self._loaded_at > self.max_age):
+                self.load(cursor)
+            elif now - self._checked_at >= self.check_interval:
+                self._check_positions(cursor)
+        return self
+
+    def _check_positions(self, cursor):
+        row_count, last_id = self._positions_signature(cursor)
+        known_count, known_last_id = self._positions
+        new_employees, new_rows = [], 0
+        if last_id > known_last_id:
+            cursor.execute("SELECT employee_id FROM position_history WHERE history_id > ? AND history_id <= ?",
+                           known_last_id, last_id)
+            employee_ids = [row.employee_id for row in cursor.fetchall()]
+            new_rows, new_employees = len(employee_ids), list(dict.fromkeys(employee_ids))
+        if row_count != known_count + new_rows:
+            self.load(cursor)  # Rows were deleted (or the ids reused): no cheap way to tell whose
+            return
+        if new_employees:
+            self.refresh_employees(cursor, new_employees)
+            if self.on_refresh is not None:
+                self.on_refresh(new_employees)
+        self._positions = (row_count, last_id)
+        self._checked_at = time.monotonic()
+
+    def get_or_load(self, cursor, employee_ids) -> dict:
+        """
+        Keyed lookup for a batch of employees. Only ids the store has never
+        seen (e.g. employees added directly in the database) hit the DB.
+        """
+        self.ensure_current(cursor)
+        with self._lock:
+            found = {e: self._rows[e] for e in employee_ids if e in self._rows}
+        missing = [e for e in employee_ids if e not in found]
+        if missing:
+            fetched = leadership.fetch_raw_features(cursor, missing)
+            with self._lock:
+                self._rows.update(fetched)
+            found.update(fetched)
+        return found
+
+    # --- Incremental maintenance, called after the corresponding write commits ---
+
+    def set_num_skills(self, employee_id: str, num_skills: int):
+        with self._lock:
+            row = self._rows.get(employee_id)
+            if row is not None:
+                self._rows[employee_id] = (row[0], row[1], num_skills)
+
+    def refresh_employees(self, cursor, employee_ids):
+        """Re-reads some employees, for changes the store cannot apply as a delta."""
+        fetched = leadership.fetch_raw_features(cursor, employee_ids)
+        with self._lock:
+            for employee_id in employee_ids:
+                if employee_id in fetched:
+                    self._rows[employee_id] = fetched[employee_id]
+                else:
+                    self._rows.pop(employee_id, None)
+
+    def snapshot(self) -> dict:
+        """A point-in-time copy of all rows, e.g. for training."""
+        with self._lock:
+            return dict(self._rows)
@@ -0,0 +1,83 @@
+# leadership.py
+"""
+Feature loading, scoring and explanations for the leadership potential model.
+
+Shared by the single-employee endpoint, the batch endpoint, the feature
+store and training, so all of them use the same features and scoring code.
+"""
+from datetime import datetime
+
+import numpy as np
+
+FEATURES = ['days_with_company', 'num_promotions', 'num_skills']
+IN_CLAUSE_CHUNK = 1000  # SQL Server allows at most 2100 parameters per statement
+
+
+def _chunks(employee_ids):
+    for start in range(0, len(employee_ids), IN_CLAUSE_CHUNK):
+        chunk = employee_ids[start:start + IN_CLAUSE_CHUNK]
+        yield chunk, ','.join('?' for _ in chunk)
+
+
+def fetch_raw_features(cursor, employee_ids) -> dict:
+    """
+    Loads {employee_id: (hire_date, num_promotions, num_skills)} with one
+    grouped query per table. Like the single-employee endpoint always has,
+    an employee without position history counts COUNT(history_id) - 1 = -1
+    promotions.
+    """
+    hire_dates, promotions, skills = {}, {}, {}
+    for chunk, placeholders in _chunks(list(dict.fromkeys(employee_ids))):
+        cursor.execute(f"SELECT employee_id, hire_date FROM employees WHERE employee_id IN ({placeholders})", tuple(chunk))
+        hire_dates.update((row.employee_id, row.hire_date) for row in cursor.fetchall())
+        cursor.execute(f"SELECT employee_id, COUNT(history_id) - 1 AS num_promotions FROM position_history WHERE employee_id IN ({placeholders}) GROUP BY employee_id", tuple(chunk))
+        promotions.update((row.employee_id, row.num_promotions) for row in cursor.fetchall())
+        cursor.execute(f"SELECT employee_id, COUNT(id) AS num_skills FROM employee_skills WHERE employee_id IN ({placeholders}) GROUP BY employee_id", tuple(chunk))
+        skills.update((row.employee_id, row.num_skills) for row in cursor.fetchall())
+
+    return {
+        employee_id: (hire_date, promotions.get(employee_id, -1), skills.get(employee_id, 0))
+        for employee_id, hire_date in hire_dates.items()
+    }
+
+
+def fetch_all_raw_features(cursor) -> dict:
+    """Same as `fetch_raw_features`, for every employee (used to build the feature store)."""
+    cursor.execute("SELECT employee_id, hire_date FROM employees")
+    hire_dates = {row.employee_id: row.hire_date for row in cursor.fetchall()}
+    cursor.execute("SELECT employee_id, COUNT(history_id) - 1 AS num_promotions FROM position_history GROUP BY employee_id")
+    promotions = {row.employee_id: row.num_promotions for row in cursor.fetchall()}
+    cursor.execute("SELECT employee_id, COUNT(id) AS num_skills FROM employee_skills GROUP BY employee_id")
+    skills = {row.employee_id: row.num_skills for row in cursor.fetchall()}
+    return {
+        employee_id: (hire_date, promotions.get(employee_id, -1), skills.get(employee_id, 0))
+        for employee_id, hire_date in hire_dates.items()
+    }
+
+
+def build_feature_matrix(raw_features: dict, employee_ids):
+    """Turns raw features into the model's (n, 3) matrix, deriving tenure as of today."""
+    today = datetime.now().date()
+    return np.array(
+        [[(today - raw_features[e][0]).days, raw_features[e][1], raw_features[e][2]] for e in employee_ids],
+        dtype=np.float64,
+    ).reshape(len(employee_ids), len(FEATURES))
+
+
+def predict_scores(model, scaler, features_array) -> np.ndarray:
+    """One transform and one predict_proba call for the whole batch; returns 0-100 scores."""
+    features_scaled = scaler.transform(features_array)
+    # Probability of being in the 'leader' class (class 1)
+    probabilities = model.predict_proba(features_scaled)[:, 1]
+    return (probabilities * 100).astype(int)
+
+
+def explain(score, days_with_company, num_promotions, num_skills) -> dict:
+    return {
+        "score": int(score),
+        "positive_factors": [
+            f"Strong tenure of {int(days_with_company) // 365} years with the company.",
+            f"Demonstrated growth with {int(num_promotions) if num_promotions > 0 else 0} promotion(s).",
+            f"Broad expertise with {int(num_skills)} skills on record."
+        ]
+    }
@@ -1,83 +1,293 @@
-import pyodbc
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import log_loss, roc_auc_score
 from sklearn.preprocessing import StandardScaler
 import joblib
-from datetime import datetime
+
+import db
+from leadership import FEATURES
+from model_registry import export_artifact
+from settings import load_config
+
+try:
+    import resource  # Peak memory reporting; not available on Windows
+except ImportError:
+    resource = None
 
 # --- ONLY RUN THIS FILE IF THE TRAINED MODEL FILES DO NOT EXIST ---
+#
+#   python leadership_model.py                                   # LogisticRegression in memory, as before
+#   python leadership_model.py --mode incremental                # SGD partial_fit over chunks, bounded memory
+#   python leadership_model.py --mode incremental --search --workers 4
+#
+# The database aggregates the features (one grouped query) and the rows are
+# read in chunks of --chunk-size and spooled to a local file. Epochs, folds
+# and search candidates then re-read that file, so the database is only
+# queried once however much training follows.
+#
+# The features are aggregated again by TRAINING_SQL rather than taken from the
+# API's LeadershipFeatureStore: this script runs as its own process, without a
+# loaded store, and computes the same FEATURES from the same tables.
 
+# For this model, we define a leader as anyone with "Manager", "Lead", or "Architect" in their title.
+# In a real-world scenario, this would be based on more robust performance data.
+LEADER_KEYWORDS = ['Manager', 'Lead', 'Architect']
+CLASSES = np.array([0, 1])
+SPOOL_COLUMNS = len(FEATURES) + 2  # The features, is_leader and a hash of employee_id for fold assignment
 
-# --- 1. Database Connection ---
-# Use the same connection details as your main.py, 
-DB_CONFIG = {
-    'driver': '{ODBC Driver 17 for SQL Server}', 
-    'server': r'LAPTOP-PD6OCT58\SQLEXPRESS12',
-    'database': 'PSA_Hackathon_2025',
-    'Trusted_Connection': 'yes',
-    'MARS_Connection': 'yes'
+SEARCH_GRID = {
+    'full': [{'C': C} for C in (0.01, 0.1, 1.0, 10.0)],
+    'incremental': [{'alpha': alpha} for alpha in (1e-5, 1e-4, 1e-3, 1e-2)],
 }
 
-def train_and_save_model():
+TRAINING_SQL = """
+    SELECT e.employee_id, e.job_title, e.hire_date,
+           COALESCE(ph.num_positions, 0) AS num_positions,
+           COALESCE(es.num_skills, 0) AS num_skills
+    FROM employees e
+    LEFT JOIN (SELECT employee_id, COUNT(history_id) AS num_positions FROM position_history GROUP BY employee_id) ph
+        ON ph.employee_id = e.employee_id
+    LEFT JOIN (SELECT employee_id, COUNT(id) AS num_skills FROM employee_skills GROUP BY employee_id) es
+        ON es.employee_id = e.employee_id
+"""
+
+
+# --- 1. Streaming the features ---
+
+def stream_training_rows(cursor, chunk_size: int):
+    """Yields (rows, SPOOL_COLUMNS) float64 chunks of the aggregated training data."""
+    today = datetime.now().date()
+    cursor.execute(TRAINING_SQL)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        chunk = np.empty((len(rows), SPOOL_COLUMNS), dtype=np.float64)
+        for i, row in enumerate(rows):
+            chunk[i] = (
+                (today - row.hire_date).days if row.hire_date else 0,
+                max(row.num_positions - 1, 0),  # Employees without any position history count as 0 promotions
+                row.num_skills,
+                1 if row.job_title and any(keyword in row.job_title for keyword in LEADER_KEYWORDS) else 0,
+                zlib.crc32(row.employee_id.encode()),
+            )
+        yield chunk
+
+
+def spool_training_data(cursor, path: str, chunk_size: int) -> int:
+    """Writes the streamed rows to `path` as raw float64; returns the row count."""
+    rows = 0
+    with open(path, 'wb') as f:
+        for chunk in stream_training_rows(cursor, chunk_size):
+            f.write(chunk.tobytes())
+            rows += len(chunk)
+    return rows
+
+
+def open_spool(path: str, rows: int):
+    return np.memmap(path, dtype=np.float64, mode='r', shape=(rows, SPOOL_COLUMNS))
+
+
+def close_spool(data):
+    """Unmaps the spool now rather than when the memmap is garbage collected, so the file can be removed."""
+    mapping = getattr(data, '_mmap', None)
+    if mapping is not None:
+        mapping.close()
+
+
+def iter_chunks(data, chunk_size: int, folds: int = 0, holdout=None, only_holdout=False):
+    """(X, y) chunks of the spooled data, optionally without (or only) one cross-validation fold."""
+    for start in range(0, len(data), chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size])
+        if holdout is not None:
+            in_holdout = chunk[:, -1].astype(np.int64) % folds == holdout
+            chunk = chunk[in_holdout if only_holdout else ~in_holdout]
+        if len(chunk):
+            yield chunk[:, :len(FEATURES)], chunk[:, len(FEATURES)].astype(np.int64)
+
+
+# --- 2. Model Training ---
+
+def fit_full(data, params: dict, chunk_size: int, folds: int = 0, holdout=None):
+    """StandardScaler + balanced LogisticRegression on all (training) rows at once."""
+    parts = list(iter_chunks(data, chunk_size, folds, holdout))
+    X = np.concatenate([X for X, _ in parts])
+    y = np.concatenate([y for _, y in parts])
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = LogisticRegression(random_state=42, class_weight='balanced', C=params.get('C', 1.0))
+    model.fit(X_scaled, y)
+    return model, scaler
+
+
+def fit_incremental(data, params: dict, chunk_size: int, epochs: int, folds: int = 0, holdout=None):
     """
-    Connects to the database, engineers features, trains a leadership
-    prediction model, and saves it to a file.
+    StandardScaler.partial_fit over one pass, then SGD logistic regression
+    with partial_fit for `epochs` passes. Only one chunk is in memory at a time.
     """
-    print("Connecting to the database...")
-    conn_str = ';'.join(f'{k}={v}' for k, v in DB_CONFIG.items())
-    conn = pyodbc.connect(conn_str)
-
-    # --- 2. Feature Engineering ---
-    # We'll gather data from various tables to build features.
-    print("Fetching data and engineering features...")
-    
-    # Get basic employee info like tenure
-    employees_query = "SELECT employee_id, hire_date, job_title FROM employees"
-    employees_df = pd.read_sql(employees_query, conn)
-    employees_df['hire_date'] = pd.to_datetime(employees_df['hire_date'])
-    employees_df['days_with_company'] = (datetime.now() - employees_df['hire_date']).dt.days
-
-    # Get number of promotions (position changes)
-    promotions_query = "SELECT employee_id, COUNT(history_id) - 1 AS num_promotions FROM position_history GROUP BY employee_id"
-    promotions_df = pd.read_sql(promotions_query, conn)
-
-    # Get number of skills
-    skills_query = "SELECT employee_id, COUNT(id) AS num_skills FROM employee_skills GROUP BY employee_id"
-    skills_df = pd.read_sql(skills_query, conn)
-
-    # Merge all data into a single DataFrame
-    df = pd.merge(employees_df, promotions_df, on='employee_id', how='left')
-    df = pd.merge(df, skills_df, on='employee_id', how='left')
-    df.fillna(0, inplace=True)
-
-    # --- 3. Define the Target Variable (What is "Leadership"?) ---
-    # For this model, we'll define a leader as anyone with "Manager", "Lead", or "Architect" in their title.
-    # In a real-world scenario, this would be based on more robust performance data.
-    leader_keywords = ['Manager', 'Lead', 'Architect']
-    df['is_leader'] = df['job_title'].apply(lambda x: 1 if any(keyword in x for keyword in leader_keywords) else 0)
-
-    # --- 4. Model Training ---
-    print("Training the leadership potential model...")
-    
-    # Define features and target
-    features = ['days_with_company', 'num_promotions', 'num_skills']
-    X = df[features]
-    y = df['is_leader']
-
-    # Scale the features for better performance
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    class_counts = np.zeros(len(CLASSES))
+    for X, y in iter_chunks(data, chunk_size, folds, holdout):
+        scaler.partial_fit(X)
+        class_counts += np.bincount(y, minlength=len(CLASSES))
+    # class_weight='balanced' isn't available to partial_fit, so apply it as sample weights
+    class_weights = class_counts.sum() / (len(CLASSES) * np.maximum(class_counts, 1))
 
-    # Train a simple logistic regression model
-    model = LogisticRegression(random_state=42, class_weight='balanced')
-    model.fit(X_scaled, y)
+    model = SGDClassifier(loss='log_loss', alpha=params.get('alpha', 1e-4), random_state=42)
+    for _ in range(epochs):
+        for X, y in iter_chunks(data, chunk_size, folds, holdout):
+            model.partial_fit(scaler.transform(X), y, classes=CLASSES, sample_weight=class_weights[y])
+    return model, scaler
+
+
+def fit(mode, data, params, chunk_size, epochs, folds=0, holdout=None):
+    if mode == 'incremental':
+        return fit_incremental(data, params, chunk_size, epochs, folds, holdout)
+    return fit_full(data, params, chunk_size, folds, holdout)
+
+
+# --- 3. Cross-validation and hyperparameter search ---
+
+def evaluate(model, scaler, data, chunk_size: int, folds: int, holdout: int) -> dict:
+    probabilities, labels = [], []
+    for X, y in iter_chunks(data, chunk_size, folds, holdout, only_holdout=True):
+        probabilities.append(model.predict_proba(scaler.transform(X))[:, 1])
+        labels.append(y)
+    if not labels:
+        return {"rows": 0}
+    p, y = np.concatenate(probabilities), np.concatenate(labels)
+    metrics = {"rows": int(len(y)), "log_loss": float(log_loss(y, p, labels=CLASSES)),
+               "accuracy": float(((p >= 0.5) == y).mean())}
+    if len(np.unique(y)) == 2:
+        metrics["roc_auc"] = float(roc_auc_score(y, p))
+    return metrics
+
+
+def cross_validate_task(spool_path, rows, mode, params, chunk_size, epochs, folds, holdout):
+    """One (candidate, fold) pair; runs in a worker process that maps the spooled data itself."""
+    data = open_spool(spool_path, rows)
+    try:
+        model, scaler = fit(mode, data, params, chunk_size, epochs, folds, holdout)
+        return params, holdout, evaluate(model, scaler, data, chunk_size, folds, holdout)
+    finally:
+        close_spool(data)
+
+
+def search(spool_path, rows, mode, chunk_size, epochs, folds, workers) -> tuple:
+    """Evaluates every candidate on every fold across a process pool; returns (best_params, results)."""
+    candidates = SEARCH_GRID[mode]
+    tasks = [(params, holdout) for params in candidates for holdout in range(folds)]
+    scores = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(cross_validate_task, spool_path, rows, mode, params, chunk_size, epochs, folds, holdout)
+                   for params, holdout in tasks]
+        for future in futures:
+            params, holdout, metrics = future.result()
+            if metrics.get("rows"):
+                scores.setdefault(tuple(sorted(params.items())), []).append(metrics)
+
+    results = []
+    for key, fold_metrics in scores.items():
+        weights = [m["rows"] for m in fold_metrics]
+        results.append({
+            "params": dict(key),
+            "log_loss": float(np.average([m["log_loss"] for m in fold_metrics], weights=weights)),
+            "accuracy": float(np.average([m["accuracy"] for m in fold_metrics], weights=weights)),
+            "folds": len(fold_metrics),
+        })
+    results.sort(key=lambda r: r["log_loss"])
+    for r in results:
+        print(f"   {r['params']}: log loss {r['log_loss']:.4f}, accuracy {r['accuracy']:.3f} over {r['folds']} folds")
+    return (results[0]["params"] if results else candidates[0]), results
+
+
+def peak_memory_mb() -> dict:
+    """Peak resident memory of this process and of its (finished) worker processes."""
+    if resource is None:
+        return {}
+    scale = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return {
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def train_and_save_model(mode='full', chunk_size=50000, epochs=5, run_search=False, folds=5, workers=None):
+    """
+    Reads the features from the database named in the shared config, trains a
+    leadership prediction model, and saves it to the pickle and JSON files.
+    """
+    started = time.perf_counter()
+
+    # --- 1. Database Connection (the same config as main.py) ---
+    print("Connecting to the database...")
+    conn = db.backend_from_config(load_config()).connect()
+    spool_dir = tempfile.mkdtemp(prefix='psa_training_')
+    spool_path = os.path.join(spool_dir, 'features.bin')
+    data = None
+    try:
+        # --- 2. Feature Engineering ---
+        print(f"Streaming aggregated features in chunks of {chunk_size} rows...")
+        try:
+            rows = spool_training_data(conn.cursor(), spool_path, chunk_size)
+        finally:
+            conn.close()
+        if rows == 0:
+            raise SystemExit("❌ No employees to train on.")
+        data = open_spool(spool_path, rows)
+        print(f"   {rows} employees, {int(data[:, len(FEATURES)].sum())} leaders.")
+
+        # --- 3. Optional cross-validated hyperparameter search ---
+        params, search_results = {}, []
+        if run_search:
+            print(f"Searching {len(SEARCH_GRID[mode])} candidates x {folds} folds on {workers or os.cpu_count()} workers...")
+            params, search_results = search(spool_path, rows, mode, chunk_size, epochs, folds, workers)
+            print(f"   Best: {params}")
+
+        # --- 4. Model Training ---
+        print(f"Training the leadership potential model ({mode})...")
+        model, scaler = fit(mode, data, params, chunk_size, epochs)
+
+        # --- 5. Save the Model and Scaler ---
+        # We save both so we can make predictions on new data later.
+        joblib.dump(model, 'leadership_model.pkl')
+        joblib.dump(scaler, 'scaler.pkl')
+        print("✅ Model and scaler have been saved to 'leadership_model.pkl' and 'scaler.pkl'.")
+
+        report = {"mode": mode, "rows": rows, "params": params, "wall_seconds": round(time.perf_counter() - started, 2),
+                  **peak_memory_mb()}
+        # The API scores from this compact copy (and reloads it when it changes)
+        artifact = export_artifact(model, scaler, metadata={**report, "leaders": int(data[:, len(FEATURES)].sum()),
+                                                            "search": search_results})
+        print(f"✅ Compact model version {artifact['version']} saved to 'leadership_model.json'.")
+        print(f"⏱️ Training took {report['wall_seconds']}s" +
+              (f", peak memory {report['peak_rss_mb']} MB (workers {report['peak_worker_rss_mb']} MB)." if resource else "."))
+        return report
+    finally:
+        # Windows can't delete a file that is still mapped
+        if data is not None:
+            close_spool(data)
+            del data
+        shutil.rmtree(spool_dir, ignore_errors=True)
 
-    # --- 5. Save the Model and Scaler ---
-    # We save both so we can make predictions on new data later.
-    joblib.dump(model, 'leadership_model.pkl')
-    joblib.dump(scaler, 'scaler.pkl')
-    print("✅ Model and scaler have been saved to 'leadership_model.pkl' and 'scaler.pkl'.")
 
 if __name__ == "__main__":
-    train_and_save_model()
+    parser = argparse.ArgumentParser(description="Train the leadership potential model.")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full",
+                        help="'full' fits LogisticRegression in memory; 'incremental' streams chunks through SGD partial_fit.")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per fetch and per training chunk.")
+    parser.add_argument("--epochs", type=int, default=5, help="Passes over the data in incremental mode.")
+    parser.add_argument("--search", action="store_true", help="Cross-validated hyperparameter search before the final fit.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the search (default: CPU count).")
+    args = parser.parse_args()
+    train_and_save_model(args.mode, args.chunk_size, args.epochs, args.search, args.folds, args.workers)
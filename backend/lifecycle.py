@@ -0,0 +1,94 @@
+# lifecycle.py
+"""
+Deferred loading of slow resources, and the state behind /healthz and /readyz.
+
+A BackgroundLoader runs its load function once: either on a background
+thread started at application startup, or on first use, whichever comes
+first. A request that needs the resource while it is still loading waits for
+that load instead of starting another one. A failed load is remembered (and
+reported) and retried with exponential backoff, starting at `retry_backoff`
+seconds and capped at `max_backoff`: the startup thread keeps retrying until
+the load succeeds, and a request that finds a retry due makes the attempt
+itself.
+"""
+import threading
+import time
+
+
+class BackgroundLoader:
+    def __init__(self, name: str, load, required: bool = True,
+                 retry_backoff: float = 5.0, max_backoff: float = 300.0):
+        self.name = name
+        self.required = required  # Whether a failed load makes /readyz report not ready
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._load = load
+        self._lock = threading.Lock()
+        self._value = None
+        self._state = "pending"
+        self._error = None
+        self._seconds = None
+        self._attempts = 0
+        self._retry_at = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def start(self):
+        """Starts loading on a daemon thread; returns immediately."""
+        if self._state == "pending":
+            threading.Thread(target=self._load_until_ready, name=f"load-{self.name}", daemon=True).start()
+
+    def get(self):
+        """The loaded value (None if loading failed), loading it now if nothing has yet."""
+        self._ensure_loaded()
+        return self._value
+
+    def reset(self):
+        """Forgets the loaded value, so the next `get` or `start` loads it again."""
+        with self._lock:
+            self._value, self._state, self._error, self._seconds = None, "pending", None, None
+            self._attempts, self._retry_at = 0, None
+
+    def _settled(self) -> bool:
+        """Whether there is nothing to load right now: loaded, or failed with no retry due yet."""
+        return self._state == "ready" or (self._state == "failed" and time.monotonic() < self._retry_at)
+
+    def _load_until_ready(self):
+        self._ensure_loaded()
+        while self._state == "failed":
+            time.sleep(max(0.0, self._retry_at - time.monotonic()))
+            self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        if self._settled():
+            return
+        with self._lock:
+            if self._settled():
+                return
+            # A retry reports "retrying" so /readyz keeps treating the loader as failed meanwhile
+            self._state = "retrying" if self._attempts else "loading"
+            started = time.perf_counter()
+            try:
+                self._value = self._load()
+                self._state, self._error = "ready", None
+            except Exception as e:
+                self._error = f"{type(e).__name__}: {e}"
+                self._state = "failed"
+                self._attempts += 1
+                backoff = min(self.max_backoff, self.retry_backoff * 2 ** (self._attempts - 1))
+                self._retry_at = time.monotonic() + backoff
+                print(f"⚠️ WARNING: Could not load {self.name} (attempt {self._attempts}, retrying in {backoff:g}s): {self._error}")
+            self._seconds = round(time.perf_counter() - started, 3)
+
+    def status(self) -> dict:
+        status = {"state": self._state, "required": self.required}
+        if self._seconds is not None:
+            status["load_seconds"] = self._seconds
+        if self._error:
+            status["error"] = self._error
+        if self._state in ("failed", "retrying"):
+            status["attempts"] = self._attempts
+            status["retry_in_seconds"] = round(max(0.0, self._retry_at - time.monotonic()), 1)
+        return status
@@ -0,0 +1,142 @@
+# llm_cache.py
+"""
+Response cache for LLM-backed chatbot replies.
+
+Keys are a SHA-256 over the normalized prompt: the system prompt (which
+carries the employee context), the last few history turns and the user's
+message with case, whitespace and trailing punctuation folded. Entries are
+bounded by an LRU size limit and expire after a TTL.
+
+Only states in CACHEABLE_STATES are cached. SUPPORT_MODE conversations are
+personal and never stored.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+CACHEABLE_STATES = {"MAIN_MENU"}
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def _normalize_question(text: str) -> str:
+    return _TRAILING_PUNCTUATION.sub("", _normalize_text(text).lower())
+
+
+class InMemoryCacheBackend:
+    """Process-local LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    async def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared cache for multi-worker deployments (needs the optional `redis` package)."""
+
+    def __init__(self, url: str, prefix: str = "psa:llm:"):
+        import redis.asyncio as redis  # Optional dependency, only needed for this backend
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key):
+        value = await self._redis.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key, value, ttl: float):
+        await self._redis.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+
+class LLMResponseCache:
+    def __init__(self, backend, ttl: float = 3600.0, history_turns: int = 6):
+        self.backend = backend
+        self.ttl = ttl
+        self.history_turns = history_turns
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def is_cacheable(turn) -> bool:
+        return turn.state in CACHEABLE_STATES
+
+    def make_key(self, messages) -> str:
+        system = [m for m in messages[:1] if m.get("role") == "system"]
+        conversation = messages[len(system):]
+        history, question = conversation[:-1], conversation[-1:]
+        history = history[-self.history_turns:] if self.history_turns else []
+        normalized = {
+            "system": _normalize_text(system[0]["content"]) if system else "",
+            "history": [[m.get("role"), _normalize_text(m.get("content"))] for m in history],
+            "message": _normalize_question(question[0].get("content")) if question else "",
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    async def get(self, messages):
+        try:
+            value = await self.backend.get(self.make_key(messages))
+        except Exception as e:
+            # A broken shared cache must never break the chatbot
+            self.errors += 1
+            print(f"⚠️ WARNING: LLM cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, messages, reply: str):
+        try:
+            await self.backend.set(self.make_key(messages), reply, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ WARNING: LLM cache write failed: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors,
+                "hit_ratio": self.hits / total if total else 0.0}
+
+
+def cache_from_config(config: dict):
+    """Builds the configured cache, or None when LLM_CACHE_SIZE is 0."""
+    size = int(config.get('LLM_CACHE_SIZE', 1000))
+    if size <= 0:
+        return None
+    ttl = float(config.get('LLM_CACHE_TTL', 3600))
+    if str(config.get('LLM_CACHE_BACKEND') or 'memory').lower() == 'redis':
+        backend = RedisCacheBackend(config['LLM_CACHE_REDIS_URL'])
+    else:
+        backend = InMemoryCacheBackend(max_entries=size)
+    return LLMResponseCache(backend, ttl=ttl)
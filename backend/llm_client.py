@@ -0,0 +1,138 @@
+# llm_client.py
+"""
+Shared async client for the hackathon LLM API.
+
+One keep-alive `httpx.AsyncClient` is reused by every chatbot request, with
+explicit connect/read timeouts and a semaphore capping in-flight calls, so a
+single worker can hold many conversations without tying up threads.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+
+class LLMError(Exception):
+    """The LLM call failed (network error, timeout, bad status or malformed reply)."""
+
+
+@dataclass
+class LLMTurn:
+    """A chatbot reply that still has to be generated by the LLM."""
+    messages: list
+    next_state: str
+    fallback_reply: str  # Sent instead when the LLM cannot be reached
+    state: str  # The state that asked for the call, e.g. SUPPORT_MODE
+
+
+@dataclass
+class LLMCallStats:
+    """What the client's observer is told about each call."""
+    mode: str  # "complete" or "stream"
+    label: Optional[str]  # Passed by the caller, e.g. the chatbot state
+    seconds: float
+    status: str  # HTTP status code, or the exception name when there was no response
+    request_bytes: int
+    response_bytes: int
+    first_token_seconds: Optional[float] = None
+
+
+def _status(response, error) -> str:
+    if response is not None:
+        return str(response.status_code)
+    return type(error).__name__ if error is not None else "cancelled"
+
+
+class AsyncLLMClient:
+    def __init__(self, url: str, api_key: str, model: str = "gpt-5-mini",
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_concurrency: int = 100, observer=None):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self.observer = observer  # Called with an LLMCallStats after every call
+        self._client = None
+        self._limiter = None
+        self._loop = None
+
+    def _bind(self):
+        """The HTTP client and limiter belong to one event loop; rebuild them if the loop changes."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                headers={"Content-Type": "application/json", "api-key": self.api_key},
+            )
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._limiter
+
+    def _body(self, messages, **extra) -> dict:
+        return {"model": self.model, "messages": messages, **extra}
+
+    def _observe(self, mode, label, started, request_bytes, response, error, first_token=None):
+        if self.observer is None:
+            return
+        try:
+            response_bytes = response.num_bytes_downloaded if response is not None else 0
+        except Exception:
+            response_bytes = 0
+        self.observer(LLMCallStats(mode, label, time.perf_counter() - started, _status(response, error),
+                                   request_bytes, response_bytes, first_token))
+
+    async def complete(self, messages, label: str = None) -> str:
+        """Returns `choices[0].message.content` for a chat completion."""
+        client, limiter = self._bind()
+        async with limiter:
+            started = time.perf_counter()
+            body = json.dumps(self._body(messages)).encode()
+            response, error = None, None
+            try:
+                response = await client.post(self.url, content=body)
+                response.raise_for_status()
+                return response.json()['choices'][0]['message']['content']
+            except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError) as e:
+                error = e
+                raise LLMError(f"{type(e).__name__}: {e}") from e
+            finally:
+                self._observe("complete", label, started, len(body), response, error)
+
+    async def stream(self, messages, label: str = None):
+        """Yields content deltas as the LLM generates them (OpenAI-style SSE with `stream: true`)."""
+        client, limiter = self._bind()
+        async with limiter:
+            started = time.perf_counter()
+            body = json.dumps(self._body(messages, stream=True)).encode()
+            response, error, first_token = None, None, None
+            try:
+                async with client.stream("POST", self.url, content=body) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            return
+                        choices = json.loads(data).get('choices') or [{}]
+                        content = (choices[0].get('delta') or {}).get('content')
+                        if content:
+                            if first_token is None:
+                                first_token = time.perf_counter() - started
+                            yield content
+            except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                error = e
+                raise LLMError(f"{type(e).__name__}: {e}") from e
+            finally:
+                self._observe("stream", label, started, len(body), response, error, first_token)
+
+    async def aclose(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = self._limiter = self._loop = None
@@ -0,0 +1,226 @@
+# llm_resilience.py
+"""
+Deadlines, a circuit breaker, hedging and request coalescing around the LLM client.
+
+`ResilientLLMClient` has the same `complete`/`stream` interface as
+`AsyncLLMClient` and raises the same `LLMError`, so the chatbot keeps
+answering with its canned fallback replies whenever a call fails:
+
+* Every call has a deadline: the whole reply for `complete`, the first token
+  for `stream` (after that the client's read timeout bounds each gap).
+* After `failure_threshold` consecutive upstream failures (errors, timeouts,
+  5xx or 429) the breaker opens and calls fail at once with CircuitOpenError
+  instead of queueing behind a struggling API. After `reset_after` seconds a
+  single trial call is let through; its result closes or re-opens the breaker.
+* With `hedge_after` set, a `complete` call that hasn't answered in that many
+  seconds (or has already failed) gets a second attempt; whichever succeeds
+  first wins and the other is cancelled.
+* Identical concurrent `complete` prompts share one upstream call.
+
+The breaker and the coalescing map are per process, like the client itself.
+"""
+import asyncio
+import hashlib
+import json
+import time
+
+import httpx
+
+from llm_client import LLMError
+
+
+class LLMDeadlineExceeded(LLMError):
+    """The LLM didn't answer (or start streaming) within the deadline."""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open, so the call wasn't attempted."""
+
+
+def is_upstream_failure(error: LLMError) -> bool:
+    """Whether an error says the API is unhealthy; other 4xx responses mean the request itself was bad."""
+    cause = error.__cause__
+    if isinstance(cause, httpx.HTTPStatusError):
+        status = cause.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0, on_event=None):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.on_event = on_event
+        self.state = "closed"  # closed, open or half_open
+        self.failures = 0  # Consecutive
+        self._opened_at = None
+        self._trial_running = False
+
+    def _set(self, state):
+        self.state = state
+        if self.on_event is not None:
+            self.on_event(f"circuit_{state}")
+
+    def allow(self) -> bool:
+        if self.state == "closed" or self.failure_threshold <= 0:
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_after:
+                return False
+            self._set("half_open")
+        if self._trial_running:
+            return False  # One trial call at a time while half-open
+        self._trial_running = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_running = False
+        if self.state != "closed":
+            self._set("closed")
+
+    def record_failure(self):
+        self._trial_running = False
+        self.failures += 1
+        if self.failure_threshold > 0 and (self.state == "half_open" or self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            if self.state != "open":
+                self._set("open")
+
+    def release(self):
+        """A call ended without a verdict (e.g. the client went away); lets the next trial through."""
+        self._trial_running = False
+
+
+def _prompt_key(messages) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class ResilientLLMClient:
+    def __init__(self, client, deadline: float = 30.0, failure_threshold: int = 5, reset_after: float = 30.0,
+                 hedge_after: float = 0.0, coalesce: bool = True, on_event=None):
+        self.client = client
+        self.deadline = deadline
+        self.hedge_after = hedge_after  # 0 disables hedging
+        self.coalesce = coalesce
+        self.on_event = on_event  # Called with an event name, e.g. "deadline_exceeded" or "coalesced"
+        self.breaker = CircuitBreaker(failure_threshold, reset_after, on_event=self._event)
+        self._inflight = {}  # Prompt key -> task, for the current event loop
+        self._loop = None
+
+    def _event(self, name: str):
+        if self.on_event is not None:
+            self.on_event(name)
+
+    def _settle(self, error):
+        """Feeds an attempt's outcome to the breaker: None for success, an LLMError, or anything else for no verdict."""
+        if error is None or (isinstance(error, LLMError) and not is_upstream_failure(error)):
+            self.breaker.record_success()
+        elif isinstance(error, LLMError):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._event("circuit_rejected")
+            raise CircuitOpenError("The LLM circuit breaker is open.")
+
+    async def _attempt(self, messages, label):
+        self._admit()
+        try:
+            reply = await self.client.complete(messages, label=label)
+        except BaseException as e:
+            self._settle(e)
+            raise
+        self._settle(None)
+        return reply
+
+    async def _hedged(self, messages, label):
+        pending = {asyncio.ensure_future(self._attempt(messages, label))}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not isinstance(error, CircuitOpenError) and self.breaker.state == "closed":
+                self._event("hedged" if pending else "retried")
+                pending.add(asyncio.ensure_future(self._attempt(messages, label)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _complete(self, messages, label):
+        call = self._hedged(messages, label) if self.hedge_after else self._attempt(messages, label)
+        try:
+            return await asyncio.wait_for(call, self.deadline) if self.deadline else await call
+        except asyncio.TimeoutError:
+            # The cancelled attempt left no verdict; running out of time is one
+            self.breaker.record_failure()
+            self._event("deadline_exceeded")
+            raise LLMDeadlineExceeded(f"No reply within {self.deadline}s.") from None
+
+    async def complete(self, messages, label: str = None) -> str:
+        """Returns the reply text, or raises LLMError (including LLMDeadlineExceeded and CircuitOpenError)."""
+        if not self.coalesce:
+            return await self._complete(messages, label)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight, self._loop = {}, loop
+        key = _prompt_key(messages)
+        task = self._inflight.get(key)
+        if task is not None:
+            self._event("coalesced")
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(self._complete(messages, label))
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded, so one caller going away doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller has gone away
+
+    async def stream(self, messages, label: str = None):
+        """Yields content deltas; the deadline covers the wait for the first one."""
+        self._admit()
+        tokens = self.client.stream(messages, label=label)
+        error = RuntimeError("stream not finished")  # No verdict unless it completes or fails
+        try:
+            try:
+                first = await asyncio.wait_for(tokens.__anext__(), self.deadline) if self.deadline else await tokens.__anext__()
+            except StopAsyncIteration:
+                error = None
+                return
+            except asyncio.TimeoutError:
+                self._event("deadline_exceeded")
+                raise LLMDeadlineExceeded(f"No first token within {self.deadline}s.") from None
+            yield first
+            async for token in tokens:
+                yield token
+            error = None
+        except LLMError as e:
+            error = e
+            raise
+        finally:
+            await tokens.aclose()
+            self._settle(error)
+
+    def stats(self) -> dict:
+        return {"state": self.breaker.state, "consecutive_failures": self.breaker.failures,
+                "inflight": len(self._inflight)}
+
+    async def aclose(self):
+        await self.client.aclose()
+        self._inflight, self._loop = {}, None
@@ -1,76 +1,228 @@
 # main.py
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter() # Measures how long importing this module (i.e. a cold start) takes
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
-import pyodbc
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, field_validator, model_validator
+import json
+import csv
+import inspect
+import uuid
+from functools import wraps
 #from openai import AzureOpenAI
-import requests
 from typing import Optional, List, Dict
-import joblib  # For loading the model
 import numpy as np # For data manipulation
-from datetime import datetime # For calculating tenure
-
+from datetime import datetime, timezone # For calculating tenure
+from fastapi.concurrency import run_in_threadpool
+import db # Pooled database access
+import migrations # Versioned schema migrations (secondary indexes)
+import leadership # Leadership feature loading and scoring
+from feature_store import LeadershipFeatureStore # Incrementally maintained leadership features
+from llm_client import AsyncLLMClient, LLMError, LLMTurn # Shared keep-alive LLM client
+from llm_resilience import ResilientLLMClient # Deadlines, circuit breaker, hedging and coalescing
+from llm_cache import cache_from_config # LRU/TTL cache for general career answers
+from employee_cache import EmployeeVersions, VersionedCache, etag_matches, make_etag # Per-employee versions for cached reads and ETags
+from session_store import session_store_from_config # Server-side chatbot sessions
+from recommendations import SkillCatalogIndex, load_employee_skill_bits, load_employee_skill_pairs # In-memory skill catalog for recommendations
+from mentor_index import MentorIndex # Trigram index for mentor search
+from specialization_resolver import SpecializationResolverIndex # Fuzzy upskilling target matching
+from analytics import WorkforceAnalytics # Department and function-area aggregates
+from similarity import SimilarityIndex # MinHash/LSH index of employee skill sets
+from profile_writes import ProfileUpdate, apply_profile_updates, existing_employees # Diff-based skill/experience writes
+from profile_export import CHANGES_OVERLAP, ChangeTracking, experience_to_dict, read_profile_page, to_ndjson # Keyset-paged NDJSON profile export
+from settings import ConfigError, load_config, require # config.json, with config.xlsx as a fallback
+from lifecycle import BackgroundLoader # Deferred model loading and readiness state
+from model_registry import ModelRegistry # Compact, hot-reloadable leadership model
+import metrics # Request, SQL and LLM instrumentation for /metrics
 
-def load_config_from_excel(path='../config/config.xlsx'):
-    """Reads configuration details from an Excel file."""
-    try:
-        df = pd.read_excel(path)
-        # Convert the two columns into a Python dictionary
-        config = dict(zip(df['Key'], df['Value']))
-        return config
-    except FileNotFoundError:
-        print("❌ FATAL ERROR: config.xlsx not found. Please create it.")
-        exit()
-    except Exception as e:
-        print(f"❌ FATAL ERROR: Could not read config.xlsx. Error: {e}")
-        exit()
 
 # --- Load Configuration at Startup ---
-config = load_config_from_excel()
+# Problems raise ConfigError, so the server fails to start with a clear message instead of exiting.
+config = load_config()
+require(config, 'API_URL', 'API_KEY')
 
 try:
-    conn_str = (
-        f"DRIVER={config['DRIVER']};"
-        f"SERVER={config['SERVER']};"
-        f"DATABASE={config['DATABASE']};"
-        "Trusted_Connection=yes;"
-        "MARS_Connection=yes;"
+    # Connections are opened lazily, checked out per request and returned afterwards.
+    db.configure(
+        db.backend_from_config(config),
+        size=int(config.get('DB_POOL_SIZE', 10)),
+        timeout=float(config.get('DB_POOL_TIMEOUT', 30)),
     )
-    sql_db = pyodbc.connect(conn_str)
-    
-    HACKATHON_API_URL = config['API_URL']
-    HACKATHON_API_KEY = config['API_KEY']
-    
-    print("✅ Configuration loaded successfully from Excel.")
-
 except KeyError as e:
-    print(f"❌ FATAL ERROR: Missing key in config.xlsx: {e}")
-    exit()
+    raise ConfigError(f"Missing key in configuration: {e}") from e
 
+# Request latency per route, SQL time and round trips, LLM calls per chatbot state.
+api_metrics = metrics.APIMetrics()
+db.observe_statements(api_metrics.record_statement)
 
-try:
-    model = joblib.load('leadership_model.pkl')
-    scaler = joblib.load('scaler.pkl')
-    print("✅ Leadership model and scaler loaded successfully.")
-except FileNotFoundError:
-    model = None
-    scaler = None
-    print("⚠️ WARNING: leadership_model.pkl or scaler.pkl not found. Prediction endpoint will not work.")
+HACKATHON_API_URL = config['API_URL']
+HACKATHON_API_KEY = config['API_KEY']
+
+print("✅ Configuration loaded successfully.")
+
+
+# Scores from leadership_model.json with NumPy (falling back to the pickles) and
+# picks up a new version of the file without a restart.
+model_registry = ModelRegistry(check_interval=float(config.get('MODEL_CHECK_INTERVAL', 5)))
+
+# Background loads that fail are retried after LOADER_RETRY_BACKOFF seconds, doubling up to LOADER_MAX_BACKOFF.
+LOADER_RETRY = {"retry_backoff": float(config.get('LOADER_RETRY_BACKOFF', 5)),
+                "max_backoff": float(config.get('LOADER_MAX_BACKOFF', 300))}
+
+# Loaded on a background thread at startup (or by the first request that needs it).
+# A missing model only disables the prediction endpoints, as before.
+leadership_model = BackgroundLoader("leadership model", model_registry.load, required=False, **LOADER_RETRY)
 
 
+# Bumped by every write path that touches an employee's rows.
+employee_versions = EmployeeVersions()
+# Employee names and LLM context strings, valid until the employee's version moves on.
+context_cache = VersionedCache(
+    employee_versions,
+    max_entries=int(config.get('CONTEXT_CACHE_SIZE', 10000)),
+    ttl=float(config.get('CONTEXT_CACHE_TTL', 300)),
+)
+
+# Finished JSON bodies of the employee read endpoints, keyed by (route, variant) per employee.
+# Off unless RESPONSE_CACHE_SIZE is set; ETags work either way.
+response_cache = VersionedCache(
+    employee_versions,
+    max_entries=int(config.get('RESPONSE_CACHE_SIZE', 0)),
+    ttl=float(config.get('RESPONSE_CACHE_TTL', 300)),
+) if int(config.get('RESPONSE_CACHE_SIZE', 0)) > 0 else None
+# Versions live in this process, so its ETags must never validate in another worker or after a
+# restart. ETAG_MAX_AGE bounds how long a tag survives writes made outside the API.
+ETAG_INSTANCE = uuid.uuid4().hex
+ETAG_MAX_AGE = float(config.get('ETAG_MAX_AGE', 300))
+
+# Loaded on first mentor search; skill changes are applied by the write endpoints below, and it is
+# rebuilt after MENTOR_INDEX_MAX_AGE seconds for new employees and changed titles.
+mentor_index = MentorIndex(max_age=float(config.get('MENTOR_INDEX_MAX_AGE', 3600)))
+# Rebuilt alongside the skill catalog, and after RESOLVER_MAX_AGE seconds to follow job title changes.
+specialization_resolver = SpecializationResolverIndex(max_age=float(config.get('RESOLVER_MAX_AGE', 3600)))
+# Both built on first use (or at warm-up, with the mentor index), then kept current by the write endpoints below.
+workforce_analytics = WorkforceAnalytics(max_age=float(config.get('ANALYTICS_MAX_AGE', 3600)))
+similarity_index = SimilarityIndex(
+    bands=int(config.get('SIMILARITY_BANDS', 40)),
+    rows=int(config.get('SIMILARITY_ROWS', 3)),
+    max_age=float(config.get('SIMILARITY_MAX_AGE', 3600)),
+)
+
+def on_catalog_rebuild(snapshot):
+    # Skill names appear in every employee context, so a rebuild invalidates all of them.
+    employee_versions.bump_all()
+    if mentor_index.loaded:
+        mentor_index.set_skills(snapshot.skill_names)
+
+# Built on first use and rebuilt whenever the skills/specializations catalog changes.
+catalog_index = SkillCatalogIndex(
+    check_interval=float(config.get('CATALOG_CHECK_INTERVAL', 30)),
+    on_rebuild=on_catalog_rebuild,
+    backend_name=db.get_pool().backend.name,
+)
+# Whether employees.updated_at exists yet; profile writes stamp it and incremental exports filter on it.
+change_tracking = ChangeTracking(db.get_pool().backend.name)
+
+def on_features_refreshed(employee_ids):
+    # Position history changed outside the API; None means everything was reloaded.
+    if employee_ids is not None:
+        for employee_id in employee_ids:
+            employee_versions.bump(employee_id)
+    workforce_analytics.invalidate_scores(employee_ids)
+
+# Loaded on first use, then kept current by the write endpoints below and by polling position history.
+feature_store = LeadershipFeatureStore(
+    max_age=float(config.get('FEATURE_STORE_MAX_AGE', 3600)),
+    check_interval=float(config.get('FEATURE_STORE_CHECK_INTERVAL', 30)),
+    on_refresh=on_features_refreshed,
+)
+# One keep-alive HTTP client for every chatbot conversation. While the API is failing the
+# breaker sends the canned fallback replies straight away instead of waiting on it.
+llm_client = ResilientLLMClient(
+    AsyncLLMClient(
+        HACKATHON_API_URL, HACKATHON_API_KEY,
+        connect_timeout=float(config.get('LLM_CONNECT_TIMEOUT', 5)),
+        read_timeout=float(config.get('LLM_READ_TIMEOUT', 60)),
+        max_concurrency=int(config.get('LLM_MAX_CONCURRENCY', 100)),
+        observer=api_metrics.record_llm_call,
+    ),
+    deadline=float(config.get('LLM_DEADLINE', 30)),
+    failure_threshold=int(config.get('LLM_BREAKER_FAILURES', 5)),
+    reset_after=float(config.get('LLM_BREAKER_RESET', 30)),
+    hedge_after=float(config.get('LLM_HEDGE_AFTER', 0) or 0),
+    coalesce=str(config.get('LLM_COALESCE', 'true')).lower() not in ('0', 'false', 'no'),
+    on_event=api_metrics.record_llm_event,
+)
+# None when disabled with LLM_CACHE_SIZE = 0.
+llm_cache = cache_from_config(config)
+# Conversation state and bounded history, keyed by session_id.
+chat_sessions = session_store_from_config(config)
+
+
+@db.transactional
+def warm_indexes():
+    """Builds the in-memory indexes up front so the first requests don't pay for it."""
+    cursor = db.cursor()
+    catalog = catalog_index.ensure_fresh(cursor)
+    feature_store.ensure_current(cursor)
+    specialization_resolver.ensure_current(cursor, catalog)
+    # One read of employees and employee_skills for the three indexes over the whole workforce
+    skill_bits = None
+    if not (mentor_index.loaded and workforce_analytics.loaded and similarity_index.loaded):
+        skill_bits = load_employee_skill_bits(cursor, catalog)
+    mentor_index.ensure_current(cursor, catalog.skill_names, skill_bits)
+    workforce_analytics.ensure_current(cursor, catalog, skill_bits)
+    similarity_index.ensure_current(cursor, catalog, skill_bits)
+    return True
+
+@db.transactional
+def check_schema():
+    """Warns when the database is behind migrations.py; the API still works, only without the indexes."""
+    pending = migrations.pending_migrations(db.cursor(), db.get_pool().backend.name)
+    if pending:
+        print(f"⚠️ WARNING: {len(pending)} schema migration(s) pending, up to version {pending[-1].version}. "
+              "Run 'python migrations.py' to add the indexes the queries rely on.")
+    return [migration.version for migration in pending]
+
+# Everything /readyz reports on. Each index also loads on first use, so warming them is optional.
+background_loaders = [leadership_model, BackgroundLoader("schema", check_schema, required=False, **LOADER_RETRY)]
+if str(config.get('STARTUP_WARMUP', 'true')).lower() not in ('0', 'false', 'no'):
+    background_loaders.append(BackgroundLoader("indexes", warm_indexes, required=False, **LOADER_RETRY))
+
 
 # This tells FastAPI exactly what the JSON body should look like.
 class ChatRequest(BaseModel):
     message: str
     employee_id: str
+    # With a session_id the server keeps state and history; state/history are only
+    # used to seed a new session (older clients that send them every turn still work).
+    session_id: Optional[str] = None
     state: Optional[str] = None
     history: List[Dict[str, str]] = []
 
 class Period(BaseModel):
-    start: Optional[str] = None
+    start: Optional[str] = None # YYYY-MM-DD; blank means not set
     end: Optional[str] = None
 
+    @field_validator("start", "end")
+    @classmethod
+    def check_date(cls, value):
+        if value is None or not value.strip():
+            return None
+        try:
+            return datetime.strptime(value.strip(), "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            raise ValueError(f"'{value}' is not a date in YYYY-MM-DD format")
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.start and self.end and self.end < self.start:
+            raise ValueError("end date is before start date")
+        return self
+
 class Experience(BaseModel):
     experience_id: Optional[int] = None # For identifying existing experiences
     type: str
@@ -83,6 +235,20 @@ class UpdateInfoRequest(BaseModel):
     skills: List[str]
     experiences: List[Experience]
 
+class ProfileImportRecord(BaseModel):
+    employee_id: str
+    skills: Optional[List[str]] = None # Omitted fields are left unchanged
+    experiences: Optional[List[Experience]] = None
+
+class BatchRecommendationRequest(BaseModel):
+    employee_ids: Optional[List[str]] = None
+    department: Optional[str] = None
+    top_k: int = 3
+
+class LeadershipBatchRequest(BaseModel):
+    employee_ids: Optional[List[str]] = None
+    department: Optional[str] = None
+
 def get_full_employee_context(cursor, employee_id: str) -> str:
     """Queries all relevant tables to build a comprehensive context string for the AI."""
     
@@ -123,13 +289,61 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allows all headers
 )
+# SLOW_REQUEST_MS (off by default) logs slower requests with their SQL/LLM/Python breakdown.
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    metrics=api_metrics,
+    slow_request_ms=float(config.get('SLOW_REQUEST_MS', 0) or 0),
+)
+
+def conditional_employee_get(route: str, variant=None):
+    """
+    Adds ETag / If-None-Match handling to an employee read endpoint. The tag
+    covers the employee's version plus `variant(arguments)` (e.g. the model
+    version), so a matching If-None-Match gets a 304 before any database work.
+    Other requests are served from `response_cache` when it is enabled.
+    Direct calls from Python (e.g. the chatbot) get the plain dict as before.
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, request: Request = None, **kwargs):
+            if request is None:
+                return func(*args, **kwargs)
+            arguments = signature.bind(*args, **kwargs).arguments
+            employee_id = arguments["employee_id"]
+            key = (route, variant(arguments) if variant else None)
+            version = employee_versions.get(employee_id)
+            etag = make_etag(key, employee_id, version, ETAG_INSTANCE, int(time.time() // ETAG_MAX_AGE))
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+
+            body = response_cache.get(employee_id, key) if response_cache is not None else None
+            if body is None:
+                body = JSONResponse(jsonable_encoder(func(*args, **kwargs))).body
+                if response_cache is not None:
+                    response_cache.put(employee_id, body, key=key, version=version)
+            return Response(body, media_type="application/json", headers=headers)
+
+        # FastAPI injects the Request through this extra keyword-only parameter.
+        request_parameter = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Request)
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), request_parameter])
+        return wrapper
+    return decorate
+
+def leadership_model_version(arguments=None):
+    model = current_leadership_model()
+    return model.version if model is not None else None
 
 # --- API Endpoints ---
 @app.get("/api/employee/{employee_id}")
+@conditional_employee_get("employee")
+@db.transactional
 def get_employee_info(employee_id: str):
-    print("1")
     """Fetches core employee data from the SQL database."""
-    cursor = sql_db.cursor()
+    cursor = db.cursor()
     cursor.execute("SELECT * FROM employees WHERE employee_id = ?", employee_id)
     
     row = cursor.fetchone()
@@ -145,125 +359,327 @@ def get_employee_info(employee_id: str):
     return employee_dict
 
 @app.get("/api/employee/{employee_id}/career_recommendations")
+@conditional_employee_get("career_recommendations")
+@db.transactional
 def get_career_recommendations(employee_id: str):
     """
     Finds potential next specializations by calculating a match percentage,
     excluding specializations the user is already proficient in.
     """
-    cursor = sql_db.cursor()
-    
-    # This improved query calculates a match percentage and excludes current specializations.
-    sql_query = """
-    WITH SpecializationSkillCounts AS (
-        -- Step 1: Count total skills for each specialization
-        SELECT s.specialization_id, COUNT(sk.skill_id) AS total_skills
-        FROM specializations s
-        JOIN skills sk ON s.specialization_id = sk.specialization_id
-        GROUP BY s.specialization_id
-    ),
-    EmployeeSkillOverlap AS (
-        -- Step 2: Count overlapping skills between the employee and each specialization
-        SELECT 
-            sk.specialization_id,
-            COUNT(sk.skill_id) AS overlap_count
-        FROM skills sk
-        WHERE sk.skill_id IN (SELECT skill_id FROM employee_skills WHERE employee_id = ?)
-        GROUP BY sk.specialization_id
-    )
-    -- Step 3: Join the data, calculate percentage, and filter
-    SELECT TOP 3
-        s.specialization_name AS recommended_role,
-        (CAST(eso.overlap_count AS FLOAT) * 100.0 / ssc.total_skills) AS skill_overlap_percent
-    FROM 
-        specializations s
-    JOIN 
-        SpecializationSkillCounts ssc ON s.specialization_id = ssc.specialization_id
-    JOIN 
-        EmployeeSkillOverlap eso ON s.specialization_id = eso.specialization_id
-    WHERE
-        -- Exclude specializations where the user has a high match already
-        (CAST(eso.overlap_count AS FLOAT) * 100.0 / ssc.total_skills) < 90
-    ORDER BY 
-        skill_overlap_percent DESC;
-    """
-    
-    cursor.execute(sql_query, employee_id)
-    
-    results_as_tuples = cursor.fetchall()
-    columns = [column[0] for column in cursor.description]
-    recommendations = [dict(zip(columns, row)) for row in results_as_tuples]
+    cursor = db.cursor()
+    catalog = catalog_index.ensure_fresh(cursor)
+
+    # The catalog side lives in memory; only the employee's own skills are read per request.
+    cursor.execute("SELECT skill_id FROM employee_skills WHERE employee_id = ?", employee_id)
+    skill_ids = [row.skill_id for row in cursor.fetchall()]
+    recommendations = catalog.recommend(skill_ids)
     
     return {"recommendations": recommendations}
 
+@app.post("/api/career_recommendations/batch")
+@db.transactional
+def get_career_recommendations_batch(request_data: BatchRecommendationRequest):
+    """
+    Top-k specializations for a list of employees or a whole department,
+    ranked by the same rules as the per-employee endpoint. Unknown
+    employee_ids are listed under `missing`.
+    """
+    if request_data.employee_ids is None and request_data.department is None:
+        raise HTTPException(status_code=400, detail="Provide employee_ids or department.")
+    if request_data.top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+
+    cursor = db.cursor()
+    catalog = catalog_index.ensure_fresh(cursor)
+    employee_ids, pair_employee_ids, pair_skill_ids = load_employee_skill_pairs(
+        cursor, employee_ids=request_data.employee_ids, department=request_data.department
+    )
+    results = catalog.recommend_batch(employee_ids, pair_employee_ids, pair_skill_ids, top_n=request_data.top_k)
+    missing = []
+    if request_data.department is None:
+        found = set(employee_ids)
+        missing = [e for e in dict.fromkeys(request_data.employee_ids) if e not in found]
+
+    return {"results": [{"employee_id": employee_id, "recommendations": results[employee_id]} for employee_id in employee_ids],
+            "missing": missing}
+
+def current_leadership_model():
+    """The registry's current model once the initial load has finished, or None if there is none."""
+    if leadership_model.get() is None:
+        return None
+    return model_registry.current()
+
 @app.get("/api/employee/{employee_id}/leadership_potential")
+@conditional_employee_get("leadership_potential", leadership_model_version)
+@db.transactional
 def get_leadership_potential(employee_id: str):
     """
     Predicts the leadership potential for a given employee using the pre-trained model.
     """
-    if not model or not scaler:
+    model = current_leadership_model()
+    if model is None:
         raise HTTPException(status_code=500, detail="Leadership model is not loaded.")
 
-    cursor = sql_db.cursor()
+    cursor = db.cursor()
 
-    # --- 1. Fetch the same features used for training ---
-    cursor.execute("SELECT hire_date FROM employees WHERE employee_id = ?", employee_id)
-    hire_date_row = cursor.fetchone()
-    if not hire_date_row:
+    # --- 1. Look up the same features used for training ---
+    raw_features = feature_store.get_or_load(cursor, [employee_id])
+    if employee_id not in raw_features or raw_features[employee_id][0] is None:
         raise HTTPException(status_code=404, detail="Employee not found.")
-    days_with_company = (datetime.now().date() - hire_date_row.hire_date).days
-
-    cursor.execute("SELECT COUNT(history_id) - 1 FROM position_history WHERE employee_id = ?", employee_id)
-    num_promotions = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(id) FROM employee_skills WHERE employee_id = ?", employee_id)
-    num_skills = cursor.fetchone()[0]
 
     # --- 2. Prepare data and make a prediction ---
-    features_array = np.array([[days_with_company, num_promotions, num_skills]])
-    features_scaled = scaler.transform(features_array)
-    
-    # Predict the probability of being in the 'leader' class (class 1)
-    probability = model.predict_proba(features_scaled)[0][1]
-    score = int(probability * 100)
+    features_array = leadership.build_feature_matrix(raw_features, [employee_id])
+    score = model.predict_scores(features_array)[0]
 
     # --- 3. Explain the score ---
-    explanation = {
-        "score": score,
-        "positive_factors": [
-            f"Strong tenure of {days_with_company // 365} years with the company.",
-            f"Demonstrated growth with {num_promotions if num_promotions > 0 else 0} promotion(s).",
-            f"Broad expertise with {num_skills} skills on record."
+    return leadership.explain(score, *features_array[0])
+
+
+@app.post("/api/leadership_potential/batch")
+@db.transactional
+def get_leadership_potential_batch(request_data: LeadershipBatchRequest):
+    """
+    Scores many employees (a list of ids or a department) with grouped feature
+    queries and a single vectorized prediction. Results are ranked by score.
+    """
+    if request_data.employee_ids is None and request_data.department is None:
+        raise HTTPException(status_code=400, detail="Provide employee_ids or department.")
+    model = current_leadership_model()
+    if model is None:
+        raise HTTPException(status_code=500, detail="Leadership model is not loaded.")
+
+    cursor = db.cursor()
+    if request_data.employee_ids is not None:
+        requested = request_data.employee_ids
+    else:
+        cursor.execute("SELECT employee_id FROM employees WHERE department = ? ORDER BY employee_id", request_data.department)
+        requested = [row.employee_id for row in cursor.fetchall()]
+    raw_features = feature_store.get_or_load(cursor, list(dict.fromkeys(requested)))
+    scorable = [e for e in dict.fromkeys(requested) if e in raw_features and raw_features[e][0] is not None]
+    missing = [e for e in dict.fromkeys(requested) if e not in scorable]
+
+    results = []
+    if scorable:
+        features_array = leadership.build_feature_matrix(raw_features, scorable)
+        scores = model.predict_scores(features_array)
+        results = [
+            {"employee_id": employee_id, **leadership.explain(score, *features)}
+            for employee_id, score, features in zip(scorable, scores, features_array)
         ]
+        results.sort(key=lambda result: (-result["score"], result["employee_id"]))
+
+    return {"results": results, "missing": missing}
+
+
+@app.on_event("startup")
+def start_background_loading():
+    for loader in background_loaders:
+        loader.start()
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.aclose()
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving. Never touches the database."""
+    return {
+        "status": "ok",
+        "uptime_seconds": round(time.perf_counter() - _import_started, 3),
+        "import_seconds": IMPORT_SECONDS,
     }
-    return explanation
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: the database answers and background loading has finished.
+    Returns 503 until then, or if a required resource failed to load.
+    """
+    checks = {loader.name: loader.status() for loader in background_loaders}
+    ready = all(loader.state not in ("pending", "loading") for loader in background_loaders)
+    ready = ready and not any(loader.required and loader.state in ("failed", "retrying") for loader in background_loaders)
+    try:
+        db.get_pool().check(timeout=float(config.get('READYZ_DB_TIMEOUT', 2)))
+        checks["database"] = {"state": "ready", **db.get_pool().stats()}
+    except Exception as e:
+        checks["database"] = {"state": "failed", "error": f"{type(e).__name__}: {e}"}
+        ready = False
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"ready": ready, "checks": checks, "leadership_model": model_registry.status()})
+
+
+# Point-in-time values, read when /metrics is scraped.
+api_metrics.registry.callback(
+    "psa_db_pool_connections", "gauge", "Database pool connections by state.",
+    lambda: {(key,): value for key, value in db.get_pool().stats().items() if key in ("open", "in_use", "idle")},
+    ("state",))
+api_metrics.registry.callback(
+    "psa_llm_cache_events_total", "counter", "LLM response cache hits, misses and errors.",
+    lambda: {(key,): value for key, value in llm_cache.stats().items() if key != "hit_ratio"} if llm_cache else {},
+    ("event",))
+api_metrics.registry.callback(
+    "psa_response_cache_events_total", "counter", "Employee response cache hits and misses.",
+    lambda: {("hits",): response_cache.hits, ("misses",): response_cache.misses} if response_cache else {},
+    ("event",))
+api_metrics.registry.callback(
+    "psa_llm_circuit_state", "gauge", "1 for the LLM circuit breaker's current state (closed, open or half_open).",
+    lambda: {(state,): int(llm_client.breaker.state == state) for state in ("closed", "open", "half_open")},
+    ("state",))
+api_metrics.registry.callback(
+    "psa_background_load_ready", "gauge", "1 once a background loader has finished loading.",
+    lambda: {(loader.name,): int(loader.state == "ready") for loader in background_loaders},
+    ("loader",))
+api_metrics.registry.callback(
+    "psa_uptime_seconds", "gauge", "Seconds since the API module started importing.",
+    lambda: {(): round(time.perf_counter() - _import_started, 3)})
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Request, SQL and LLM metrics in the Prometheus text format."""
+    return PlainTextResponse(api_metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post("/api/admin/leadership_model/reload")
+def reload_leadership_model():
+    """Loads the current leadership_model.json (or the pickles) now instead of on the next check."""
+    leadership_model.reset()
+    if leadership_model.get() is None:
+        raise HTTPException(status_code=500, detail=leadership_model.status().get("error", "Leadership model is not loaded."))
+    return model_registry.status()
+
+
+def _start_chat_turn(request_data: ChatRequest):
+    """Opens the conversation's session and runs the state machine on the server-side state and history."""
+    session = chat_sessions.open(request_data.session_id, request_data.employee_id,
+                                 request_data.state, request_data.history)
+    turn = plan_chat_turn(ChatRequest(
+        message=request_data.message,
+        employee_id=request_data.employee_id,
+        state=session.state,
+        history=chat_sessions.prompt_history(session),
+    ))
+    return turn, session
+
+
+async def _finish_chat_turn(session, message: str, reply: str, next_state: str, kind: str) -> dict:
+    """Records the turn; `kind` (scripted, llm, cached or fallback) is counted per state in /metrics."""
+    api_metrics.record_chat_turn(session.state, next_state, kind)
+    await run_in_threadpool(chat_sessions.record_turn, session, message, reply, next_state)
+    return {"reply": reply, "next_state": next_state, "session_id": session.session_id}
 
 
 @app.post("/api/chatbot")
-def chat_with_bot(request_data: ChatRequest):
+async def chat_with_bot(request_data: ChatRequest):
     """
     Orchestrates a stateful conversation with full employee context and memory.
+    The state machine (and its DB reads) runs in the threadpool; LLM-backed
+    replies are then awaited on the shared async client.
+    """
+    turn, session = await run_in_threadpool(_start_chat_turn, request_data)
+    if not isinstance(turn, LLMTurn):
+        return await _finish_chat_turn(session, request_data.message, turn["reply"], turn["next_state"], "scripted")
+
+    cacheable = llm_cache is not None and llm_cache.is_cacheable(turn)
+    reply = await llm_cache.get(turn.messages) if cacheable else None
+    kind = "cached"
+    if reply is None:
+        try:
+            reply = await llm_client.complete(turn.messages, label=turn.state)
+            kind = "llm"
+            if cacheable:
+                await llm_cache.set(turn.messages, reply)
+        except LLMError as e:
+            print(f"API Error: {e}")
+            reply, kind = turn.fallback_reply, "fallback"
+    return await _finish_chat_turn(session, request_data.message, reply, turn.next_state, kind)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _chat_events(turn, session, message: str):
+    """
+    Scripted replies go out as one `message` event; LLM replies as `token`
+    events plus a final `done`, or `error` if the LLM fails mid-reply.
+    """
+    if not isinstance(turn, LLMTurn):
+        yield _sse("message", await _finish_chat_turn(session, message, turn["reply"], turn["next_state"], "scripted"))
+        return
+
+    cacheable = llm_cache is not None and llm_cache.is_cacheable(turn)
+    reply = await llm_cache.get(turn.messages) if cacheable else None
+    if reply is not None:
+        yield _sse("token", {"content": reply})
+        yield _sse("done", await _finish_chat_turn(session, message, reply, turn.next_state, "cached"))
+        return
+
+    reply, kind = "", "llm"
+    try:
+        async for token in llm_client.stream(turn.messages, label=turn.state):
+            reply += token
+            yield _sse("token", {"content": token})
+        if cacheable:
+            await llm_cache.set(turn.messages, reply)
+    except LLMError as e:
+        print(f"API Error: {e}")
+        if reply:
+            # Part of the reply is already out, so it can't be swapped for the fallback. It isn't a finished
+            # turn either: nothing is recorded and the session stays in its state, so the client can retry.
+            api_metrics.record_chat_turn(session.state, session.state, "interrupted")
+            yield _sse("error", {"error": "The reply was interrupted. Please try again.",
+                                 "next_state": session.state, "session_id": session.session_id})
+            return
+        reply, kind = turn.fallback_reply, "fallback"
+        yield _sse("token", {"content": reply})
+    yield _sse("done", await _finish_chat_turn(session, message, reply, turn.next_state, kind))
+
+
+@app.post("/api/chatbot/stream")
+async def chat_with_bot_stream(request_data: ChatRequest):
+    """
+    Same conversation as /api/chatbot, sent as Server-Sent Events so LLM
+    tokens reach the client as soon as they are generated.
+    """
+    turn, session = await run_in_threadpool(_start_chat_turn, request_data)
+    return StreamingResponse(
+        _chat_events(turn, session, request_data.message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@db.transactional
+def plan_chat_turn(request_data: ChatRequest):
+    """
+    Runs one step of the chatbot state machine. Returns either a finished
+    reply or an LLMTurn describing the LLM call that produces the reply.
     """
     employee_id = request_data.employee_id
     message = request_data.message
     state = request_data.state or "START"
     history = request_data.history
     
-    cursor = sql_db.cursor()
+    cursor = db.cursor()
 
     # --- Initial Check ---
-    cursor.execute("SELECT name FROM employees WHERE employee_id = ?", employee_id)
-    employee = cursor.fetchone()
-    if not employee:
-        return {"reply": "I'm sorry, that employee ID was not found.", "next_state": "START"}
+    def fetch_employee_name():
+        cursor.execute("SELECT name FROM employees WHERE employee_id = ?", employee_id)
+        employee = cursor.fetchone()
+        return employee.name if employee else None
 
-    employee_name = employee.name
+    employee_name = context_cache.get_or_compute(employee_id, fetch_employee_name, key="name")
+    if employee_name is None:
+        return {"reply": "I'm sorry, that employee ID was not found.", "next_state": "START"}
 
     # --- 1. MENTAL WELL-BEING KEYWORD DETECTION ---
     # This check happens on every message, regardless of the conversation state.
     mental_wellbeing_keywords = ["stress", "anxious", "overwhelmed", "burnt out", "unhappy", "sad", "depressed"]
     if any(keyword in message.lower() for keyword in mental_wellbeing_keywords) and state != "SUPPORT_MODE":
-        print("--- Mental well-being keyword detected. Entering support mode. ---")
-        
         # This is a pre-written, empathetic opening that invites conversation.
         reply = (
             f"It sounds like you're going through a tough time, {employee_name}. I'm here to listen if you'd like to share more. "
@@ -278,8 +694,6 @@ def chat_with_bot(request_data: ChatRequest):
     
     # State for dedicated, continuous support conversation
     if state == "SUPPORT_MODE":
-        print("--- Continuing conversation in support mode. ---")
-        
         # Check for keywords to exit support mode and return to the main menu
         exit_keywords = ["thanks", "thank you", "ok", "menu", "career", "skills", "pathway"]
         if any(keyword in message.lower() for keyword in exit_keywords):
@@ -306,18 +720,15 @@ def chat_with_bot(request_data: ChatRequest):
         
         full_prompt_for_ai = system_prompt + "\n\nHere are the resources to offer if the user asks or if it feels appropriate:\n" + resources_text
 
-        headers = {"Content-Type": "application/json", "api-key": HACKATHON_API_KEY}
         messages_payload = [{"role": "system", "content": full_prompt_for_ai}] + history + [{"role": "user", "content": message}]
-        body = {"model": "gpt-5-mini", "messages": messages_payload}
         
-        try:
-            response = requests.post(HACKATHON_API_URL, headers=headers, json=body)
-            response.raise_for_status()
-            data = response.json()
-            # The bot remains in support mode until the user decides to exit.
-            return {"reply": data['choices'][0]['message']['content'], "next_state": "SUPPORT_MODE"}
-        except requests.exceptions.RequestException:
-            return {"reply": "I'm having trouble connecting right now, but please know that help is available through PSA's official channels.", "next_state": "SUPPORT_MODE"}
+        # The bot remains in support mode until the user decides to exit.
+        return LLMTurn(
+            messages=messages_payload,
+            next_state="SUPPORT_MODE",
+            fallback_reply="I'm having trouble connecting right now, but please know that help is available through PSA's official channels.",
+            state=state,
+        )
     # --- State Machine Logic ---
     
     # State 1: Start of the conversation
@@ -387,8 +798,9 @@ def chat_with_bot(request_data: ChatRequest):
         
         # --- IF THE USER ASKS A GENERAL QUESTION, CALL THE AI ---
         else:
-            print("--- Making a call to the external AI for a general query ---")
-            employee_context = get_full_employee_context(cursor, employee_id)
+            employee_context = context_cache.get_or_compute(
+                employee_id, lambda: get_full_employee_context(cursor, employee_id), key="context"
+            )
             system_prompt = (
                 "You are an expert career coach for PSA Corporation Limited, now known as PSA International, is a leading global port operator that manages a vast network of port terminals, rail, and inland terminals in over 180 locations across 45 countries. It is a major player in global trade, operating the world's largest container transhipment hub in Singapore and offering a range of services beyond port operations, including logistics and digital supply chain solutions. You must follow these rules strictly:\n"
                 "1. **Be concise:** Keep your answers short and directly to the point.\n"
@@ -399,47 +811,39 @@ def chat_with_bot(request_data: ChatRequest):
                 f"{employee_context}"
                 "\n--- END CONTEXT ---"
             )
-            headers = {"Content-Type": "application/json", "api-key": HACKATHON_API_KEY}
             messages_payload = [{"role": "system", "content": system_prompt}] + history + [{"role": "user", "content": message}]
-            body = {"model": "gpt-5-mini", "messages": messages_payload}
             
-            try:
-                response = requests.post(HACKATHON_API_URL, headers=headers, json=body)
-                response.raise_for_status()
-                data = response.json()
-                return {"reply": data['choices'][0]['message']['content'], "next_state": "MAIN_MENU"}
-            except requests.exceptions.RequestException as e:
-                print(f"API Error: {e}")
-                return {"reply": "Sorry, there was an error connecting to the AI service.", "next_state": "MAIN_MENU"}
+            return LLMTurn(
+                messages=messages_payload,
+                next_state="MAIN_MENU",
+                fallback_reply="Sorry, there was an error connecting to the AI service.",
+                state=state,
+            )
     
     # State 4: User has provided a target role for upskilling
     elif state == "AWAITING_MENTOR_QUERY":
         search_term = message.strip()
         
-        # This query finds senior employees who have the requested skill and are not the user or their manager.
-        query = """
-            SELECT TOP 3 e.name, e.email, e.job_title FROM employees e
-            JOIN employee_skills es ON e.employee_id = es.employee_id
-            JOIN skills s ON es.skill_id = s.skill_id
-            WHERE 
-              s.skill_name LIKE ?
-            GROUP BY
-                e.name, e.email, e.job_title, e.in_role_since
-            ORDER BY e.in_role_since ASC;
-        """
-        cursor.execute(query, f"%{search_term}%")
-        mentors = cursor.fetchall()
+        # Skill names are matched in memory (substring first, then typo-tolerant);
+        # holders come back longest-in-role first, as the old LIKE query ordered them.
+        catalog = catalog_index.ensure_fresh(cursor)
+        mentor_index.ensure_current(cursor, catalog.skill_names)
+        result = mentor_index.find_mentors(search_term, limit=3)
+        mentors = result["mentors"]
 
         if not mentors:
             reply = f"I couldn't find any potential mentors with the skill '{search_term}'. You could try searching for a related skill."
             return {"reply": reply, "next_state": "AWAITING_MENTOR_QUERY"}
         else:
-            reply = f"Here are a few colleagues with expertise in '{search_term}' who you could reach out to:\n\n---\n"
+            if result["fuzzy"]:
+                reply = f"I couldn't find an exact match for '{search_term}', but here are a few colleagues with expertise in {', '.join(result['matched_skills'])} who you could reach out to:\n\n---\n"
+            else:
+                reply = f"Here are a few colleagues with expertise in '{search_term}' who you could reach out to:\n\n---\n"
             for mentor in mentors:
                 reply += (
-                    f"**{mentor.name}**\n\n"
-                    f"*{mentor.job_title}*\n\n"
-                    f"Email: {mentor.email}\n\n"
+                    f"**{mentor['name']}**\n\n"
+                    f"*{mentor['job_title']}*\n\n"
+                    f"Email: {mentor['email']}\n\n"
                     "---\n"
                 )
         
@@ -448,34 +852,27 @@ def chat_with_bot(request_data: ChatRequest):
     elif state == "AWAITING_UPSKILL_TARGET":
         target_role = message.strip()
         
-        # --- 1. Get the skills required for the target role/specialization ---
-        required_skills_query = """
-            SELECT sk.skill_name
-            FROM skills sk
-            JOIN specializations s ON sk.specialization_id = s.specialization_id
-            WHERE s.specialization_name LIKE ?
-        """
-        cursor.execute(required_skills_query, f"%{target_role}%")
-        required_skills = {row.skill_name for row in cursor.fetchall()}
-
-        if not required_skills:
+        # --- 1. Resolve the target against specialization names and job titles ---
+        catalog = catalog_index.ensure_fresh(cursor)
+        resolver = specialization_resolver.ensure_current(cursor, catalog)
+        candidates = resolver.resolve(target_role)
+        # Substring matches are used together (as before); otherwise only the closest match
+        matched = candidates if candidates and candidates[0]["exact"] else candidates[:1]
+
+        if not resolver.required_skill_ids(matched):
             return {
                 "reply": f"I'm sorry, I couldn't find any information on the role or specialization '{target_role}'. Please try another.",
                 "next_state": "AWAITING_UPSKILL_TARGET" # Stay in this state to let the user try again
             }
+        if not matched[0]["exact"]:
+            target_role = matched[0]["specialization_name"]
 
         # --- 2. Get the employee's current skills ---
-        current_skills_query = """
-            SELECT s.skill_name 
-            FROM skills s
-            JOIN employee_skills es ON s.skill_id = es.skill_id
-            WHERE es.employee_id = ?
-        """
-        cursor.execute(current_skills_query, employee_id)
-        current_skills = {row.skill_name for row in cursor.fetchall()}
+        cursor.execute("SELECT skill_id FROM employee_skills WHERE employee_id = ?", employee_id)
+        current_skill_ids = [row.skill_id for row in cursor.fetchall()]
 
-        # --- 3. Calculate the skill gap ---
-        skill_gap = required_skills - current_skills
+        # --- 3. Calculate the skill gap (required skill sets are precomputed) ---
+        skill_gap = resolver.skill_gap(matched, current_skill_ids)
 
         # --- 4. Format the reply ---
         if not skill_gap:
@@ -511,9 +908,11 @@ def chat_with_bot(request_data: ChatRequest):
     }
 
 @app.get("/api/employee/{employee_id}/details")
+@conditional_employee_get("details")
+@db.transactional
 def get_employee_details(employee_id: str):
     """Fetches the specific details an employee can update (skills and experiences)."""
-    cursor = sql_db.cursor()
+    cursor = db.cursor()
     
     # Fetch skills
     cursor.execute("""
@@ -526,47 +925,375 @@ def get_employee_details(employee_id: str):
     # Fetch experiences
     cursor.execute("SELECT experience_id, experience_type, organization, program_name, start_date, end_date, focus FROM experiences WHERE employee_id = ?", employee_id)
     experiences_raw = cursor.fetchall()
-    experiences = [
-        {
-            "experience_id": row.experience_id,
-            "type": row.experience_type,
-            "organization": row.organization,
-            "program": row.program_name,
-            "period": {"start": str(row.start_date) if row.start_date else None, "end": str(row.end_date) if row.end_date else None},
-            "focus": row.focus
-        } for row in experiences_raw
-    ]
+    experiences = [experience_to_dict(row) for row in experiences_raw]
     
     return {"skills": skills, "experiences": experiences}
 
+DASHBOARD_FIELDS = ("profile", "details", "recommendations", "leadership")
+
+def dashboard_variant(arguments):
+    fields = arguments.get("fields")
+    leadership_part = not fields or "leadership" in fields
+    return (fields, leadership_model_version() if leadership_part else None)
+
+@app.get("/api/employee/{employee_id}/dashboard")
+@conditional_employee_get("dashboard", dashboard_variant)
+@db.transactional
+def get_employee_dashboard(employee_id: str, fields: Optional[str] = None):
+    """
+    Profile, details, career recommendations and leadership potential in one
+    call, each in the same shape as its own endpoint. `fields` (comma-separated,
+    default all) limits the payload, and the queries, to what the client renders.
+    The employee and skill rows are read once and shared; the independent
+    reads go to the database as a single batch.
+    """
+    wanted = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(DASHBOARD_FIELDS)
+    unknown = [field for field in wanted if field not in DASHBOARD_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(DASHBOARD_FIELDS)}.")
+
+    cursor = db.cursor()
+    catalog = catalog_index.ensure_fresh(cursor) if "recommendations" in wanted else None
+
+    statements = [("SELECT * FROM employees WHERE employee_id = ?", (employee_id,))]
+    if "details" in wanted or "recommendations" in wanted:
+        statements.append(("""
+            SELECT s.skill_id, s.skill_name FROM skills s
+            JOIN employee_skills es ON s.skill_id = es.skill_id
+            WHERE es.employee_id = ?
+        """, (employee_id,)))
+    if "details" in wanted:
+        statements.append(("SELECT experience_id, experience_type, organization, program_name, start_date, end_date, focus FROM experiences WHERE employee_id = ?", (employee_id,)))
+    results = iter(db.fetch_batch(cursor, statements))
+
+    columns, employee_rows = next(results)
+    if not employee_rows:
+        raise HTTPException(status_code=404, detail="Employee not found.")
+    skill_rows = next(results)[1] if len(statements) > 1 else []
+
+    dashboard = {"employee_id": employee_id}
+    if "profile" in wanted:
+        dashboard["profile"] = dict(zip(columns, employee_rows[0]))
+    if "details" in wanted:
+        experience_rows = next(results)[1]
+        dashboard["details"] = {"skills": [row.skill_name for row in skill_rows],
+                                "experiences": [experience_to_dict(row) for row in experience_rows]}
+    if "recommendations" in wanted:
+        dashboard["recommendations"] = {"recommendations": catalog.recommend([row.skill_id for row in skill_rows])}
+    if "leadership" in wanted:
+        # Features come from the in-memory store; a missing model leaves this field null, like a failed card.
+        model = current_leadership_model()
+        raw_features = feature_store.get_or_load(cursor, [employee_id]) if model is not None else {}
+        if employee_id in raw_features and raw_features[employee_id][0] is not None:
+            features_array = leadership.build_feature_matrix(raw_features, [employee_id])
+            dashboard["leadership"] = leadership.explain(model.predict_scores(features_array)[0], *features_array[0])
+        else:
+            dashboard["leadership"] = None
+    return dashboard
+
+SIMILAR_MAX_LIMIT = 50
+MOVES_PER_PEER = 3 # Most recent role changes listed per similar employee
+TOP_NEXT_ROLES = 5
+
+def role_moves(history_rows) -> list:
+    """Role changes, oldest first, from one employee's position_history rows ordered by start_date."""
+    return [{"from": previous.role_title, "to": row.role_title, "start_date": str(row.start_date) if row.start_date else None}
+            for previous, row in zip(history_rows, history_rows[1:]) if previous.role_title != row.role_title]
+
+@app.get("/api/employee/{employee_id}/similar")
+@db.transactional
+def get_similar_employees(employee_id: str, limit: int = 5):
+    """
+    The employees whose skill sets are most like this one's (Jaccard
+    similarity, found through the MinHash/LSH index instead of comparing
+    every pair), with their recent role changes, and the roles they moved
+    into ranked by the summed similarity of the peers who made the move.
+    """
+    if not 1 <= limit <= SIMILAR_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SIMILAR_MAX_LIMIT}.")
+    cursor = db.cursor()
+    index = similarity_index.ensure_current(cursor, catalog_index.ensure_fresh(cursor))
+    neighbours = index.similar(employee_id, limit=limit) or []  # None for employees added since the last build
+
+    ids = [employee_id] + [other_id for other_id, _, _ in neighbours]
+    placeholders = ','.join('?' for _ in ids)
+    (_, employee_rows), (_, history_rows) = db.fetch_batch(cursor, [
+        (f"SELECT employee_id, name, job_title, department FROM employees WHERE employee_id IN ({placeholders})", tuple(ids)),
+        (f"SELECT employee_id, role_title, start_date FROM position_history WHERE employee_id IN ({placeholders}) ORDER BY employee_id, start_date", tuple(ids)),
+    ])
+    employees = {row.employee_id: row for row in employee_rows}
+    if employee_id not in employees:
+        raise HTTPException(status_code=404, detail="Employee not found.")
+    histories = {}
+    for row in history_rows:
+        histories.setdefault(row.employee_id, []).append(row)
+
+    current_title = employees[employee_id].job_title
+    similar, next_roles = [], {}
+    for other_id, jaccard, shared in neighbours:
+        other = employees.get(other_id)
+        if other is None:
+            continue  # Removed since the index was built
+        moves = role_moves(histories.get(other_id, []))
+        similar.append({
+            "employee_id": other_id, "name": other.name, "job_title": other.job_title, "department": other.department,
+            "similarity": round(jaccard, 3), "shared_skills": shared,
+            "recent_moves": moves[::-1][:MOVES_PER_PEER],
+        })
+        for role in {move["to"] for move in moves} - {current_title}:
+            entry = next_roles.setdefault(role, {"role_title": role, "peers": 0, "score": 0.0})
+            entry["peers"] += 1
+            entry["score"] += jaccard
+    ranked = sorted(next_roles.values(), key=lambda entry: (-entry["score"], -entry["peers"], entry["role_title"]))
+    for entry in ranked:
+        entry["score"] = round(entry["score"], 3)
+    return {"employee_id": employee_id, "similar": similar, "next_roles": ranked[:TOP_NEXT_ROLES]}
+
+def current_analytics(cursor) -> WorkforceAnalytics:
+    """The aggregates, built if needed, with leadership scores brought up to date."""
+    analytics = workforce_analytics.ensure_current(cursor, catalog_index.ensure_fresh(cursor))
+    analytics.ensure_scores(cursor, current_leadership_model(), feature_store)
+    return analytics
+
+@app.get("/api/analytics/departments")
+@db.transactional
+def get_departments_analytics():
+    """Headcount, average skills, specializations covered and leadership scores for every department."""
+    return {"departments": current_analytics(db.cursor()).departments_summary()}
+
+@app.get("/api/analytics/departments/{department}")
+@db.transactional
+def get_department_analytics(department: str, limit: int = 10):
+    """Per-specialization skill coverage, the most common skill gaps and the leadership score distribution."""
+    try:
+        return current_analytics(db.cursor()).department(department, limit=limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Department not found.")
+
+@app.get("/api/analytics/function_areas")
+@db.transactional
+def get_function_area_analytics(department: Optional[str] = None, limit: int = 5):
+    """Coverage and top gaps per function area, company-wide or for one department."""
+    try:
+        return current_analytics(db.cursor()).function_areas(department, limit=limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Department not found.")
+
+@app.get("/api/analytics/leadership")
+@db.transactional
+def get_leadership_analytics(department: Optional[str] = None):
+    """Leadership score distribution, company-wide or for one department."""
+    try:
+        return current_analytics(db.cursor()).leadership_distribution(department)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Department not found.")
+
+
+def on_profile_updated(change):
+    """Applies a committed profile change to the in-memory indexes and caches."""
+    employee_versions.bump(change.employee_id)
+    if change.skill_ids is not None:
+        feature_store.set_num_skills(change.employee_id, len(change.skill_ids))
+        mentor_index.update_employee_skills(change.employee_id, change.skill_ids)
+        workforce_analytics.update_employee_skills(change.employee_id, change.skill_ids)
+        similarity_index.update_employee_skills(change.employee_id, change.skill_ids)
+
+
 @app.post("/api/employee/{employee_id}/update")
 def update_employee_details(employee_id: str, data: UpdateInfoRequest):
-    """Updates the employee's skills and experiences in the database."""
+    """Updates the employee's skills and experiences in the database, writing only what changed."""
     try:
-        cursor = sql_db.cursor()
-        
-        # 1. Update skills (delete all and re-insert)
-        cursor.execute("DELETE FROM employee_skills WHERE employee_id = ?", employee_id)
-        if data.skills:
-            placeholders = ','.join('?' for _ in data.skills)
-            cursor.execute(f"SELECT skill_id, skill_name FROM skills WHERE skill_name IN ({placeholders})", tuple(data.skills))
-            skill_id_map = {row.skill_name: row.skill_id for row in cursor.fetchall()}
-
-            for skill_name in data.skills:
-                if skill_name in skill_id_map:  
-                    skill_id = skill_id_map[skill_name]
-                    cursor.execute("INSERT INTO employee_skills (employee_id, skill_id) VALUES (?, ?)", employee_id, skill_id)
-        
-        # 2. Update experiences (delete all and re-insert)
-        cursor.execute("DELETE FROM experiences WHERE employee_id = ?", employee_id)
-        for exp in data.experiences:
-            cursor.execute(
-                "INSERT INTO experiences (employee_id, experience_type, organization, program_name, start_date, end_date, focus) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                employee_id, exp.type, exp.organization, exp.program, exp.period.start, exp.period.end, exp.focus
-            )
-            
-        sql_db.commit()
+        # Everything below commits together or is rolled back together.
+        with db.transaction():
+            cursor = db.cursor()
+            catalog = catalog_index.ensure_fresh(cursor)
+            update = ProfileUpdate(employee_id, skills=data.skills, experiences=data.experiences)
+            change = apply_profile_updates(cursor, [update], catalog.skill_ids_by_name,
+                                           updated_at=change_tracking.stamp(cursor))[0]
+                
+        # Only touch in-memory state once the transaction has committed.
+        if change.changed:
+            on_profile_updated(change)
         return {"message": "Profile updated successfully"}
     except Exception as e:
         print(f"Update Error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to update profile.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to update profile.")
+
+
+IMPORT_BATCH_SIZE = 500 # Records written per transaction
+IMPORT_MAX_ERRORS = 100 # Errors listed in the response; the count is always complete
+
+async def _import_lines(request: Request):
+    """Yields the request body line by line as it arrives."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+def _parse_csv_record(header, line):
+    """CSV columns: employee_id, skills (separated by ';') and optionally experiences (a JSON array)."""
+    values = next(csv.reader([line]))
+    row = dict(zip(header, values))
+    record = {"employee_id": row.get("employee_id")}
+    if row.get("skills") is not None:
+        record["skills"] = [skill.strip() for skill in row["skills"].split(";") if skill.strip()]
+    if row.get("experiences"):
+        record["experiences"] = json.loads(row["experiences"])
+    return record
+
+
+@db.transactional
+def import_profile_batch(batch):
+    """Writes one batch of (line_number, ProfileImportRecord) in a single transaction."""
+    cursor = db.cursor()
+    catalog = catalog_index.ensure_fresh(cursor)
+    known = existing_employees(cursor, [record.employee_id for _, record in batch])
+    errors = [{"line": line_number, "employee_id": record.employee_id, "error": "Employee not found."}
+              for line_number, record in batch if record.employee_id not in known]
+    updates = [ProfileUpdate(record.employee_id, skills=record.skills, experiences=record.experiences)
+               for _, record in batch if record.employee_id in known]
+    return apply_profile_updates(cursor, updates, catalog.skill_ids_by_name,
+                                 updated_at=change_tracking.stamp(cursor)), errors
+
+
+@app.post("/api/employees/import")
+async def import_profiles(request: Request, format: Optional[str] = None):
+    """
+    Bulk profile sync for HR systems. The body is streamed as NDJSON (one
+    {"employee_id", "skills", "experiences"} object per line) or CSV with a
+    header row (`format=csv` or a text/csv content type). Records are written
+    in batches of IMPORT_BATCH_SIZE with diff-based executemany statements,
+    each batch in its own transaction; bad lines are reported, not fatal. If
+    a batch fails to write, its records are retried one per transaction.
+    """
+    content_type = request.headers.get("content-type", "")
+    is_csv = (format or "").lower() == "csv" or "csv" in content_type
+    summary = {"processed": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+
+    def fail(line_number, employee_id, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+            summary["errors"].append({"line": line_number, "employee_id": employee_id, "error": error})
+
+    async def write(batch):
+        try:
+            return await run_in_threadpool(import_profile_batch, batch)
+        except Exception as e:
+            print(f"Import Error (lines {batch[0][0]}-{batch[-1][0]}): {e}")
+            if len(batch) == 1:
+                fail(batch[0][0], batch[0][1].employee_id, "Record could not be written.")
+                return [], []
+        # Retry the batch one record per transaction so a single bad record
+        # only fails its own line.
+        changes, errors = [], []
+        for item in batch:
+            item_changes, item_errors = await write([item])
+            changes += item_changes
+            errors += item_errors
+        return changes, errors
+
+    async def flush(batch):
+        changes, errors = await write(batch)
+        for error in errors:
+            fail(error["line"], error["employee_id"], error["error"])
+        for change in changes:
+            if change.changed:
+                on_profile_updated(change)
+                summary["updated"] += 1
+            else:
+                summary["unchanged"] += 1
+
+    header = None
+    batch = []
+    line_number = 0
+    async for line in _import_lines(request):
+        line_number += 1
+        if not line.strip():
+            continue
+        if is_csv and header is None:
+            header = [column.strip() for column in next(csv.reader([line]))]
+            continue
+        summary["processed"] += 1
+        raw = None
+        try:
+            raw = _parse_csv_record(header, line) if is_csv else json.loads(line)
+            batch.append((line_number, ProfileImportRecord(**raw)))
+        except Exception as e:
+            fail(line_number, raw.get("employee_id") if isinstance(raw, dict) else None, f"Invalid record: {e}")
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    return summary
+
+
+EXPORT_PAGE_SIZE = int(config.get('EXPORT_PAGE_SIZE', 1000)) # Profiles read per transaction
+
+@db.transactional
+def export_profile_page(after, limit, updated_since=None):
+    return read_profile_page(db.cursor(), after=after, limit=limit, updated_since=updated_since)
+
+
+@db.transactional
+def change_tracking_since():
+    return change_tracking.since(db.cursor())
+
+
+@app.get("/api/export/profiles")
+async def export_profiles(after: Optional[str] = None, updated_since: Optional[datetime] = None,
+                          limit: Optional[int] = None):
+    """
+    Every employee's profile (the employee record plus skills and
+    experiences) as NDJSON, in employee_id order, streamed a page of
+    EXPORT_PAGE_SIZE at a time. `after` resumes after the last employee_id
+    received and `limit` caps the profiles sent. `updated_since` limits the
+    export to profiles whose employees.updated_at is at or after then (less
+    CHANGES_OVERLAP); if that is before the column was added, everything is
+    sent. X-Export-Mode says which ("changes" or "full") and
+    X-Export-Timestamp is the value to pass as `updated_since` next time.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1.")
+    started = datetime.now(timezone.utc)
+    since = None
+    if updated_since is not None:
+        if updated_since.tzinfo is not None:
+            updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+        tracked_since = await run_in_threadpool(change_tracking_since)
+        if tracked_since is not None and updated_since >= tracked_since:
+            since = updated_since - CHANGES_OVERLAP
+
+    async def pages():
+        position, remaining = after, limit
+        while remaining is None or remaining > 0:
+            size = EXPORT_PAGE_SIZE if remaining is None else min(EXPORT_PAGE_SIZE, remaining)
+            try:
+                profiles = await run_in_threadpool(export_profile_page, position, size, since)
+            except Exception as e:
+                # The body is already under way, so the client sees a truncated stream and resumes with `after`
+                print(f"Export Error after {position}: {e}")
+                raise
+            if profiles:
+                yield to_ndjson(profiles)
+                position = profiles[-1]["employee_id"]
+            if len(profiles) < size:
+                return  # A short page is the last one
+            if remaining is not None:
+                remaining -= len(profiles)
+
+    return StreamingResponse(pages(), media_type="application/x-ndjson", headers={
+        "X-Export-Mode": "changes" if since is not None else "full",
+        "X-Export-Timestamp": started.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+    })
+
+
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
+print(f"✅ API module imported in {IMPORT_SECONDS}s.")
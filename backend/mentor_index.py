@@ -0,0 +1,197 @@
+# mentor_index.py
+"""
+In-memory mentor search over skill names.
+
+Skill names are indexed by character trigrams. Each skill keeps its holders
+pre-sorted by `in_role_since` (NULLs first, as SQL Server orders them), so a
+lookup is a few set operations plus a merge of short sorted lists, with no
+`LIKE '%term%'` scan. A term that is a substring of a skill name matches
+exactly as the old query did; when nothing matches, the closest skill names
+by trigram similarity are used instead, which tolerates typos.
+
+The API only writes skills, which `update_employee_skills` applies in
+place. Employees added, renamed or moved to a new role elsewhere appear
+when the index is rebuilt, every `max_age` seconds.
+"""
+import bisect
+import heapq
+import threading
+import time
+from datetime import date
+
+MIN_FUZZY_SIMILARITY = 0.3
+MAX_FUZZY_SKILLS = 3
+FUZZY_MARGIN = 0.85  # Fuzzy matches must score within 15% of the best one
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _sort_key(employee_id, in_role_since):
+    # ORDER BY in_role_since ASC puts NULLs first on SQL Server; ties by employee_id for stability
+    return (in_role_since is not None, in_role_since or date.min, employee_id)
+
+
+class MentorIndex:
+    def __init__(self, max_age: float = 3600.0):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # Searches keep using the old index while a new one is built
+        self._built_at = None
+        self._skill_names = {}  # skill_id -> skill_name
+        self._skill_trigrams = {}  # skill_id -> set of trigrams
+        self._postings = {}  # trigram -> set of skill_ids
+        self._employees = {}  # employee_id -> (name, email, job_title, in_role_since)
+        self._employee_skills = {}  # employee_id -> set of skill_ids
+        self._mentors = {}  # skill_id -> sorted [sort_key]
+
+    @property
+    def loaded(self) -> bool:
+        return self._built_at is not None
+
+    # --- Building ---
+
+    def set_skills(self, skill_names: dict):
+        """(Re)indexes skill names, e.g. after the skill catalog was rebuilt."""
+        with self._lock:
+            self._skill_names = dict(skill_names)
+            self._skill_trigrams = {skill_id: trigrams(name) for skill_id, name in self._skill_names.items()}
+            self._postings = {}
+            for skill_id, grams in self._skill_trigrams.items():
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(skill_id)
+
+    def load(self, cursor, skill_names: dict, skill_bits=None):
+        """Reads employees and their skills, or takes them from `skill_bits` (recommendations.load_employee_skill_bits)."""
+        employee_skills = {}
+        if skill_bits is None:
+            cursor.execute("SELECT employee_id, name, email, job_title, in_role_since FROM employees")
+            employees = {row.employee_id: (row.name, row.email, row.job_title, row.in_role_since) for row in cursor.fetchall()}
+            cursor.execute("SELECT employee_id, skill_id FROM employee_skills")
+            for row in cursor.fetchall():
+                employee_skills.setdefault(row.employee_id, set()).add(row.skill_id)
+        else:
+            employees = {row.employee_id: (row.name, row.email, row.job_title, row.in_role_since) for row in skill_bits.employees}
+            skill_id_of_bit = {bit: skill_id for skill_id, bit in skill_bits.catalog.skill_bit.items()}
+            for row, bit in zip(skill_bits.rows.tolist(), skill_bits.bits.tolist()):
+                employee_skills.setdefault(skill_bits.employee_ids[row], set()).add(skill_id_of_bit[bit])
+
+        mentors = {}
+        for employee_id, skill_ids in employee_skills.items():
+            if employee_id not in employees:
+                continue
+            key = _sort_key(employee_id, employees[employee_id][3])
+            for skill_id in skill_ids:
+                mentors.setdefault(skill_id, []).append(key)
+        for keys in mentors.values():
+            keys.sort()
+
+        with self._lock:
+            self.set_skills(skill_names)
+            self._employees = employees
+            self._employee_skills = employee_skills
+            self._mentors = mentors
+            self._built_at = time.monotonic()
+        print(f"✅ Mentor index built for {len(employees)} employees.")
+
+    def _stale(self) -> bool:
+        return self._built_at is None or bool(self.max_age and time.monotonic() - self._built_at > self.max_age)
+
+    def ensure_current(self, cursor, skill_names: dict, skill_bits=None):
+        """Builds on first use, and again once the index is older than max_age."""
+        if self._stale():
+            with self._build_lock:
+                if self._stale():
+                    self.load(cursor, skill_names, skill_bits)
+
+    # --- Incremental updates, called after the corresponding write commits ---
+
+    def update_employee_skills(self, employee_id, skill_ids):
+        """Replaces an employee's skill set, touching only the skills that changed."""
+        skill_ids = set(skill_ids)
+        with self._lock:
+            employee = self._employees.get(employee_id)
+            old = self._employee_skills.get(employee_id, set())
+            self._employee_skills[employee_id] = skill_ids
+            if employee is None:
+                return  # Not in the index yet; the rebuild reads their profile and skills together
+            key = _sort_key(employee_id, employee[3])
+            self._remove_from_lists(key, old - skill_ids)
+            self._add_to_lists(key, skill_ids - old)
+
+    def _remove_from_lists(self, key, skill_ids):
+        for skill_id in skill_ids:
+            keys = self._mentors.get(skill_id, [])
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def _add_to_lists(self, key, skill_ids):
+        for skill_id in skill_ids:
+            bisect.insort(self._mentors.setdefault(skill_id, []), key)
+
+    # --- Search ---
+
+    def match_skills(self, term: str):
+        """Returns (skill_ids, fuzzy). Substring matches win; otherwise the closest names by trigram similarity."""
+        needle = term.lower()
+        query_grams = trigrams(needle)
+        with self._lock:
+            if len(needle) < 3:
+                candidates = self._skill_names.keys()  # Too short to have a full trigram
+            else:
+                # A substring's own (unpadded) trigrams must all occur in the name
+                inner = {needle[i:i + 3] for i in range(len(needle) - 2)}
+                candidates = set.intersection(*(self._postings.get(g, set()) for g in inner))
+            exact = [s for s in candidates if needle in self._skill_names[s].lower()]
+            if exact:
+                return exact, False
+
+            scored = []
+            for skill_id in {s for g in query_grams for s in self._postings.get(g, ())}:
+                similarity = self._similarity(needle, query_grams, skill_id)
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    scored.append((-similarity, skill_id))
+            scored.sort()
+            best = -scored[0][0] if scored else 0.0
+            # Keep only names about as close as the best one, best first
+            return [skill_id for score, skill_id in scored[:MAX_FUZZY_SKILLS] if -score >= best * FUZZY_MARGIN], True
+
+    def _similarity(self, needle, query_grams, skill_id) -> float:
+        """Dice coefficient of trigram sets, against the whole name or its best run of as many words as the query."""
+        def dice(a, b):
+            return 2 * len(a & b) / (len(a) + len(b))
+
+        similarity = dice(query_grams, self._skill_trigrams[skill_id])
+        words = self._skill_names[skill_id].split()
+        width = len(needle.split()) or 1
+        for i in range(max(len(words) - width + 1, 0)):
+            similarity = max(similarity, dice(query_grams, trigrams(" ".join(words[i:i + width]))))
+        return similarity
+
+    def find_mentors(self, term: str, limit: int = 3) -> dict:
+        """
+        Employees holding a matching skill, longest in role first (the old
+        SQL's order). Fuzzy matches are ranked by how close the skill name is.
+        """
+        skill_ids, fuzzy = self.match_skills(term)
+        mentors = []
+        with self._lock:
+            if fuzzy:
+                ranked = (key for s in skill_ids for key in self._mentors.get(s, []))
+            else:
+                ranked = heapq.merge(*(self._mentors.get(s, []) for s in skill_ids))
+            seen = set()
+            for key in ranked:
+                employee_id = key[2]
+                if employee_id in seen:
+                    continue
+                seen.add(employee_id)
+                name, email, job_title, _ = self._employees[employee_id]
+                mentors.append({"employee_id": employee_id, "name": name, "email": email, "job_title": job_title})
+                if len(mentors) == limit:
+                    break
+            matched_names = [self._skill_names[s] for s in skill_ids]
+        return {"mentors": mentors, "matched_skills": matched_names, "fuzzy": fuzzy}
@@ -0,0 +1,290 @@
+# metrics.py
+"""
+Request, SQL and LLM instrumentation, exposed in the Prometheus text format.
+
+`APIMetrics` owns the API's counters and histograms. `MetricsMiddleware`
+times every request per route template (e.g. /api/employee/{employee_id})
+and keeps a per-request breakdown in a context variable; the statement
+observer installed with `db.observe_statements` and the LLM client's
+observer add SQL and LLM time to it. With `slow_request_ms` set, requests
+slower than that are logged with the breakdown, so it is clear whether the
+time went to SQL, the LLM or Python.
+
+Metrics are per process: with several uvicorn workers each one reports
+its own, like any multi-process Prometheus target.
+"""
+import contextvars
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500, 1000, 5000, 10000, 100000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# --- Metric types ---
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in items:
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-2] + [series[-2]]):
+                labels = _format_labels(self.labels, label_values, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_count{labels} {series[-2]}"
+            yield f"{self.name}_sum{labels} {_format_value(float(series[-1]))}"
+
+
+class CallbackMetric:
+    """A gauge or counter read at scrape time: `collect()` returns {label values tuple: value}."""
+
+    def __init__(self, name: str, kind: str, help: str, collect, labels=()):
+        self.name, self.kind, self.help, self.labels = name, kind, help, tuple(labels)
+        self.collect = collect
+
+    def samples(self):
+        for label_values, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, kind, help, collect, labels=()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, kind, help, collect, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # One broken callback must not take down the whole scrape
+                print(f"⚠️ WARNING: Could not collect {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# --- Per-request breakdown ---
+
+@dataclass
+class RequestStats:
+    sql_seconds: float = 0.0
+    sql_round_trips: int = 0  # One per execute/executemany
+    sql_rows: int = 0  # Rows fetched
+    llm_seconds: float = 0.0
+    llm_calls: int = 0
+
+    def describe(self, total_seconds: float) -> str:
+        python_seconds = max(total_seconds - self.sql_seconds - self.llm_seconds, 0.0)
+        return (f"SQL {self.sql_seconds * 1000:.1f} ms in {self.sql_round_trips} round trips ({self.sql_rows} rows), "
+                f"LLM {self.llm_seconds * 1000:.1f} ms in {self.llm_calls} calls, Python {python_seconds * 1000:.1f} ms")
+
+
+# Set by the middleware; sync endpoints see the same object from the threadpool.
+_request_stats = contextvars.ContextVar("psa_request_stats", default=None)
+
+_STATEMENT_PATTERN = re.compile(r"^\s*(\w+)", re.IGNORECASE)
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([\w.\[\]]+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(sql: str) -> tuple:
+    """(operation, table) for a statement, e.g. ("SELECT", "employee_skills"); bounded label values."""
+    operation = _STATEMENT_PATTERN.match(sql)
+    table = _TABLE_PATTERN.search(sql)
+    return ((operation.group(1).upper() if operation else "UNKNOWN"),
+            (table.group(1).replace("[", "").replace("]", "").lower() if table else ""))
+
+
+class APIMetrics:
+    def __init__(self):
+        self.registry = Registry()
+        r = self.registry
+        self.requests = r.histogram(
+            "psa_http_request_duration_seconds", "Request latency by route template, including streamed bodies.",
+            ("method", "route", "status"))
+        self.request_round_trips = r.histogram(
+            "psa_http_request_db_round_trips", "SQL statements executed per request.", ("method", "route"), COUNT_BUCKETS)
+        self.request_rows = r.histogram(
+            "psa_http_request_db_rows", "Rows fetched per request.", ("method", "route"), COUNT_BUCKETS)
+        self.statements = r.histogram(
+            "psa_db_statement_duration_seconds", "Time in execute/executemany and in fetching, by statement.",
+            ("operation", "table", "phase"))
+        self.rows = r.counter("psa_db_rows_fetched_total", "Rows fetched, by statement.", ("operation", "table"))
+        self.llm_calls = r.histogram(
+            "psa_llm_request_duration_seconds", "LLM call latency by chatbot state, mode and status.",
+            ("state", "mode", "status"))
+        self.llm_first_token = r.histogram(
+            "psa_llm_first_token_seconds", "Time to the first streamed token, by chatbot state.", ("state",))
+        self.llm_request_bytes = r.histogram(
+            "psa_llm_request_bytes", "LLM request payload size by chatbot state.", ("state",), BYTES_BUCKETS)
+        self.llm_response_bytes = r.histogram(
+            "psa_llm_response_bytes", "LLM response payload size by chatbot state.", ("state",), BYTES_BUCKETS)
+        self.chat_turns = r.counter(
+            "psa_chatbot_turns_total", "Chatbot turns by state, next state and reply kind.", ("state", "next_state", "kind"))
+        self.slow_requests = r.counter("psa_http_slow_requests_total", "Requests over SLOW_REQUEST_MS.", ("method", "route"))
+        self.llm_events = r.counter(
+            "psa_llm_resilience_events_total",
+            "LLM deadlines exceeded, circuit breaker rejections and state changes, hedges, retries and coalesced calls.",
+            ("event",))
+
+    # --- Observers ---
+
+    def record_statement(self, sql: str, phase: str, seconds: float, rows: int = 0):
+        """Statement observer for `db.observe_statements`."""
+        operation, table = statement_labels(sql)
+        self.statements.observe(seconds, operation, table, phase)
+        if rows:
+            self.rows.inc(operation, table, amount=rows)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.sql_seconds += seconds
+            stats.sql_rows += rows
+            if phase != "fetch":
+                stats.sql_round_trips += 1
+
+    def record_llm_call(self, call):
+        """Observer for AsyncLLMClient; `call` is an LLMCallStats."""
+        state = call.label or "none"
+        self.llm_calls.observe(call.seconds, state, call.mode, call.status)
+        self.llm_request_bytes.observe(call.request_bytes, state)
+        self.llm_response_bytes.observe(call.response_bytes, state)
+        if call.first_token_seconds is not None:
+            self.llm_first_token.observe(call.first_token_seconds, state)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.llm_seconds += call.seconds
+            stats.llm_calls += 1
+
+    def record_llm_event(self, event: str):
+        """Observer for ResilientLLMClient, e.g. "circuit_open" or "coalesced"."""
+        self.llm_events.inc(event)
+
+    def record_chat_turn(self, state: str, next_state: str, kind: str):
+        self.chat_turns.inc(state or "START", next_state, kind)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (not BaseHTTPMiddleware), so streamed responses are
+    timed until their last chunk and the request's context variable reaches
+    the endpoint and the threadpool.
+    """
+
+    def __init__(self, app, metrics: APIMetrics, slow_request_ms: float = 0):
+        self.app = app
+        self.metrics = metrics
+        self.slow_request_seconds = slow_request_ms / 1000 if slow_request_ms else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = "500"  # Reported if the app fails before sending a response
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            seconds = time.perf_counter() - started
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't grow the series without bound
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.metrics.requests.observe(seconds, method, route_path, status)
+            self.metrics.request_round_trips.observe(stats.sql_round_trips, method, route_path)
+            self.metrics.request_rows.observe(stats.sql_rows, method, route_path)
+            if self.slow_request_seconds is not None and seconds >= self.slow_request_seconds:
+                self.metrics.slow_requests.inc(method, route_path)
+                print(f"⚠️ Slow request: {method} {scope['path']} -> {status} in {seconds * 1000:.1f} ms "
+                      f"({stats.describe(seconds)})")
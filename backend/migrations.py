@@ -0,0 +1,319 @@
+# migrations.py
+"""
+Versioned schema migrations, and a check that the hot queries use indexes.
+
+sql/psa_db.sql (and its SQLite stand-in, sql/sqlite_schema.sql) is version
+0: tables, clustered primary keys and unique constraints. Each migration
+below moves the schema one version forward, with a T-SQL and a SQLite
+flavour of the same change. Applied versions are recorded in
+schema_migrations, so running the script again only applies what is new,
+each migration in its own transaction. Migrations are append-only: once one
+has shipped, change the schema with a new one rather than editing it.
+
+    python migrations.py                       # applies pending migrations to the configured database
+    python migrations.py --status              # lists applied and pending migrations
+    python migrations.py --check-plans         # checks HOT_QUERIES on a fresh, empty stand-in
+    python migrations.py --check-plans bench.db
+
+The plan check runs every query in HOT_QUERIES (the statements the endpoints
+run per request, copied from main.py and the modules it calls) through
+SQLite's EXPLAIN QUERY PLAN and exits with status 1 if one reads a table end
+to end, sorts in a temporary B-tree, or, where the query is meant to be
+covered, goes back to the table after the index lookup. Run it in CI so a new
+or changed query can't silently regress to a full scan; when a query changes
+in main.py, change it here too. tests/test_query_plans.py checks the
+statements the endpoints actually run in the same way, so a query that was
+never copied here is still covered. SQL Server plans aren't checked, but
+the indexes are the same apart from INCLUDE columns.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+import db
+
+MIGRATIONS_TABLE_SQL = {
+    "mssql": """
+        IF OBJECT_ID('dbo.schema_migrations', 'U') IS NULL
+        CREATE TABLE dbo.schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+        )
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+# One row, NULL when version 0 has never been migrated
+MIGRATIONS_TABLE_EXISTS_SQL = {
+    "mssql": "SELECT OBJECT_ID('dbo.schema_migrations', 'U') AS found",
+    "sqlite": "SELECT (SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations') AS found",
+}
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    mssql: list = field(default_factory=list)  # T-SQL statements, run in order
+    sqlite: list = field(default_factory=list)  # The same change for the stand-in
+
+    def statements(self, backend_name: str) -> list:
+        return getattr(self, backend_name)
+
+
+MIGRATIONS = [
+    # employee_skills(employee_id) already has an index: the UNIQUE (employee_id, skill_id) constraint.
+    # Nonclustered indexes carry the clustered key (SQLite: the rowid), so COUNT(id) and
+    # COUNT(history_id) are covered too. SQLite has no INCLUDE, so the extra columns go in the key;
+    # experiences.focus is a TEXT column, which SQL Server can't INCLUDE, so that lookup stays partial.
+    Migration(1, "Secondary indexes for the per-employee and per-department queries", mssql=[
+        "CREATE NONCLUSTERED INDEX IX_employee_skills_skill_id ON dbo.employee_skills (skill_id) INCLUDE (employee_id)",
+        "CREATE NONCLUSTERED INDEX IX_skills_specialization_id ON dbo.skills (specialization_id) INCLUDE (skill_name)",
+        "CREATE NONCLUSTERED INDEX IX_position_history_employee_id_start_date ON dbo.position_history (employee_id, start_date) "
+        "INCLUDE (role_title, end_date)",
+        "CREATE NONCLUSTERED INDEX IX_experiences_employee_id ON dbo.experiences (employee_id) "
+        "INCLUDE (experience_type, program_name, organization, start_date, end_date)",
+        "CREATE NONCLUSTERED INDEX IX_employees_department ON dbo.employees (department)",
+    ], sqlite=[
+        "CREATE INDEX IX_employee_skills_skill_id ON employee_skills (skill_id, employee_id)",
+        "CREATE INDEX IX_skills_specialization_id ON skills (specialization_id, skill_name)",
+        "CREATE INDEX IX_position_history_employee_id_start_date ON position_history (employee_id, start_date, role_title, end_date)",
+        "CREATE INDEX IX_experiences_employee_id ON experiences (employee_id)",
+        "CREATE INDEX IX_employees_department ON employees (department, employee_id)",
+    ]),
+    # Stamped (UTC) by profile writes through the API, for the export's `updated_since`; NULL until then.
+    Migration(2, "employees.updated_at for incremental profile exports", mssql=[
+        "ALTER TABLE dbo.employees ADD updated_at DATETIME2 NULL",
+        "CREATE NONCLUSTERED INDEX IX_employees_updated_at ON dbo.employees (updated_at)",
+    ], sqlite=[
+        "ALTER TABLE employees ADD COLUMN updated_at DATETIME",
+        "CREATE INDEX IX_employees_updated_at ON employees (updated_at)",
+    ]),
+]
+
+
+def applied_versions(cursor, backend_name: str) -> set:
+    cursor.execute(MIGRATIONS_TABLE_EXISTS_SQL[backend_name])
+    if cursor.fetchone().found is None:
+        return set()
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row.version for row in cursor.fetchall()}
+
+
+def applied_at(cursor, backend_name: str, version: int):
+    """When migration `version` was applied (UTC), or None if it hasn't been."""
+    cursor.execute(MIGRATIONS_TABLE_EXISTS_SQL[backend_name])
+    if cursor.fetchone().found is None:
+        return None
+    cursor.execute("SELECT applied_at FROM schema_migrations WHERE version = ?", version)
+    row = cursor.fetchone()
+    return row.applied_at if row else None
+
+
+def pending_migrations(cursor, backend_name: str) -> list:
+    """The migrations not yet applied to the database behind `cursor`, in order."""
+    applied = applied_versions(cursor, backend_name)
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+def migrate(backend, quiet: bool = False) -> list:
+    """Applies the pending migrations, one transaction each, and returns their versions."""
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(MIGRATIONS_TABLE_SQL[backend.name])
+        conn.commit()
+        done = []
+        for migration in pending_migrations(cursor, backend.name):
+            started = time.perf_counter()
+            try:
+                if backend.name == "sqlite":
+                    cursor.execute("BEGIN")  # sqlite3 would otherwise run the DDL in autocommit mode
+                for statement in migration.statements(backend.name):
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                               migration.version, migration.name)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            done.append(migration.version)
+            if not quiet:
+                print(f"✅ Applied migration {migration.version}: {migration.name} "
+                      f"({time.perf_counter() - started:.2f}s).")
+        return done
+    finally:
+        conn.close()
+
+
+# --- Query plan checks (SQLite) ---
+
+@dataclass
+class HotQuery:
+    name: str
+    sql: str
+    covering: bool = False  # Index lookups must not go back to the table
+    allow_scans: tuple = ()  # Tables or aliases that may be read end to end (small catalog tables)
+    allow_temp_sort: bool = False
+
+
+IDS = "?, ?, ?"  # Stands in for the IN lists the endpoints build per request or chunk
+
+HOT_QUERIES = [
+    # /api/employee, /details, the chatbot context and the leadership endpoints
+    HotQuery("employee_by_id", "SELECT * FROM employees WHERE employee_id = ?"),
+    HotQuery("employee_skill_ids", "SELECT skill_id FROM employee_skills WHERE employee_id = ?", covering=True),
+    HotQuery("employee_skill_names", """
+        SELECT s.skill_name FROM skills s
+        JOIN employee_skills es ON s.skill_id = es.skill_id
+        WHERE es.employee_id = ?
+    """),
+    HotQuery("employee_experiences", "SELECT experience_id, experience_type, organization, program_name, start_date, "
+                                     "end_date, focus FROM experiences WHERE employee_id = ?"),
+    HotQuery("recent_positions", "SELECT TOP 3 role_title, start_date, end_date FROM position_history "
+                                 "WHERE employee_id = ? ORDER BY start_date DESC", covering=True),
+    # Batch recommendations and leadership scores by department or id list
+    HotQuery("department_members", "SELECT employee_id FROM employees WHERE department = ? ORDER BY employee_id",
+             covering=True),
+    HotQuery("department_skill_pairs", """
+        SELECT es.employee_id, es.skill_id FROM employee_skills es
+        JOIN employees e ON e.employee_id = es.employee_id
+        WHERE e.department = ?
+    """, covering=True),
+    HotQuery("skill_pairs_batch", f"""
+        SELECT e.employee_id, es.skill_id FROM employees e
+        LEFT JOIN employee_skills es ON es.employee_id = e.employee_id
+        WHERE e.employee_id IN ({IDS})
+    """, covering=True),
+    HotQuery("hire_dates_batch", f"SELECT employee_id, hire_date FROM employees WHERE employee_id IN ({IDS})"),
+    HotQuery("promotions_batch", f"SELECT employee_id, COUNT(history_id) - 1 AS num_promotions FROM position_history "
+                                 f"WHERE employee_id IN ({IDS}) GROUP BY employee_id", covering=True),
+    HotQuery("skill_counts_batch", f"SELECT employee_id, COUNT(id) AS num_skills FROM employee_skills "
+                                   f"WHERE employee_id IN ({IDS}) GROUP BY employee_id", covering=True),
+    # /api/employee/{id}/similar
+    HotQuery("peer_profiles", f"SELECT employee_id, name, job_title, department FROM employees "
+                              f"WHERE employee_id IN ({IDS})"),
+    HotQuery("peer_histories", f"SELECT employee_id, role_title, start_date FROM position_history "
+                               f"WHERE employee_id IN ({IDS}) ORDER BY employee_id, start_date", covering=True),
+    # /api/export/profiles, one page
+    HotQuery("export_page", "SELECT TOP 1000 * FROM employees WHERE employee_id > ? ORDER BY employee_id"),
+    HotQuery("export_changes_page", "SELECT TOP 1000 * FROM employees WHERE employee_id IN "
+                                    "(SELECT employee_id FROM employees WHERE updated_at >= ?) AND employee_id > ? "
+                                    "ORDER BY employee_id"),
+    HotQuery("export_page_skills", f"""
+        SELECT es.employee_id, s.skill_name FROM employee_skills es
+        JOIN skills s ON s.skill_id = es.skill_id
+        WHERE es.employee_id IN ({IDS})
+    """),
+    HotQuery("export_skills", """
+        SELECT es.employee_id, s.skill_name FROM employee_skills es
+        JOIN skills s ON s.skill_id = es.skill_id
+        WHERE es.employee_id BETWEEN ? AND ?
+    """, allow_scans=("s",)),  # With statistics SQLite may walk the skill catalog and seek each skill's range
+    HotQuery("export_experiences", "SELECT experience_id, employee_id, experience_type, organization, program_name, "
+                                   "start_date, end_date, focus FROM experiences WHERE employee_id BETWEEN ? AND ?"),
+    # Profile writes (profile_writes.py)
+    HotQuery("experiences_batch", f"SELECT experience_id, employee_id, experience_type, organization, program_name, "
+                                  f"start_date, end_date, focus FROM experiences WHERE employee_id IN ({IDS})"),
+    HotQuery("skill_delete", "DELETE FROM employee_skills WHERE employee_id = ? AND skill_id = ?"),
+    # Catalog joins (RECOMMENDATIONS_SQL, the specialization resolver) and foreign-key checks on skill deletes
+    HotQuery("specialization_skills", "SELECT skill_id, skill_name FROM skills WHERE specialization_id = ?",
+             covering=True),
+    HotQuery("skill_holders", "SELECT employee_id FROM employee_skills WHERE skill_id = ?", covering=True),
+]
+
+_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)")  # A constant row is a SELECT without FROM
+_SEARCH_PATTERN = re.compile(r"^SEARCH (?:TABLE )?(\w+)")
+
+
+def plan_problems(query: HotQuery, details: list) -> list:
+    """What's wrong with a plan, given its EXPLAIN QUERY PLAN detail lines; empty if nothing."""
+    problems = []
+    for detail in details:
+        scan, search = _SCAN_PATTERN.match(detail), _SEARCH_PATTERN.match(detail)
+        if scan and scan.group(1) not in query.allow_scans:
+            problems.append(f"full scan: {detail}")
+        elif detail.startswith("USE TEMP B-TREE") and not query.allow_temp_sort:
+            problems.append(f"sort: {detail}")
+        elif query.covering and search and "COVERING INDEX" not in detail and "PRIMARY KEY" not in detail:
+            problems.append(f"not covered: {detail}")
+    return problems
+
+
+def explain(cursor, sql: str) -> list:
+    """EXPLAIN QUERY PLAN detail lines for a T-SQL query, with NULL for every parameter."""
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", *([None] * sql.count("?")))
+    return [row.detail for row in cursor.fetchall()]
+
+
+def check_plans(backend, queries=HOT_QUERIES) -> list:
+    """(query, details, problems) for every query, on a SQLite backend."""
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        results = []
+        for query in queries:
+            details = explain(cursor, query.sql)
+            results.append((query, details, plan_problems(query, details)))
+        return results
+    finally:
+        conn.close()
+
+
+def _print_status(backend):
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        applied = applied_versions(cursor, backend.name)
+    finally:
+        conn.close()
+    for migration in MIGRATIONS:
+        mark = "✅" if migration.version in applied else "⏳"
+        print(f"{mark} {migration.version}: {migration.name}")
+    pending = [m.version for m in MIGRATIONS if m.version not in applied]
+    print(f"Schema version {max(applied, default=0)}; {len(pending)} pending.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations, or check the hot query plans.")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations.")
+    parser.add_argument("--check-plans", nargs="?", const="", metavar="SQLITE_PATH",
+                        help="Check HOT_QUERIES on a SQLite database (default: a fresh, empty stand-in).")
+    args = parser.parse_args()
+
+    if args.check_plans is not None:
+        import sqlite_standin  # Which imports this module, so not at the top
+        with tempfile.TemporaryDirectory() as directory:
+            if args.check_plans:
+                backend = db.SQLiteBackend(args.check_plans)  # Checked as it is, pending migrations and all
+            else:
+                # Empty, so no table statistics sway the planner; the stand-in applies every migration
+                backend = sqlite_standin.build(os.path.join(directory, "plans.db"), with_sample_data=False)
+            results = check_plans(backend)
+        failures = 0
+        for query, details, problems in results:
+            print(f"{'❌' if problems else '✅'} {query.name}: {' | '.join(details)}")
+            for problem in problems:
+                print(f"    {problem}")
+            failures += bool(problems)
+        print(f"{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} hot queries use their indexes.")
+        sys.exit(1 if failures else 0)
+
+    from settings import load_config
+    backend = db.backend_from_config(load_config())
+    if args.status:
+        _print_status(backend)
+    else:
+        applied = migrate(backend)
+        print(f"✅ Schema is at version {MIGRATIONS[-1].version}" + ("." if applied else " (nothing to apply)."))
@@ -0,0 +1,191 @@
+# model_registry.py
+"""
+Compact leadership model artifacts and the registry the API scores from.
+
+Training writes `leadership_model.json` next to the pickles: the scaler's
+means and scales and the logistic regression's coefficients and intercept,
+plus a version. Scoring from it is a subtraction, a division, a dot product
+and a sigmoid in NumPy, so the API never imports scikit-learn. Scores are
+identical to the pickle path (see `CompactLeadershipModel.predict_proba`).
+
+The registry watches the artifact's modification time and swaps in a new
+version when the file changes, without a restart. If there is no usable
+artifact it falls back to the pickles.
+
+    python model_registry.py      # writes leadership_model.json from the existing pickles
+"""
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+import leadership
+
+ARTIFACT_FORMAT = "psa-leadership-logreg/1"
+ARTIFACT_PATH = "leadership_model.json"
+MODEL_PATH = "leadership_model.pkl"
+SCALER_PATH = "scaler.pkl"
+
+
+def export_artifact(model, scaler, path: str = ARTIFACT_PATH, version: str = None, metadata: dict = None) -> dict:
+    """Writes the compact artifact for a fitted LogisticRegression and StandardScaler."""
+    if len(model.classes_) != 2:
+        raise ValueError("Only binary leadership models can be exported.")
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": version or time.strftime("%Y%m%d%H%M%S"),
+        "features": list(leadership.FEATURES),
+        "mean": [float(v) for v in scaler.mean_],
+        "scale": [float(v) for v in scaler.scale_],
+        "coef": [float(v) for v in model.coef_[0]],
+        "intercept": float(model.intercept_[0]),
+        "classes": [int(c) for c in model.classes_],
+        "metadata": metadata or {},
+    }
+    # Write then rename, so a running API never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(tmp_path, path)
+    return artifact
+
+
+def _sigmoid(value: float) -> float:
+    try:
+        return 1.0 / (1.0 + math.exp(-value))
+    except OverflowError:  # Where the C library's exp returns inf instead
+        return 0.0
+
+
+class CompactLeadershipModel:
+    source = "artifact"
+
+    def __init__(self, artifact: dict):
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported model artifact format: {artifact.get('format')}")
+        if artifact.get("features") != list(leadership.FEATURES):
+            raise ValueError(f"Artifact features {artifact.get('features')} don't match {leadership.FEATURES}.")
+        self.version = str(artifact["version"])
+        self.mean = np.array(artifact["mean"], dtype=np.float64)
+        self.scale = np.array(artifact["scale"], dtype=np.float64)
+        self.coef = np.array(artifact["coef"], dtype=np.float64).reshape(-1, 1)
+        self.intercept = float(artifact["intercept"])
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def predict_proba(self, features_array) -> np.ndarray:
+        """
+        Probability of the leader class, computed exactly as StandardScaler.transform
+        followed by LogisticRegression.predict_proba. NumPy's vectorized exp can
+        differ from the C library's by one ulp, which only matters where the
+        0-100 score sits on an integer boundary, so those few rows are redone
+        with math.exp to keep every score identical to the pickle path.
+        """
+        decision = (np.dot((features_array - self.mean) / self.scale, self.coef) + self.intercept).reshape(-1)
+        with np.errstate(over='ignore'):  # exp(-decision) -> inf for very negative decisions, i.e. probability 0
+            probabilities = 1.0 / (1.0 + np.exp(-decision))
+        scaled = probabilities * 100
+        boundary = np.abs(scaled - np.rint(scaled)) < 1e-9
+        if boundary.any():
+            probabilities[boundary] = [_sigmoid(value) for value in decision[boundary]]
+        return probabilities
+
+    def predict_scores(self, features_array) -> np.ndarray:
+        return (self.predict_proba(features_array) * 100).astype(int)
+
+
+class PickleLeadershipModel:
+    """The original sklearn objects behind the same interface, used when there is no artifact."""
+    source = "pickle"
+
+    def __init__(self, model, scaler, version: str):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+
+    @classmethod
+    def from_files(cls, model_path: str = MODEL_PATH, scaler_path: str = SCALER_PATH):
+        import joblib  # Pulls in scikit-learn; only needed for this fallback
+        version = f"pickle-{int(os.path.getmtime(model_path))}"
+        return cls(joblib.load(model_path), joblib.load(scaler_path), version)
+
+    def predict_scores(self, features_array) -> np.ndarray:
+        return leadership.predict_scores(self.model, self.scaler, features_array)
+
+
+class ModelRegistry:
+    """
+    Holds the current leadership model. `current()` checks the artifact's
+    mtime at most every `check_interval` seconds and hot-swaps a changed
+    one; a broken new file is reported and the previous model kept.
+    """
+
+    def __init__(self, artifact_path: str = ARTIFACT_PATH, model_path: str = MODEL_PATH,
+                 scaler_path: str = SCALER_PATH, check_interval: float = 5.0):
+        self.artifact_path = artifact_path
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.check_interval = check_interval
+        self._model = None
+        self._artifact_mtime = None
+        self._checked_at = 0.0
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    def _artifact_mtime_now(self):
+        try:
+            return os.path.getmtime(self.artifact_path)
+        except OSError:
+            return None
+
+    def load(self):
+        """(Re)loads from the artifact, falling back to the pickles. Returns the model."""
+        with self._lock:
+            mtime = self._artifact_mtime_now()
+            model = None
+            if mtime is not None:
+                try:
+                    model = CompactLeadershipModel.from_file(self.artifact_path)
+                    self._last_error = None
+                except Exception as e:
+                    self._last_error = f"{type(e).__name__}: {e}"
+                    print(f"⚠️ WARNING: Could not load {self.artifact_path}: {self._last_error}")
+            if model is None and self._model is not None:
+                model = self._model  # Keep serving the previous version
+            if model is None:
+                model = PickleLeadershipModel.from_files(self.model_path, self.scaler_path)
+            if self._model is None or model.version != self._model.version:
+                print(f"✅ Leadership model {model.version} loaded from {model.source}.")
+            self._model = model
+            self._artifact_mtime = mtime
+            self._checked_at = time.monotonic()
+            return model
+
+    def current(self):
+        if self._model is None:
+            return self.load()
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._artifact_mtime_now() != self._artifact_mtime:
+                return self.load()
+        return self._model
+
+    def status(self) -> dict:
+        model = self._model
+        status = {"version": model.version if model else None, "source": model.source if model else None}
+        if self._last_error:
+            status["error"] = self._last_error
+        return status
+
+
+if __name__ == "__main__":
+    import joblib
+    artifact = export_artifact(joblib.load(MODEL_PATH), joblib.load(SCALER_PATH),
+                               metadata={"exported_from": [MODEL_PATH, SCALER_PATH]})
+    print(f"✅ Wrote {ARTIFACT_PATH} (version {artifact['version']}).")
@@ -0,0 +1,139 @@
+# profile_export.py
+"""
+Bulk export of employee profiles, streamed as NDJSON.
+
+A profile is the employee row, as /api/employee/{id} returns it, plus the
+skills and experiences from /details. Profiles are read a page at a time in
+employee_id order with one set-based query per table for the whole page,
+keyed on the page's employee_id range (keyset pagination, so the last page
+costs the same as the first), and results are drained with `fetchmany` so no
+result set is materialised in one piece. Each page is read in its own short
+transaction: a slow client never holds a connection, and an interrupted
+export resumes from the last employee_id it received.
+
+An incremental export reads only the employees whose updated_at (stamped by
+profile writes through the API, see migrations.py version 2) is at or after
+a given time, with the same keyset pagination.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import migrations
+
+EXPORT_FETCH_ROWS = 1000  # Rows per fetchmany
+UPDATED_AT_MIGRATION = 2  # Adds employees.updated_at
+# Incremental exports also resend profiles stamped this long before `updated_since`: a write is
+# stamped before it commits, and API hosts' clocks may differ slightly.
+CHANGES_OVERLAP = timedelta(seconds=60)
+
+
+def utc_now() -> datetime:
+    """The current UTC time as a naive datetime, as employees.updated_at stores it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ChangeTracking:
+    """
+    Whether employees.updated_at exists yet, and since when profile writes
+    have kept it current. Looked up on each call until the migration is
+    found, then remembered (migrations are never undone).
+    """
+
+    def __init__(self, backend_name: str):
+        self.backend_name = backend_name
+        self._since = None
+
+    def since(self, cursor):
+        if self._since is None:
+            self._since = migrations.applied_at(cursor, self.backend_name, UPDATED_AT_MIGRATION)
+        return self._since
+
+    def stamp(self, cursor):
+        """The updated_at value for a profile write now, or None before the migration."""
+        return utc_now() if self.since(cursor) is not None else None
+
+
+def experience_to_dict(row) -> dict:
+    return {
+        "experience_id": row.experience_id,
+        "type": row.experience_type,
+        "organization": row.organization,
+        "program": row.program_name,
+        "period": {"start": str(row.start_date) if row.start_date else None, "end": str(row.end_date) if row.end_date else None},
+        "focus": row.focus
+    }
+
+
+def _fetch_rows(cursor):
+    while True:
+        rows = cursor.fetchmany(EXPORT_FETCH_ROWS)
+        if not rows:
+            return
+        yield from rows
+
+
+def read_profile_page(cursor, after=None, limit: int = 1000, employee_ids=None, updated_since=None) -> list:
+    """
+    Up to `limit` profiles with employee_id greater than `after`, in
+    employee_id order, and with `updated_since` (a naive UTC datetime) only
+    those updated at or after it. With `employee_ids`, exactly those
+    employees are read instead (at most `limit` of them; ids that no longer
+    exist are skipped).
+    """
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)[:limit]
+        if not employee_ids:
+            return []
+        placeholders = ','.join('?' for _ in employee_ids)
+        cursor.execute(f"SELECT * FROM employees WHERE employee_id IN ({placeholders}) ORDER BY employee_id",
+                       tuple(employee_ids))
+    else:
+        conditions, params = [], []
+        if updated_since is not None:
+            # As a subquery, so the planner starts from the updated_at index rather than walking the primary key
+            conditions.append("employee_id IN (SELECT employee_id FROM employees WHERE updated_at >= ?)")
+            params.append(updated_since)
+        if after is not None:
+            conditions.append("employee_id > ?")
+            params.append(after)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        cursor.execute(f"SELECT TOP {int(limit)} * FROM employees {where}ORDER BY employee_id", *params)
+    columns = [column[0] for column in cursor.description]
+    profiles = {}
+    for row in _fetch_rows(cursor):
+        profile = dict(zip(columns, row))
+        profile["skills"], profile["experiences"] = [], []
+        profiles[profile["employee_id"]] = profile
+    if not profiles:
+        return []
+
+    # The child rows for the whole page: its id list, or (when every employee in it is read) its id range
+    if employee_ids is not None or updated_since is not None:
+        predicate, params = f"IN ({','.join('?' for _ in profiles)})", tuple(profiles)
+    else:
+        ids = list(profiles)
+        predicate, params = "BETWEEN ? AND ?", (ids[0], ids[-1])
+
+    cursor.execute(f"""
+        SELECT es.employee_id, s.skill_name FROM employee_skills es
+        JOIN skills s ON s.skill_id = es.skill_id
+        WHERE es.employee_id {predicate}
+    """, params)
+    for row in _fetch_rows(cursor):
+        if row.employee_id in profiles:  # Skips employees created in the range since the page was read
+            profiles[row.employee_id]["skills"].append(row.skill_name)
+
+    cursor.execute(f"""
+        SELECT experience_id, employee_id, experience_type, organization, program_name, start_date, end_date, focus
+        FROM experiences WHERE employee_id {predicate}
+    """, params)
+    for row in _fetch_rows(cursor):
+        if row.employee_id in profiles:
+            profiles[row.employee_id]["experiences"].append(experience_to_dict(row))
+
+    return list(profiles.values())
+
+
+def to_ndjson(profiles) -> bytes:
+    """One JSON object per line; dates are written as YYYY-MM-DD, as the JSON endpoints do."""
+    return "".join(json.dumps(profile, default=str, separators=(",", ":")) + "\n" for profile in profiles).encode()
@@ -0,0 +1,161 @@
+# profile_writes.py
+"""
+Diff-based writes for employee skills and experiences.
+
+Instead of deleting an employee's rows and re-inserting them one statement at
+a time, the current rows are read once, compared with the requested profile,
+and only the differences are written, with one `executemany` per kind of
+change. The same code applies one profile update or a batch of thousands
+(for the bulk import), so a batch costs a handful of round trips however
+many employees it touches. Callers run it inside `db.transaction()`.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+IN_CLAUSE_CHUNK = 1000  # SQL Server allows at most 2100 parameters per statement
+
+
+@dataclass
+class ProfileUpdate:
+    employee_id: str
+    skills: Optional[list] = None  # Skill names; None leaves skills unchanged
+    experiences: Optional[list] = None  # Experience models; None leaves experiences unchanged
+
+
+@dataclass
+class ProfileChange:
+    """What was written for one employee. `skill_ids` is the final skill set (None if untouched)."""
+    employee_id: str
+    skill_ids: Optional[list] = None
+    skills_added: int = 0
+    skills_removed: int = 0
+    experiences_added: int = 0
+    experiences_updated: int = 0
+    experiences_removed: int = 0
+    unknown_skills: list = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return any((self.skills_added, self.skills_removed, self.experiences_added,
+                    self.experiences_updated, self.experiences_removed))
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+        chunk = ids[start:start + IN_CLAUSE_CHUNK]
+        yield chunk, ','.join('?' for _ in chunk)
+
+
+def _experience_row(exp) -> tuple:
+    """(experience_type, organization, program_name, start_date, end_date, focus) as strings, for comparing."""
+    return (exp.type, exp.organization, exp.program, exp.period.start or None, exp.period.end or None, exp.focus)
+
+
+def _stored_experience_row(row) -> tuple:
+    return (row.experience_type, row.organization, row.program_name,
+            str(row.start_date) if row.start_date else None,
+            str(row.end_date) if row.end_date else None, row.focus)
+
+
+def _executemany(cursor, sql, rows):
+    if rows:
+        cursor.executemany(sql, rows)
+
+
+def existing_employees(cursor, employee_ids) -> set:
+    found = set()
+    for chunk, placeholders in _chunks(list(dict.fromkeys(employee_ids))):
+        cursor.execute(f"SELECT employee_id FROM employees WHERE employee_id IN ({placeholders})", tuple(chunk))
+        found.update(row.employee_id for row in cursor.fetchall())
+    return found
+
+
+def apply_profile_updates(cursor, updates, skill_ids_by_name: dict, updated_at=None) -> list:
+    """
+    Brings each employee's skills and experiences in line with `updates`
+    (later updates for the same employee win) and returns a ProfileChange
+    per employee. Skill names are matched case-insensitively against
+    `skill_ids_by_name` (lowercased name -> skill_id); unknown names are
+    skipped, as before. Experiences that carry the experience_id of one of
+    the employee's rows update that row; the rest are inserted, and rows
+    no longer listed are deleted. With `updated_at` (a naive UTC datetime),
+    employees.updated_at is set to it for every employee that changed.
+    """
+    updates = list({u.employee_id: u for u in updates}.values())
+    cursor.fast_executemany = True
+    changes = {u.employee_id: ProfileChange(u.employee_id) for u in updates}
+
+    # --- Skills ---
+    skill_updates = [u for u in updates if u.skills is not None]
+    current_skills = {u.employee_id: set() for u in skill_updates}
+    for chunk, placeholders in _chunks([u.employee_id for u in skill_updates]):
+        cursor.execute(f"SELECT employee_id, skill_id FROM employee_skills WHERE employee_id IN ({placeholders})", tuple(chunk))
+        for row in cursor.fetchall():
+            current_skills[row.employee_id].add(row.skill_id)
+
+    skill_inserts, skill_deletes = [], []
+    for update in skill_updates:
+        change = changes[update.employee_id]
+        wanted = []
+        for skill_name in update.skills:
+            skill_id = skill_ids_by_name.get(skill_name.lower())
+            if skill_id is None:
+                change.unknown_skills.append(skill_name)
+            elif skill_id not in wanted:
+                wanted.append(skill_id)
+        current = current_skills[update.employee_id]
+        added = [skill_id for skill_id in wanted if skill_id not in current]
+        removed = sorted(current - set(wanted))
+        skill_inserts += [(update.employee_id, skill_id) for skill_id in added]
+        skill_deletes += [(update.employee_id, skill_id) for skill_id in removed]
+        change.skill_ids = wanted
+        change.skills_added, change.skills_removed = len(added), len(removed)
+
+    _executemany(cursor, "DELETE FROM employee_skills WHERE employee_id = ? AND skill_id = ?", skill_deletes)
+    _executemany(cursor, "INSERT INTO employee_skills (employee_id, skill_id) VALUES (?, ?)", skill_inserts)
+
+    # --- Experiences ---
+    experience_updates = [u for u in updates if u.experiences is not None]
+    current_experiences = {u.employee_id: {} for u in experience_updates}
+    for chunk, placeholders in _chunks([u.employee_id for u in experience_updates]):
+        cursor.execute(f"""
+            SELECT experience_id, employee_id, experience_type, organization, program_name, start_date, end_date, focus
+            FROM experiences WHERE employee_id IN ({placeholders})
+        """, tuple(chunk))
+        for row in cursor.fetchall():
+            current_experiences[row.employee_id][row.experience_id] = _stored_experience_row(row)
+
+    experience_inserts, experience_changes, experience_deletes = [], [], []
+    for update in experience_updates:
+        change = changes[update.employee_id]
+        current = current_experiences[update.employee_id]
+        kept = set()
+        for exp in update.experiences:
+            row = _experience_row(exp)
+            if exp.experience_id in current and exp.experience_id not in kept:
+                kept.add(exp.experience_id)
+                if current[exp.experience_id] != row:
+                    experience_changes.append(row + (exp.experience_id,))
+                    change.experiences_updated += 1
+            else:
+                experience_inserts.append((update.employee_id,) + row)
+                change.experiences_added += 1
+        removed = sorted(set(current) - kept)
+        experience_deletes += [(experience_id,) for experience_id in removed]
+        change.experiences_removed = len(removed)
+
+    _executemany(cursor, "DELETE FROM experiences WHERE experience_id = ?", experience_deletes)
+    _executemany(cursor, """
+        UPDATE experiences SET experience_type = ?, organization = ?, program_name = ?, start_date = ?, end_date = ?, focus = ?
+        WHERE experience_id = ?
+    """, experience_changes)
+    _executemany(cursor, """
+        INSERT INTO experiences (employee_id, experience_type, organization, program_name, start_date, end_date, focus)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, experience_inserts)
+
+    if updated_at is not None:
+        _executemany(cursor, "UPDATE employees SET updated_at = ? WHERE employee_id = ?",
+                     [(updated_at, change.employee_id) for change in changes.values() if change.changed])
+
+    return [changes[u.employee_id] for u in updates]
@@ -0,0 +1,337 @@
+# recommendations.py
+"""
+In-memory skill catalog index for career recommendations.
+
+The skills -> specializations catalog is loaded once into one bitset per
+specialization (a Python int with one bit per skill). Scoring an employee is
+then a popcount of `employee_bits & specialization_bits` per specialization,
+instead of running the CTE below on every request.
+
+For whole departments the same rules are applied to an employee x
+specialization overlap matrix built with NumPy (see `recommend_batch`).
+"""
+import threading
+import time
+
+import numpy as np
+
+MAX_OVERLAP_PERCENT = 90  # Specializations the employee already matches this well are skipped
+TOP_N = 3
+BATCH_ROWS = 5000  # Employees scored per matrix block, bounds memory for very large batches
+IN_CLAUSE_CHUNK = 1000  # SQL Server allows at most 2100 parameters per statement
+
+# The original per-request query, kept as the reference the index must agree with.
+RECOMMENDATIONS_SQL = """
+WITH SpecializationSkillCounts AS (
+    -- Step 1: Count total skills for each specialization
+    SELECT s.specialization_id, COUNT(sk.skill_id) AS total_skills
+    FROM specializations s
+    JOIN skills sk ON s.specialization_id = sk.specialization_id
+    GROUP BY s.specialization_id
+),
+EmployeeSkillOverlap AS (
+    -- Step 2: Count overlapping skills between the employee and each specialization
+    SELECT
+        sk.specialization_id,
+        COUNT(sk.skill_id) AS overlap_count
+    FROM skills sk
+    WHERE sk.skill_id IN (SELECT skill_id FROM employee_skills WHERE employee_id = ?)
+    GROUP BY sk.specialization_id
+)
+-- Step 3: Join the data, calculate percentage, and filter
+SELECT TOP 3
+    s.specialization_name AS recommended_role,
+    (CAST(eso.overlap_count AS FLOAT) * 100.0 / ssc.total_skills) AS skill_overlap_percent
+FROM
+    specializations s
+JOIN
+    SpecializationSkillCounts ssc ON s.specialization_id = ssc.specialization_id
+JOIN
+    EmployeeSkillOverlap eso ON s.specialization_id = eso.specialization_id
+WHERE
+    -- Exclude specializations where the user has a high match already
+    (CAST(eso.overlap_count AS FLOAT) * 100.0 / ssc.total_skills) < 90
+ORDER BY
+    skill_overlap_percent DESC;
+"""
+
+# Cheap fingerprint of the catalog, used to notice changes without reloading it.
+# Sums a hash of every row's ids and names, so renames and skills moved between
+# specializations count too (CHECKSUM/BINARY_CHECKSUM are XOR-based, and two
+# skills swapping specializations would cancel out). The name goes last, so
+# the concatenation is unambiguous.
+_SIGNATURE_SQL = {
+    "mssql": """
+        SELECT
+            (SELECT COUNT(*) FROM skills),
+            (SELECT SUM(CAST(CAST(HASHBYTES('MD5', CONCAT(skill_id, '|', specialization_id, '|', skill_name)) AS BINARY(4)) AS BIGINT)) FROM skills),
+            (SELECT COUNT(*) FROM specializations),
+            (SELECT SUM(CAST(CAST(HASHBYTES('MD5', CONCAT(specialization_id, '|', function_id, '|', specialization_name)) AS BINARY(4)) AS BIGINT)) FROM specializations)
+    """,
+    "sqlite": """
+        SELECT
+            (SELECT COUNT(*) FROM skills),
+            (SELECT SUM(ROW_HASH(skill_id, specialization_id, skill_name)) FROM skills),
+            (SELECT COUNT(*) FROM specializations),
+            (SELECT SUM(ROW_HASH(specialization_id, function_id, specialization_name)) FROM specializations)
+    """,
+}
+
+
+def recommend_with_sql(cursor, employee_id: str) -> list:
+    """Runs the reference CTE query; used to cross-check the index."""
+    cursor.execute(RECOMMENDATIONS_SQL, employee_id)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def load_employee_skill_pairs(cursor, employee_ids=None, department=None):
+    """
+    Reads the employee_skills rows for a batch with set-based queries.
+    Returns (employee_ids, pair_employee_ids, pair_skill_ids); employee_ids
+    lists the employees that exist, skilled or not: everyone in the
+    department, or the requested ids minus unknown ones, in request order.
+    """
+    pair_employee_ids, pair_skill_ids = [], []
+    found = set()
+
+    def collect():
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                return
+            for row in rows:
+                found.add(row.employee_id)
+                if row.skill_id is not None:
+                    pair_employee_ids.append(row.employee_id)
+                    pair_skill_ids.append(row.skill_id)
+
+    if department is not None:
+        cursor.execute("SELECT employee_id FROM employees WHERE department = ? ORDER BY employee_id", department)
+        employee_ids = [row.employee_id for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT es.employee_id, es.skill_id FROM employee_skills es
+            JOIN employees e ON e.employee_id = es.employee_id
+            WHERE e.department = ?
+        """, department)
+        collect()
+    else:
+        employee_ids = list(dict.fromkeys(employee_ids or []))
+        for start in range(0, len(employee_ids), IN_CLAUSE_CHUNK):
+            chunk = employee_ids[start:start + IN_CLAUSE_CHUNK]
+            placeholders = ','.join('?' for _ in chunk)
+            # Left join, so employees without skills still count as found
+            cursor.execute(f"""
+                SELECT e.employee_id, es.skill_id FROM employees e
+                LEFT JOIN employee_skills es ON es.employee_id = e.employee_id
+                WHERE e.employee_id IN ({placeholders})
+            """, tuple(chunk))
+            collect()
+        employee_ids = [employee_id for employee_id in employee_ids if employee_id in found]
+    return employee_ids, pair_employee_ids, pair_skill_ids
+
+
+class EmployeeSkillBits:
+    """
+    Every employee row (in employee_id order) with their skills as catalog
+    bits: `rows` and `bits` are parallel arrays of (employee row, skill bit)
+    pairs, sorted by row and then bit. Skills missing from `catalog` are
+    left out.
+    """
+
+    def __init__(self, catalog, employees, rows, bits):
+        self.catalog = catalog
+        self.employees = employees  # (employee_id, name, email, job_title, department, in_role_since) rows
+        self.employee_ids = [row.employee_id for row in employees]
+        self.row_of = {employee_id: i for i, employee_id in enumerate(self.employee_ids)}
+        self.rows = rows
+        self.bits = bits
+
+
+def load_employee_skill_bits(cursor, catalog, fetch_rows: int = 10000) -> EmployeeSkillBits:
+    """Reads all employees and employee_skills once, for the indexes built over the whole workforce."""
+    cursor.execute("SELECT employee_id, name, email, job_title, department, in_role_since FROM employees ORDER BY employee_id")
+    employees = cursor.fetchall()
+    row_of = {row.employee_id: i for i, row in enumerate(employees)}
+
+    rows, bits = [], []
+    cursor.execute("SELECT employee_id, skill_id FROM employee_skills")
+    while True:
+        batch = cursor.fetchmany(fetch_rows)
+        if not batch:
+            break
+        for row in batch:
+            employee_row, bit = row_of.get(row.employee_id), catalog.skill_bit.get(row.skill_id)
+            if employee_row is not None and bit is not None:
+                rows.append(employee_row)
+                bits.append(bit)
+    rows, bits = np.array(rows, dtype=np.int64), np.array(bits, dtype=np.int64)
+    order = np.lexsort((bits, rows))
+    return EmployeeSkillBits(catalog, employees, rows[order], bits[order])
+
+
+class CatalogSnapshot:
+    """An immutable, fully built view of the catalog. Replaced wholesale on refresh."""
+
+    def __init__(self, specializations, skills, signature):
+        # specializations: [(specialization_id, specialization_name, function_id)]
+        # skills: [(skill_id, skill_name, specialization_id or None)]
+        self.signature = signature
+        self.spec_ids = [spec_id for spec_id, _, _ in sorted(specializations)]
+        self.spec_position = {spec_id: i for i, spec_id in enumerate(self.spec_ids)}
+        names = {spec_id: name for spec_id, name, _ in specializations}
+        functions = {spec_id: function_id for spec_id, _, function_id in specializations}
+        self.spec_names = [names[spec_id] for spec_id in self.spec_ids]
+        self.spec_functions = [functions[spec_id] for spec_id in self.spec_ids]
+
+        self.skill_bit = {}
+        self.skill_names = {}
+        self.skill_ids_by_name = {}  # Lowercased, for case-insensitive lookups like the DB collation
+        self.skill_specialization = {}
+        self.spec_masks = [0] * len(self.spec_ids)
+        self.spec_skill_ids = [[] for _ in self.spec_ids]
+        for bit, (skill_id, skill_name, spec_id) in enumerate(sorted(skills)):
+            self.skill_bit[skill_id] = bit
+            self.skill_names[skill_id] = skill_name
+            self.skill_ids_by_name[skill_name.lower()] = skill_id
+            self.skill_specialization[skill_id] = spec_id
+            position = self.spec_position.get(spec_id)
+            if position is not None:
+                self.spec_masks[position] |= 1 << bit
+                self.spec_skill_ids[position].append(skill_id)
+        self.spec_totals = [mask.bit_count() for mask in self.spec_masks]
+
+        # Dense lookups for the vectorized batch path
+        self.spec_totals_array = np.array(self.spec_totals, dtype=np.float64)
+        max_skill_id = max(self.skill_bit, default=0)
+        self.skill_to_spec_column = np.full(max_skill_id + 1, -1, dtype=np.int64)
+        for skill_id, spec_id in self.skill_specialization.items():
+            if spec_id in self.spec_position:
+                self.skill_to_spec_column[skill_id] = self.spec_position[spec_id]
+
+    def skill_mask(self, skill_ids) -> int:
+        mask = 0
+        for skill_id in skill_ids:
+            bit = self.skill_bit.get(skill_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def recommend(self, skill_ids, top_n: int = TOP_N) -> list:
+        """Same result as RECOMMENDATIONS_SQL for an employee holding `skill_ids`."""
+        employee_mask = self.skill_mask(skill_ids)
+        if not employee_mask:
+            return []
+        scored = []
+        for position, spec_mask in enumerate(self.spec_masks):
+            overlap = (employee_mask & spec_mask).bit_count()
+            if not overlap:
+                continue  # The SQL inner-joins on the overlap CTE, so zero-overlap rows never appear
+            percent = float(overlap) * 100.0 / self.spec_totals[position]
+            if percent < MAX_OVERLAP_PERCENT:
+                scored.append((-percent, self.spec_ids[position], position, percent))
+        scored.sort()
+        return [
+            {"recommended_role": self.spec_names[position], "skill_overlap_percent": percent}
+            for _, _, position, percent in scored[:top_n]
+        ]
+
+    def recommend_batch(self, employee_ids, pair_employee_ids, pair_skill_ids, top_n: int = TOP_N) -> dict:
+        """
+        Vectorized `recommend` for many employees at once.
+
+        `pair_employee_ids`/`pair_skill_ids` are the employee_skills rows of
+        the batch. Every skill belongs to at most one specialization, so the
+        sparse employee x skill by skill x specialization product reduces to
+        a bincount of (employee row, specialization column) pairs.
+        """
+        row_of = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+        n_specs = len(self.spec_ids)
+        results = {employee_id: [] for employee_id in employee_ids}
+        if not pair_skill_ids or not n_specs:
+            return results
+
+        rows = np.fromiter((row_of.get(e, -1) for e in pair_employee_ids), dtype=np.int64, count=len(pair_employee_ids))
+        skills = np.asarray(pair_skill_ids, dtype=np.int64)
+        known = (rows >= 0) & (skills >= 0) & (skills < len(self.skill_to_spec_column))
+        rows, skills = rows[known], skills[known]
+        columns = self.skill_to_spec_column[skills]
+        in_catalog = columns >= 0
+        rows, columns = rows[in_catalog], columns[in_catalog]
+
+        order = np.argsort(rows, kind='stable')
+        rows, columns = rows[order], columns[order]
+        for start in range(0, len(employee_ids), BATCH_ROWS):
+            stop = min(start + BATCH_ROWS, len(employee_ids))
+            lo, hi = np.searchsorted(rows, [start, stop])
+            block = np.bincount(
+                (rows[lo:hi] - start) * n_specs + columns[lo:hi], minlength=(stop - start) * n_specs
+            ).reshape(stop - start, n_specs)
+
+            percent = np.zeros(block.shape, dtype=np.float64)
+            np.divide(block * 100.0, self.spec_totals_array, out=percent, where=self.spec_totals_array > 0)
+            eligible = (block > 0) & (percent < MAX_OVERLAP_PERCENT)
+            # Stable sort on the negated score keeps ties in specialization_id order, like `recommend`
+            ranking = np.argsort(np.where(eligible, -percent, np.inf), axis=1, kind='stable')[:, :top_n]
+
+            for offset in np.flatnonzero(eligible.any(axis=1)):
+                employee_recs = results[employee_ids[start + offset]]
+                for position in ranking[offset]:
+                    if not eligible[offset, position]:
+                        break
+                    employee_recs.append({
+                        "recommended_role": self.spec_names[position],
+                        "skill_overlap_percent": float(percent[offset, position]),
+                    })
+        return results
+
+
+class SkillCatalogIndex:
+    """
+    Holds the current CatalogSnapshot. `ensure_fresh` compares a cheap catalog
+    signature at most every `check_interval` seconds and rebuilds when it
+    changes; `invalidate` forces a rebuild on the next request.
+    """
+
+    def __init__(self, check_interval: float = 30.0, on_rebuild=None, backend_name: str = "mssql"):
+        self.check_interval = check_interval
+        self.signature_sql = _SIGNATURE_SQL[backend_name]
+        self.on_rebuild = on_rebuild  # Called after every (re)build, e.g. to invalidate dependent caches
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def invalidate(self):
+        self._checked_at = 0.0
+        with self._lock:
+            self._snapshot = None
+
+    def ensure_fresh(self, cursor) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            signature = tuple(cursor.execute(self.signature_sql).fetchone())
+            if self._snapshot is None or self._snapshot.signature != signature:
+                self._snapshot = self._load(cursor, signature)
+                if self.on_rebuild is not None:
+                    self.on_rebuild(self._snapshot)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    @staticmethod
+    def _load(cursor, signature) -> CatalogSnapshot:
+        cursor.execute("SELECT specialization_id, specialization_name, function_id FROM specializations")
+        specializations = [tuple(row) for row in cursor.fetchall()]
+        cursor.execute("SELECT skill_id, skill_name, specialization_id FROM skills")
+        skills = [tuple(row) for row in cursor.fetchall()]
+        snapshot = CatalogSnapshot(specializations, skills, signature)
+        print(f"✅ Skill catalog indexed: {len(snapshot.spec_ids)} specializations, {len(snapshot.skill_bit)} skills.")
+        return snapshot
@@ -0,0 +1,161 @@
+# session_store.py
+"""
+Server-side chatbot sessions.
+
+A session holds the state-machine position and the conversation history, so
+clients only send `session_id` and the new message on each turn. History is
+kept within a turn and token budget: once it grows past either, the oldest
+turns are folded into a short running summary that is sent to the LLM in
+their place. Prompt size (and LLM latency) therefore stays flat however
+long the conversation runs.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+SUMMARY_SNIPPET_CHARS = 160  # Per compacted message
+SUMMARY_MAX_CHARS = 1200
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return len(text or "") // 4 + 4
+
+
+class ChatSession:
+    def __init__(self, session_id, employee_id, state="START", history=None, summary=""):
+        self.session_id = session_id
+        self.employee_id = employee_id
+        self.state = state
+        self.history = list(history or [])
+        self.summary = summary
+
+    def to_dict(self) -> dict:
+        return {"session_id": self.session_id, "employee_id": self.employee_id, "state": self.state,
+                "history": self.history, "summary": self.summary}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["session_id"], data["employee_id"], data.get("state") or "START",
+                   data.get("history"), data.get("summary") or "")
+
+
+class InMemorySessionBackend:
+    """Process-local sessions, evicted when idle for `ttl` seconds or beyond `max_sessions`."""
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # session_id -> (last_used, data)
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] + self.ttl < time.monotonic():
+                self._sessions.pop(session_id, None)
+                return None
+            return entry[1]
+
+    def save(self, session_id, data: dict):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), data)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+
+class SQLiteSessionBackend:
+    """Sessions persisted to a SQLite file, so they survive restarts and are shared by local workers."""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id, data: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), time.time()),
+            )
+            self._conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+
+
+class SessionStore:
+    def __init__(self, backend, max_turns: int = 6, max_tokens: int = 1500):
+        self.backend = backend
+        self.max_messages = max_turns * 2  # A turn is one user message plus one reply
+        self.max_tokens = max_tokens
+
+    def open(self, session_id, employee_id, state=None, history=None) -> ChatSession:
+        """
+        Loads the session, or starts one seeded from what the client sent.
+        A session never carries over to a different employee.
+        """
+        data = self.backend.load(session_id) if session_id else None
+        if data is not None and data["employee_id"] == employee_id:
+            return ChatSession.from_dict(data)
+        if data is not None:
+            session_id = None
+        session = ChatSession(session_id or uuid.uuid4().hex, employee_id, state or "START", history)
+        self._compact(session)
+        return session
+
+    def prompt_history(self, session) -> list:
+        """The history to send to the LLM: the running summary, then the recent turns."""
+        if not session.summary:
+            return list(session.history)
+        summary = {"role": "system", "content": f"Summary of the earlier conversation: {session.summary}"}
+        return [summary] + session.history
+
+    def record_turn(self, session, message: str, reply: str, next_state: str):
+        session.history.append({"role": "user", "content": message})
+        session.history.append({"role": "assistant", "content": reply})
+        session.state = next_state
+        self._compact(session)
+        self.backend.save(session.session_id, session.to_dict())
+
+    def _compact(self, session):
+        def over_budget():
+            tokens = sum(estimate_tokens(m.get("content")) for m in session.history)
+            return len(session.history) > self.max_messages or tokens > self.max_tokens
+
+        folded = []
+        while session.history and over_budget():
+            folded.append(session.history.pop(0))
+        if folded:
+            snippets = [f"{m.get('role')}: {(m.get('content') or '')[:SUMMARY_SNIPPET_CHARS]}" for m in folded]
+            summary = " | ".join(([session.summary] if session.summary else []) + snippets)
+            # Keep the newest part of the summary when it outgrows its own budget
+            session.summary = summary[-SUMMARY_MAX_CHARS:]
+
+
+def session_store_from_config(config: dict) -> SessionStore:
+    ttl = float(config.get('CHAT_SESSION_TTL', 3600))
+    if str(config.get('CHAT_SESSION_BACKEND') or 'memory').lower() == 'sqlite':
+        backend = SQLiteSessionBackend(config.get('CHAT_SESSION_DB') or 'chat_sessions.db', ttl=ttl)
+    else:
+        backend = InMemorySessionBackend(max_sessions=int(config.get('CHAT_MAX_SESSIONS', 10000)), ttl=ttl)
+    return SessionStore(
+        backend,
+        max_turns=int(config.get('CHAT_HISTORY_MAX_TURNS', 6)),
+        max_tokens=int(config.get('CHAT_HISTORY_MAX_TOKENS', 1500)),
+    )
@@ -0,0 +1,87 @@
+# settings.py
+"""
+Loads the application configuration.
+
+The preferred format is `config/config.json`, a flat {"KEY": value} object
+that loads in microseconds. `config/config.xlsx` (a Key/Value sheet) is
+still read when there is no JSON file; pandas is only imported in that case.
+Any key can be overridden with a `PSA_<KEY>` environment variable, and
+PSA_CONFIG points at a different file.
+
+    python settings.py            # writes config/config.json from config/config.xlsx
+"""
+import json
+import os
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config')
+CONFIG_FILES = ('config.json', 'config.xlsx')  # In order of preference
+ENV_PREFIX = 'PSA_'
+
+
+class ConfigError(Exception):
+    """The configuration is missing or unreadable, or lacks a required key."""
+
+
+def _read_json(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ConfigError(f"{path} must contain a JSON object of keys and values.")
+    return config
+
+
+def _read_excel(path: str) -> dict:
+    import pandas as pd  # Only needed for the legacy format
+    df = pd.read_excel(path)
+    config = {}
+    for key, value in zip(df['Key'], df['Value']):
+        if pd.isna(value):
+            continue
+        config[key] = value.item() if hasattr(value, 'item') else value  # numpy scalars -> plain Python
+    return config
+
+
+def find_config_file():
+    path = os.environ.get(ENV_PREFIX + 'CONFIG')
+    if path:
+        return path
+    for name in CONFIG_FILES:
+        candidate = os.path.join(CONFIG_DIR, name)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def load_config(path=None) -> dict:
+    """Reads the config file (JSON, else Excel) and applies PSA_* environment overrides."""
+    path = path or find_config_file()
+    overrides = {key[len(ENV_PREFIX):]: value for key, value in os.environ.items()
+                 if key.startswith(ENV_PREFIX) and key != ENV_PREFIX + 'CONFIG'}
+    if path is None:
+        if not overrides:
+            raise ConfigError(f"No configuration found: create config/config.json (or config.xlsx) in {os.path.normpath(CONFIG_DIR)}.")
+        return overrides
+    try:
+        config = _read_excel(path) if path.endswith(('.xlsx', '.xls')) else _read_json(path)
+    except ConfigError:
+        raise
+    except FileNotFoundError:
+        raise ConfigError(f"Configuration file {path} not found.")
+    except Exception as e:
+        raise ConfigError(f"Could not read {path}: {e}")
+    config.update(overrides)
+    return config
+
+
+def require(config: dict, *keys):
+    missing = [key for key in keys if config.get(key) in (None, '')]
+    if missing:
+        raise ConfigError(f"Missing key(s) in configuration: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    source = os.path.join(CONFIG_DIR, 'config.xlsx')
+    target = os.path.join(CONFIG_DIR, 'config.json')
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump(_read_excel(source), f, indent=2)
+    print(f"✅ Wrote {os.path.normpath(target)} from {os.path.normpath(source)}.")
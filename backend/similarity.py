@@ -0,0 +1,169 @@
+# similarity.py
+"""
+"Employees like you": nearest neighbours by skill set, without comparing
+every pair of employees.
+
+Each employee's skills get a MinHash signature of `bands * rows` values; two
+signatures agree at any one position with probability equal to the Jaccard
+similarity of the two skill sets. The signature is cut into `bands` bands
+and each band hashed to a key, and employees sharing a band key become
+candidates (LSH). With the defaults (40 bands of 3) a pair at Jaccard 0.5
+shares a band 99% of the time, at 0.3 66% and at 0.1 only 4%, so a query
+looks at a small slice of the workforce; more bands raise recall when
+neighbours are less alike, at the cost of more candidates. Candidates are
+then reranked by their exact Jaccard similarity, from skill bitsets (Python
+ints with one bit per catalog skill, as in recommendations.py).
+
+Band keys are kept in one sorted array per band and looked up with
+`searchsorted`. A profile write recomputes that employee's keys in place and
+marks the row dirty; dirty rows are checked directly until there are
+RESORT_AFTER of them, when the sorted arrays are rebuilt.
+"""
+import heapq
+import threading
+import time
+
+import numpy as np
+
+from recommendations import load_employee_skill_bits
+
+BLOCK_ROWS = 5000  # Employees hashed per block, bounds the (pairs x permutations) matrix
+RESORT_AFTER = 1000  # Dirty rows tolerated before the band arrays are re-sorted
+PRIME = (1 << 31) - 1  # Hash values are (a * bit + b) mod PRIME
+EMPTY = PRIME  # Signature of an employee without skills; never a candidate
+SEED = 20251018  # Fixed, so signatures are comparable across rebuilds and processes
+
+
+class SimilarityIndex:
+    def __init__(self, bands: int = 40, rows: int = 3, max_age: float = 3600.0):
+        self.bands = bands
+        self.rows = rows
+        self.max_age = max_age
+        self.catalog = None
+        self._built_at = None
+        self._lock = threading.Lock()
+        rng = np.random.default_rng(SEED)
+        permutations = bands * rows
+        self._a = rng.integers(1, PRIME, permutations, dtype=np.int64)
+        self._b = rng.integers(0, PRIME, permutations, dtype=np.int64)
+        self._mix = rng.integers(1, 1 << 63, rows, dtype=np.uint64) | np.uint64(1)  # Odd multipliers for band keys
+
+    @property
+    def loaded(self) -> bool:
+        return self.catalog is not None
+
+    def _stale(self) -> bool:
+        return self._built_at is None or bool(self.max_age and time.monotonic() - self._built_at > self.max_age)
+
+    def ensure_current(self, cursor, catalog, skill_bits=None):
+        """
+        Builds on first use, and again when the catalog changes or the index
+        is older than max_age, from `skill_bits` if it was loaded for this
+        catalog (see WorkforceAnalytics.ensure_current).
+        """
+        if self.catalog is not catalog or self._stale():
+            with self._lock:
+                if self.catalog is not catalog or self._stale():
+                    if skill_bits is None or skill_bits.catalog is not catalog:
+                        skill_bits = load_employee_skill_bits(cursor, catalog)
+                    self._load(catalog, skill_bits)
+        return self
+
+    # --- Building ---
+
+    def _load(self, catalog, skill_bits):
+        started = time.perf_counter()
+        self.employee_ids = skill_bits.employee_ids
+        self.row_of = skill_bits.row_of
+        n = len(self.employee_ids)
+        rows, bits = skill_bits.rows, skill_bits.bits
+
+        self.masks = [0] * n
+        for row, bit in zip(rows.tolist(), bits.tolist()):
+            self.masks[row] |= 1 << bit
+
+        # One hash per (catalog skill, permutation); a signature is the column-wise minimum over the employee's skills
+        skill_bits = np.arange(len(catalog.skill_bit), dtype=np.int64)
+        self._hashes = (skill_bits[:, None] * self._a + self._b) % PRIME
+        self.keys = np.empty((n, self.bands), dtype=np.uint64)
+        for start in range(0, n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n)
+            lo, hi = np.searchsorted(rows, [start, stop])
+            self.keys[start:stop] = self._band_keys(self._signatures(rows[lo:hi] - start, bits[lo:hi], stop - start))
+
+        self.catalog = catalog
+        self._sort()
+        self._built_at = time.monotonic()
+        print(f"✅ Similarity index built for {n} employees ({time.perf_counter() - started:.2f}s).")
+
+    def _signatures(self, rows, bits, n_rows) -> np.ndarray:
+        """MinHash signatures for rows 0..n_rows-1 from (row, bit) pairs sorted by row."""
+        signatures = np.full((n_rows, len(self._a)), EMPTY, dtype=np.int64)
+        if len(rows):
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            signatures[rows[starts]] = np.minimum.reduceat(self._hashes[bits], starts, axis=0)
+        return signatures
+
+    def _band_keys(self, signatures) -> np.ndarray:
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (bands * self._mix).sum(axis=2, dtype=np.uint64)  # Wraps mod 2**64; collisions only add candidates
+
+    def _sort(self):
+        self._order = np.argsort(self.keys, axis=0, kind="stable").T.astype(np.int32)  # (bands, employees)
+        self._sorted_keys = np.take_along_axis(self.keys, self._order.T.astype(np.int64), axis=0).T.copy()
+        self._dirty = set()
+
+    # --- Incremental maintenance, called after the corresponding write commits ---
+
+    def update_employee_skills(self, employee_id: str, skill_ids):
+        """Re-hashes one employee; their old band keys stop matching immediately."""
+        with self._lock:
+            if not self.loaded or employee_id not in self.row_of:
+                return
+            row = self.row_of[employee_id]
+            bits = np.array(sorted({self.catalog.skill_bit[s] for s in skill_ids if s in self.catalog.skill_bit}),
+                            dtype=np.int64)
+            self.masks[row] = sum(1 << int(bit) for bit in bits)
+            self.keys[row] = self._band_keys(self._signatures(np.zeros(len(bits), dtype=np.int64), bits, 1))[0]
+            self._dirty.add(row)
+            if len(self._dirty) >= RESORT_AFTER:
+                self._sort()
+
+    # --- Queries ---
+
+    def _candidates(self, keys, exclude_row) -> np.ndarray:
+        found = []
+        for band in range(self.bands):
+            lo = np.searchsorted(self._sorted_keys[band], keys[band], side="left")
+            hi = np.searchsorted(self._sorted_keys[band], keys[band], side="right")
+            if hi > lo:
+                found.append(self._order[band, lo:hi])
+        if self._dirty:
+            found.append(np.fromiter(self._dirty, dtype=np.int32, count=len(self._dirty)))
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        rows = np.unique(np.concatenate(found)).astype(np.int64)
+        # The sorted arrays may be out of date for dirty rows, so confirm against the current keys
+        rows = rows[(self.keys[rows] == keys).any(axis=1)]
+        return rows[rows != exclude_row]
+
+    def similar(self, employee_id: str, limit: int = 5):
+        """
+        Up to `limit` (employee_id, jaccard, shared_skills) most similar to
+        the employee, best first, or None if the employee isn't indexed.
+        """
+        with self._lock:
+            row = self.row_of.get(employee_id)
+            if row is None:
+                return None
+            mask = self.masks[row]
+            if not mask:
+                return []
+            scored = []
+            for candidate in self._candidates(self.keys[row], row).tolist():
+                other = self.masks[candidate]
+                if other:
+                    shared = (mask & other).bit_count()
+                    scored.append((shared / (mask | other).bit_count(), shared, self.employee_ids[candidate]))
+            best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1]))
+        return [(other_id, jaccard, shared) for jaccard, shared, other_id in best]
@@ -0,0 +1,211 @@
+# specialization_resolver.py
+"""
+Resolves free-text upskilling targets ("cloud architect", "finacial modeling")
+to specializations.
+
+Candidates are the specialization names plus the job titles people hold.
+A job title stands for the specialization its holders' skills fall into most
+often. A target that is a substring of a specialization name matches exactly
+as the old `LIKE '%target%'` query did; a trigram index over the names finds
+those without looking at the rest. Otherwise the labels sharing the most word
+trigrams with the target are shortlisted from a second inverted index, only
+those are scored on their words (edit distance per word) and as a whole, and
+the best ones are returned ranked. Each specialization's required skills are
+precomputed as a set, so the skill gap is a set difference against the
+employee's skills.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+from mentor_index import trigrams
+
+MIN_SCORE = 0.7
+MAX_CANDIDATES = 5
+FUZZY_SHORTLIST = 25  # Labels scored with edit distance per fuzzy lookup, by trigram overlap
+
+_WORD = re.compile(r"\w+")
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance, two rows at a time."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def score(query: str, label: str) -> float:
+    """
+    How well `query` names `label`: the average, over the query's words, of
+    the closest word in the label, or the whole-string similarity if higher.
+    """
+    query_words = _WORD.findall(query)
+    label_words = _WORD.findall(label)
+    if not query_words or not label_words:
+        return 0.0
+    word_score = sum(max(similarity(q, w) for w in label_words) for q in query_words) / len(query_words)
+    return max(word_score, similarity(query, label))
+
+
+def word_trigrams(text: str) -> set:
+    """Trigrams of each word, padded as mentor_index.trigrams pads them, so typos in one word only cost a few."""
+    return set().union(*(trigrams(word) for word in _WORD.findall(text)))
+
+
+def substring_trigrams(text: str) -> set:
+    """The unpadded trigrams of `text`; a substring's trigrams all occur in the text containing it."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SpecializationResolver:
+    """Built from a CatalogSnapshot; rebuilt whenever the catalog is."""
+
+    def __init__(self, snapshot, job_title_specs: dict):
+        # job_title_specs: job_title -> specialization position in the snapshot
+        self.snapshot = snapshot
+        self.required_skills = [frozenset(skill_ids) for skill_ids in snapshot.spec_skill_ids]
+        labels = [(name.lower(), name, "specialization", position) for position, name in enumerate(snapshot.spec_names)]
+        labels += [(title.lower(), title, "job_title", position) for title, position in sorted(job_title_specs.items())]
+        self._labels = list(dict.fromkeys(labels))  # (label_key, label, kind, position), deduplicated
+        self._spec_labels = [i for i, label in enumerate(self._labels) if label[2] == "specialization"]
+
+        # Substring postings over the specialization names, word trigram postings over every label
+        self._substring_postings = {}
+        for i in self._spec_labels:
+            for gram in substring_trigrams(self._labels[i][0]):
+                self._substring_postings.setdefault(gram, set()).add(i)
+        self._gram_counts = []
+        self._postings = {}
+        for i, (label_key, _, _, _) in enumerate(self._labels):
+            grams = word_trigrams(label_key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    @classmethod
+    def load(cls, cursor, snapshot):
+        """Maps each job title to the specialization most of its holders' skills belong to."""
+        cursor.execute("""
+            SELECT e.job_title, es.skill_id
+            FROM employees e
+            JOIN employee_skills es ON e.employee_id = es.employee_id
+            WHERE e.job_title IS NOT NULL
+        """)
+        counts = {}
+        for row in cursor.fetchall():
+            spec_id = snapshot.skill_specialization.get(row.skill_id)
+            position = snapshot.spec_position.get(spec_id)
+            if position is not None:
+                title_counts = counts.setdefault(row.job_title, {})
+                title_counts[position] = title_counts.get(position, 0) + 1
+        job_title_specs = {
+            title: min(title_counts, key=lambda position: (-title_counts[position], snapshot.spec_ids[position]))
+            for title, title_counts in counts.items()
+        }
+        return cls(snapshot, job_title_specs)
+
+    def _candidate(self, label_index, candidate_score, exact) -> dict:
+        _, label, kind, position = self._labels[label_index]
+        return {
+            "specialization_id": self.snapshot.spec_ids[position],
+            "specialization_name": self.snapshot.spec_names[position],
+            "matched": label, "kind": kind, "score": round(candidate_score, 3), "exact": exact,
+        }
+
+    def _substring_matches(self, query: str) -> list:
+        inner = substring_trigrams(query)
+        if inner:
+            candidates = set.intersection(*(self._substring_postings.get(gram, set()) for gram in inner))
+        else:
+            candidates = self._spec_labels  # Too short to have a trigram
+        return sorted(i for i in candidates if query in self._labels[i][0])
+
+    def _shortlist(self, query: str) -> list:
+        """The labels sharing the most word trigrams with `query` (Dice coefficient), best first."""
+        query_grams = word_trigrams(query)
+        shared = Counter(i for gram in query_grams for i in self._postings.get(gram, ()))
+        dice = {i: 2 * count / (len(query_grams) + self._gram_counts[i]) for i, count in shared.items()}
+        return sorted(dice, key=lambda i: (-dice[i], i))[:FUZZY_SHORTLIST]
+
+    def resolve(self, text: str, limit: int = MAX_CANDIDATES) -> list:
+        """
+        Ranked candidates as dicts. Substring matches on specialization names
+        come first with score 1.0 and `exact` set, and are returned on their
+        own; otherwise the fuzzy matches follow.
+        """
+        query = text.lower()
+        best = {}  # specialization position -> candidate, keeping each specialization's best label
+        exact = self._substring_matches(query)
+        if exact:
+            # Every substring match is returned, as the old LIKE query unioned them all
+            for i in exact:
+                best.setdefault(self._labels[i][3], self._candidate(i, 1.0, True))
+            return sorted(best.values(), key=lambda c: c["specialization_id"])
+
+        for i in self._shortlist(query):
+            candidate_score = score(query, self._labels[i][0])
+            if candidate_score < MIN_SCORE:
+                continue
+            current = best.get(self._labels[i][3])
+            if current is None or candidate_score > current["score"]:
+                best[self._labels[i][3]] = self._candidate(i, candidate_score, False)
+        return sorted(best.values(), key=lambda c: (-c["score"], c["specialization_id"]))[:limit]
+
+    def required_skill_ids(self, candidates) -> set:
+        positions = [self.snapshot.spec_position[c["specialization_id"]] for c in candidates]
+        return set().union(*(self.required_skills[p] for p in positions))
+
+    def skill_gap(self, candidates, current_skill_ids) -> list:
+        """Names of the required skills the employee doesn't have yet, alphabetically."""
+        missing = self.required_skill_ids(candidates) - set(current_skill_ids)
+        return sorted(self.snapshot.skill_names[skill_id] for skill_id in missing)
+
+
+class SpecializationResolverIndex:
+    """
+    Keeps a resolver for the current catalog snapshot, building it on first
+    use. Job titles and the skills behind them change far more often than
+    the catalog, so the resolver is also rebuilt once it is `max_age`
+    seconds old.
+    """
+
+    def __init__(self, max_age: float = 3600.0):
+        self.max_age = max_age
+        self._resolver = None
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._resolver = None
+
+    def _current(self, snapshot):
+        resolver = self._resolver
+        if resolver is None or resolver.snapshot is not snapshot:
+            return None
+        if self.max_age and time.monotonic() - self._built_at > self.max_age:
+            return None
+        return resolver
+
+    def ensure_current(self, cursor, snapshot) -> SpecializationResolver:
+        resolver = self._current(snapshot)
+        if resolver is not None:
+            return resolver
+        with self._lock:
+            resolver = self._current(snapshot)
+            if resolver is None:
+                resolver = SpecializationResolver.load(cursor, snapshot)
+                self._resolver, self._built_at = resolver, time.monotonic()
+            return resolver
@@ -0,0 +1,78 @@
+# sqlite_standin.py
+"""
+Builds a local SQLite copy of the PSA database for tests and benchmarks.
+
+    python sqlite_standin.py psa_local.db
+
+Creates the tables from sql/sqlite_schema.sql, applies the migrations in
+migrations.py and loads the sample rows from the SQL Server script in
+sql/psa_db.sql. Point the API at it with
+DB_BACKEND=sqlite and SQLITE_PATH=psa_local.db in the config.
+"""
+import os
+import re
+import sys
+
+import db
+import migrations
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql')
+SCHEMA_PATH = os.path.join(SQL_DIR, 'sqlite_schema.sql')
+MSSQL_DUMP_PATH = os.path.join(SQL_DIR, 'psa_db.sql')
+
+_INSERT_PATTERN = re.compile(r"^INSERT \[dbo\]\.\[(\w+)\] \((.*?)\) VALUES \((.*)\)\s*$")
+_CAST_DATE_PATTERN = re.compile(r"CAST\(N('[^']*') AS Date\)")
+_NSTRING_PATTERN = re.compile(r"(^|[(,]\s*)N'")
+
+
+def create_schema(conn):
+    """Creates all tables on a raw sqlite3 connection (idempotent)."""
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+
+
+def _read_dump(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    # SSMS writes the script as UTF-16 with a BOM
+    encoding = 'utf-16' if raw[:2] in (b'\xff\xfe', b'\xfe\xff') else 'utf-8'
+    return raw.decode(encoding)
+
+
+def load_sample_data(conn, path=MSSQL_DUMP_PATH):
+    """Replays the INSERT statements of the SQL Server script into SQLite."""
+    inserted = 0
+    # The script inserts tables alphabetically and adds its foreign keys last, so do the same
+    conn.execute("PRAGMA foreign_keys = OFF")
+    for line in _read_dump(path).splitlines():
+        match = _INSERT_PATTERN.match(line.strip())
+        if not match:
+            continue
+        table, columns, values = match.groups()
+        columns = columns.replace('[', '').replace(']', '')
+        values = _NSTRING_PATTERN.sub(r"\1'", _CAST_DATE_PATTERN.sub(r"\1", values))
+        conn.execute(f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({values})")
+        inserted += 1
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+    return inserted
+
+
+def build(path, with_sample_data=True):
+    """Creates (or reuses) a SQLite database file and returns a backend for it."""
+    backend = db.SQLiteBackend(path)
+    conn = backend.connect()
+    try:
+        create_schema(conn.raw)
+        if with_sample_data:
+            load_sample_data(conn.raw)
+    finally:
+        conn.close()
+    migrations.migrate(backend, quiet=True)
+    return backend
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else 'psa_local.db'
+    build(target)
+    print(f"✅ SQLite stand-in written to '{target}'.")
@@ -0,0 +1,182 @@
+# stub_llm.py
+"""
+A local stand-in for the hackathon LLM API, for tests and benchmarks.
+
+    python stub_llm.py --port 8100 --delay 0.5
+
+Answers every POST with an OpenAI-style chat completion that echoes the last
+user message, or with a word-by-word SSE stream when the body asks for
+`"stream": true`. Point API_URL at http://127.0.0.1:8100/ to use it.
+
+For resilience testing it can also misbehave: `--fail-rate` answers that
+share of requests with a 503, `--hang-rate` stalls them for `--hang-seconds`
+first, `--drop-rate` closes the connection without answering, and
+`--cut-rate` closes it halfway through the reply. The settings can be
+changed while it runs with `POST /_faults` (a JSON object with any of
+fail_rate, hang_rate, hang_seconds, drop_rate and cut_rate), and
+`GET /_faults` returns them with the number of requests received so far.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAULTS_PATH = "/_faults"
+
+
+class Faults:
+    """Fault injection settings and a request count, shared by the handler threads."""
+    SETTINGS = ("fail_rate", "hang_rate", "hang_seconds", "drop_rate", "cut_rate")
+
+    def __init__(self, fail_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 30.0,
+                 drop_rate: float = 0.0, seed=None, cut_rate: float = 0.0):
+        self.fail_rate, self.hang_rate, self.hang_seconds, self.drop_rate = fail_rate, hang_rate, hang_seconds, drop_rate
+        self.cut_rate = cut_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def update(self, values: dict):
+        with self._lock:
+            for key in self.SETTINGS:
+                if key in values:
+                    setattr(self, key, float(values[key]))
+
+    def draw(self):
+        """Counts a request and picks its fault: "drop", "fail", "hang", "cut" or None."""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            for fault, rate in (("drop", self.drop_rate), ("fail", self.fail_rate), ("hang", self.hang_rate),
+                                ("cut", self.cut_rate)):
+                if roll < rate:
+                    return fault
+                roll -= rate
+            return None
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {**{key: getattr(self, key) for key in self.SETTINGS}, "requests": self.requests}
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    delay = 0.0
+    token_delay = 0.0
+    faults = None  # Set per server by start_stub_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply_text(self, body) -> str:
+        messages = body.get("messages") or [{}]
+        return f"Stub reply to: {messages[-1].get('content', '')}"
+
+    def _send_json(self, status, payload, cut: bool = False):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2] if cut else data)
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, text, cut: bool = False):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if cut and i >= max(len(words) // 2, 1):
+                return  # Closed without the final chunk, so the client sees a broken stream
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            delta = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+            self._send_chunk(f"data: {json.dumps(delta)}\n\n".encode())
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def do_GET(self):
+        if self.path == FAULTS_PATH:
+            self._send_json(200, self.faults.to_dict())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path == FAULTS_PATH:
+            self.faults.update(body)
+            self._send_json(200, self.faults.to_dict())
+            return
+        fault = self.faults.draw()
+        if fault == "drop":
+            self.close_connection = True  # No response at all
+            return
+        if fault == "hang":
+            time.sleep(self.faults.hang_seconds)
+        if self.delay:
+            time.sleep(self.delay)
+        if fault == "fail":
+            self._send_json(503, {"error": "injected failure"})
+            return
+        if fault == "cut":
+            self.close_connection = True
+        if body.get("stream"):
+            self._send_stream(self._reply_text(body), cut=fault == "cut")
+            return
+        self._send_json(200, {
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self._reply_text(body)}, "finish_reason": "stop"}],
+        }, cut=fault == "cut")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients cancelling calls (deadlines, hedging) hang up mid-reply; that's expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stub_server(port: int = 0, delay: float = 0.0, token_delay: float = 0.0, faults: Faults = None):
+    """Starts the stub on a background thread; returns (server, base_url). Port 0 picks a free port."""
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,),
+                   {"delay": delay, "token_delay": token_delay, "faults": faults or Faults()})
+    server = StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub for the LLM chat completions API.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering.")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed words.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Share of requests stalled for --hang-seconds.")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of connections closed without a reply.")
+    parser.add_argument("--cut-rate", type=float, default=0.0, help="Share of connections closed halfway through the reply.")
+    parser.add_argument("--seed", type=int, help="Seed for choosing which requests fail.")
+    args = parser.parse_args()
+    faults = Faults(args.fail_rate, args.hang_rate, args.hang_seconds, args.drop_rate, args.seed, args.cut_rate)
+    server, url = start_stub_server(args.port, args.delay, args.token_delay, faults)
+    print(f"✅ Stub LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
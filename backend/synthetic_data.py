@@ -0,0 +1,140 @@
+# synthetic_data.py
+"""
+Generates a large synthetic PSA database in SQLite, for benchmarks.
+
+    python synthetic_data.py bench.db --employees 100000 --skills-per-employee 20
+
+Starts from the SQLite stand-in with the sample data, so the real function
+areas, specializations and skills are the catalog, then adds synthetic
+employees with skills (clustered around a home specialization, like real
+profiles), position history and experiences. The same seed always produces
+the same database.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import sqlite_standin
+
+BATCH_ROWS = 50000
+EMPLOYEE_ID_OFFSET = 100000  # Synthetic ids start at EMP-100000, clear of the sample employees
+
+FIRST_NAMES = ["Wei", "Aisyah", "Rohan", "Grace", "Daniel", "Mei Ling", "Arjun", "Siti", "Marcus", "Priya",
+               "Jun", "Farah", "Kenji", "Nadia", "Ethan", "Hui Min", "Ravi", "Chloe", "Hafiz", "Isabel"]
+LAST_NAMES = ["Tan", "Lim", "Lee", "Ng", "Wong", "Rahman", "Mehta", "Goh", "Chua", "Koh",
+              "Nair", "Ong", "Teo", "Ismail", "Chen", "Singh", "Yeo", "Ho", "Low", "Pillai"]
+TITLE_LEVELS = ["Associate", "Analyst", "Senior Analyst", "Engineer", "Senior Engineer", "Specialist",
+                "Lead", "Manager", "Senior Manager", "Architect"]
+DEPARTMENTS = ["Information Technology", "Finance", "Human Resource", "Operations", "Engineering",
+               "Commercial", "Corporate Development", "Safety & Security"]
+LOCATIONS = ["PSA Singapore", "PSA Antwerp", "PSA Genova Pra'", "PSA Panama", "PSA Chennai", "PSA Busan"]
+EXPERIENCE_TYPES = ["Program", "Rotation", "Secondment", "Certification"]
+
+
+def _random_date(rng, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randrange(max((end - start).days, 1)))
+
+
+def _employee_rows(rng, count, specializations, skills_by_spec, all_skills, skills_per_employee):
+    """Yields (employee, skill_ids, positions, experiences) per synthetic employee."""
+    today = date.today()
+    for i in range(count):
+        employee_id = f"EMP-{EMPLOYEE_ID_OFFSET + i}"
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        spec_id, spec_name = rng.choice(specializations)
+        level = rng.choice(TITLE_LEVELS)
+        job_title = f"{spec_name.split(':')[-1].strip()} {level}"
+        hire_date = _random_date(rng, date(1995, 1, 1), today - timedelta(days=30))
+        in_role_since = _random_date(rng, hire_date, today)
+        employee = (employee_id, f"{first} {last}", f"{first.lower().replace(' ', '')}.{last.lower()}.{i}@globalpsa.com",
+                    rng.choice(LOCATIONS), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", job_title,
+                    rng.choice(DEPARTMENTS), spec_name.split(':')[0].strip(), hire_date, in_role_since)
+
+        # Most skills come from the home specialization, the rest from anywhere
+        wanted = max(1, int(rng.gauss(skills_per_employee, skills_per_employee / 4)))
+        home = skills_by_spec.get(spec_id, [])
+        skill_ids = set(rng.sample(home, min(len(home), max(1, wanted * 2 // 3))))
+        while len(skill_ids) < min(wanted, len(all_skills)):
+            skill_ids.add(rng.choice(all_skills))
+
+        positions = []
+        start = hire_date
+        total = rng.randint(1, 5)
+        for n in range(total):
+            # The last position is the current one, started on in_role_since
+            if n == total - 1 or start >= in_role_since:
+                start, end = max(start, in_role_since), None
+            else:
+                end = _random_date(rng, start, in_role_since)
+            title = job_title if end is None else f"{spec_name.split(':')[-1].strip()} {rng.choice(TITLE_LEVELS)}"
+            positions.append((employee_id, title, rng.choice(LOCATIONS), start, end, "Synthetic focus areas"))
+            if end is None:
+                break
+            start = end + timedelta(days=1)
+
+        experiences = []
+        for _ in range(rng.randint(0, 3)):
+            exp_start = _random_date(rng, hire_date, today)
+            experiences.append((employee_id, rng.choice(EXPERIENCE_TYPES), f"{spec_name} programme",
+                                rng.choice(LOCATIONS), exp_start, _random_date(rng, exp_start, today), "Synthetic experience"))
+        yield employee, skill_ids, positions, experiences
+
+
+def generate(path: str, employees: int = 10000, skills_per_employee: int = 15, seed: int = 42, overwrite: bool = True) -> dict:
+    """Builds the database at `path` and returns row counts."""
+    if overwrite:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    sqlite_standin.build(path)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")  # Throwaway data: trade durability for load speed
+    specializations = conn.execute("SELECT specialization_id, specialization_name FROM specializations").fetchall()
+    skills_by_spec = {}
+    for skill_id, spec_id in conn.execute("SELECT skill_id, specialization_id FROM skills"):
+        skills_by_spec.setdefault(spec_id, []).append(skill_id)
+    all_skills = sorted(s for ids in skills_by_spec.values() for s in ids)
+
+    counts = {"employees": 0, "employee_skills": 0, "position_history": 0, "experiences": 0}
+    batches = {name: [] for name in counts}
+
+    def flush():
+        conn.executemany("INSERT INTO employees (employee_id, name, email, office_location, line_manager, job_title, department, unit, hire_date, in_role_since) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batches["employees"])
+        conn.executemany("INSERT INTO employee_skills (employee_id, skill_id) VALUES (?, ?)", batches["employee_skills"])
+        conn.executemany("INSERT INTO position_history (employee_id, role_title, organization, start_date, end_date, focus_areas) VALUES (?, ?, ?, ?, ?, ?)", batches["position_history"])
+        conn.executemany("INSERT INTO experiences (employee_id, experience_type, program_name, organization, start_date, end_date, focus) VALUES (?, ?, ?, ?, ?, ?, ?)", batches["experiences"])
+        conn.commit()
+        for name, rows in batches.items():
+            counts[name] += len(rows)
+            rows.clear()
+
+    for employee, skill_ids, positions, experiences in _employee_rows(
+            rng, employees, specializations, skills_by_spec, all_skills, skills_per_employee):
+        batches["employees"].append(employee)
+        batches["employee_skills"].extend((employee[0], skill_id) for skill_id in sorted(skill_ids))
+        batches["position_history"].extend(positions)
+        batches["experiences"].extend(experiences)
+        if len(batches["employee_skills"]) >= BATCH_ROWS:
+            flush()
+    flush()
+    conn.execute("ANALYZE")
+    conn.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic PSA database in SQLite.")
+    parser.add_argument("path", nargs="?", default="psa_bench.db")
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--skills-per-employee", type=int, default=15, help="Average skills per employee.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = generate(args.path, args.employees, args.skills_per_employee, args.seed)
+    print(f"✅ Wrote {args.path} in {time.perf_counter() - started:.1f}s: " +
+          ", ".join(f"{count} {name}" for name, count in counts.items()))
@@ -0,0 +1,68 @@
+# conftest.py
+"""
+Shared fixtures. The backend modules import each other as top-level modules
+(they run from backend/), so that directory goes on sys.path.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import sqlite_standin  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def standin_config(tmp_path_factory):
+    """A SQLite stand-in with the sample data and a JSON config pointing at it, as {"path", "config"}."""
+    directory = tmp_path_factory.mktemp("standin")
+    db_path = str(directory / "psa_local.db")
+    sqlite_standin.build(db_path)
+    config = {
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": db_path,
+        "API_URL": "http://127.0.0.1:9/unused",  # Never called by these tests
+        "API_KEY": "test",
+        "CHAT_SESSION_DB": str(directory / "chat_sessions.db"),
+    }
+    config_path = directory / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    return {"path": str(config_path), "config": config}
+
+
+@pytest.fixture(scope="session")
+def app_client(standin_config):
+    """(main, TestClient) for the API on the stand-in, imported once per test session."""
+    patch = pytest.MonkeyPatch()
+    for key in [key for key in os.environ if key.startswith("PSA_")]:
+        patch.delenv(key)
+    patch.setenv("PSA_CONFIG", standin_config["path"])
+    patch.chdir(BACKEND_DIR)  # The leadership model files are read relative to backend/
+    try:
+        import main
+        from fastapi.testclient import TestClient
+        yield main, TestClient(main.app)
+    finally:
+        patch.undo()
+
+
+@pytest.fixture
+def stub_llm():
+    """Starts stub_llm servers: stub_llm(delay=..., faults=...) returns (faults, base_url); all stop after the test."""
+    from stub_llm import Faults, start_stub_server
+    servers = []
+
+    def start(delay: float = 0.0, token_delay: float = 0.0, faults: Faults = None):
+        faults = faults or Faults(seed=0)
+        server, url = start_stub_server(delay=delay, token_delay=token_delay, faults=faults)
+        servers.append(server)
+        return faults, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,85 @@
+# test_chatbot_stream.py
+"""
+/api/chatbot/stream against stub_llm: the reply arrives as `token` events
+and a final `done`; a connection dropped before the reply gets the canned
+fallback, and one dropped halfway through ends in an `error` event.
+"""
+import asyncio
+import json
+
+import pytest
+
+from llm_client import AsyncLLMClient
+from llm_resilience import ResilientLLMClient
+from stub_llm import Faults
+
+SUPPORT_MESSAGE = "I feel a bit lost at work"
+SUPPORT_FALLBACK = "I'm having trouble connecting right now"
+
+
+@pytest.fixture
+def chat_stream(app_client, stub_llm, monkeypatch):
+    """(post, faults): post(session_id=None) streams one support-mode turn and returns its [(event, data)]."""
+    main, client = app_client
+    faults, url = stub_llm(token_delay=0.01, faults=Faults(seed=0))
+    resilient = ResilientLLMClient(AsyncLLMClient(url, "test"), deadline=5.0, failure_threshold=100)
+    monkeypatch.setattr(main, "llm_client", resilient)
+    monkeypatch.setattr(main, "llm_cache", None)
+
+    def post(session_id=None):
+        payload = {"message": SUPPORT_MESSAGE, "employee_id": "EMP-20001", "state": "SUPPORT_MODE"}
+        if session_id:
+            payload["session_id"] = session_id
+        with client.stream("POST", "/api/chatbot/stream", json=payload) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = response.read().decode()
+        events = []
+        for block in body.strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines())
+            events.append((fields["event"], json.loads(fields["data"])))
+        return events
+
+    yield post, faults
+    asyncio.run(resilient.aclose())
+
+
+def test_tokens_then_done(chat_stream):
+    post, faults = chat_stream
+    events = post()
+    names = [name for name, _ in events]
+    assert names[-1] == "done" and set(names[:-1]) == {"token"} and len(names) > 2
+    done = events[-1][1]
+    assert "".join(data["content"] for name, data in events[:-1]) == done["reply"]
+    assert done["reply"] == f"Stub reply to: {SUPPORT_MESSAGE}"
+    assert done["next_state"] == "SUPPORT_MODE" and done["session_id"]
+    assert faults.requests == 1
+
+
+def test_drop_before_the_reply_streams_the_fallback(chat_stream):
+    post, faults = chat_stream
+    faults.update({"drop_rate": 1.0})
+    events = post()
+    assert [name for name, _ in events] == ["token", "done"]
+    assert events[0][1]["content"].startswith(SUPPORT_FALLBACK)
+    assert events[1][1]["reply"] == events[0][1]["content"]
+
+
+def test_drop_mid_reply_ends_in_an_error_event(chat_stream):
+    post, faults = chat_stream
+    faults.update({"cut_rate": 1.0})
+    events = post()
+    names = [name for name, _ in events]
+    assert names[-1] == "error" and "done" not in names
+    assert set(names[:-1]) == {"token"}  # Part of the reply went out before the connection dropped
+    partial = "".join(data["content"] for _, data in events[:-1])
+    assert f"Stub reply to: {SUPPORT_MESSAGE}".startswith(partial)
+    error = events[-1][1]
+    assert error["next_state"] == "SUPPORT_MODE" and error["session_id"]
+
+    # Nothing was recorded, so retrying the same session gets the whole reply
+    faults.update({"cut_rate": 0})
+    events = post(error["session_id"])
+    assert events[-1][0] == "done"
+    assert events[-1][1]["reply"] == f"Stub reply to: {SUPPORT_MESSAGE}"
+    assert events[-1][1]["session_id"] == error["session_id"]
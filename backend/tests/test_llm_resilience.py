@@ -0,0 +1,183 @@
+# test_llm_resilience.py
+"""
+ResilientLLMClient against stub_llm with injected faults: the breaker's
+closed -> open -> half_open -> closed cycle, deadlines, hedging, coalescing,
+and the chatbot's canned fallback while the API is down or too slow.
+"""
+import asyncio
+import time
+
+import pytest
+
+from llm_client import AsyncLLMClient, LLMError
+from llm_resilience import CircuitOpenError, LLMDeadlineExceeded, ResilientLLMClient
+from stub_llm import Faults
+
+PROMPT = [{"role": "user", "content": "hello there"}]
+SUPPORT_MESSAGE = "I feel a bit lost at work"
+SUPPORT_FALLBACK = "I'm having trouble connecting right now"
+
+
+def _client(url, events=None, **options):
+    options = {"deadline": 5.0, "failure_threshold": 2, "reset_after": 0.3, "coalesce": False, **options}
+    on_event = events.append if events is not None else None
+    return ResilientLLMClient(AsyncLLMClient(url, "test", read_timeout=10), on_event=on_event, **options)
+
+
+def _run(scenario):
+    """Runs one scenario on a fresh loop, closing the client it returns with."""
+    async def main():
+        client, result = await scenario()
+        await client.aclose()
+        return result
+    return asyncio.run(main())
+
+
+def test_breaker_opens_rejects_and_recovers(stub_llm):
+    faults, url = stub_llm(faults=Faults(fail_rate=1.0, seed=0))
+    events = []
+
+    async def scenario():
+        client = _client(url, events)
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await client.complete(PROMPT)
+        assert client.stats()["state"] == "open"
+
+        # Open: rejected without reaching the API
+        with pytest.raises(CircuitOpenError):
+            await client.complete(PROMPT)
+        assert faults.requests == 2
+
+        # After reset_after one trial goes through; its failure re-opens the breaker
+        await asyncio.sleep(0.35)
+        with pytest.raises(LLMError):
+            await client.complete(PROMPT)
+        assert client.stats()["state"] == "open"
+
+        # The API recovers: the next trial closes the breaker
+        faults.update({"fail_rate": 0})
+        await asyncio.sleep(0.35)
+        reply = await client.complete(PROMPT)
+        return client, reply
+
+    assert _run(scenario) == "Stub reply to: hello there"
+    transitions = [event for event in events if event in ("circuit_open", "circuit_half_open", "circuit_closed")]
+    assert transitions == ["circuit_open", "circuit_half_open", "circuit_open", "circuit_half_open", "circuit_closed"]
+    assert "circuit_rejected" in events
+    assert faults.requests == 4
+
+
+def test_dropped_connections_count_as_failures(stub_llm):
+    faults, url = stub_llm(faults=Faults(drop_rate=1.0, seed=0))
+
+    async def scenario():
+        client = _client(url)
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await client.complete(PROMPT)
+        return client, client.stats()
+
+    assert _run(scenario)["state"] == "open"
+    assert faults.requests == 2
+
+
+def test_deadline_cuts_off_a_hanging_call(stub_llm):
+    faults, url = stub_llm(faults=Faults(hang_rate=1.0, hang_seconds=3.0, seed=0))
+    events = []
+
+    async def scenario():
+        client = _client(url, events, deadline=0.3)
+        started = time.monotonic()
+        with pytest.raises(LLMDeadlineExceeded):
+            await client.complete(PROMPT)
+        return client, (time.monotonic() - started, client.stats())
+
+    elapsed, stats = _run(scenario)
+    assert elapsed < 1.5
+    assert "deadline_exceeded" in events
+    assert stats["consecutive_failures"] == 1
+
+
+def test_hedged_request_answers_when_the_first_hangs(stub_llm):
+    faults, url = stub_llm(faults=Faults(hang_rate=1.0, hang_seconds=3.0, seed=0))
+    events = []
+
+    async def scenario():
+        client = _client(url, events, hedge_after=0.3)
+        started = time.monotonic()
+        call = asyncio.ensure_future(client.complete(PROMPT))
+        await asyncio.sleep(0.1)
+        faults.update({"hang_rate": 0})  # Only the first request hangs
+        reply = await call
+        return client, (reply, time.monotonic() - started)
+
+    reply, elapsed = _run(scenario)
+    assert reply == "Stub reply to: hello there"
+    assert elapsed < 1.5
+    assert "hedged" in events
+    assert faults.requests == 2
+
+
+def test_concurrent_identical_prompts_share_one_request(stub_llm):
+    faults, url = stub_llm(delay=0.3)
+    events = []
+    callers = 10
+
+    async def scenario():
+        client = _client(url, events, coalesce=True)
+        replies = await asyncio.gather(*(client.complete(PROMPT) for _ in range(callers)))
+        return client, replies
+
+    replies = _run(scenario)
+    assert replies == ["Stub reply to: hello there"] * callers
+    assert faults.requests == 1
+    assert events.count("coalesced") == callers - 1
+
+
+def _support_turn(client):
+    response = client.post("/api/chatbot", json={
+        "message": SUPPORT_MESSAGE, "employee_id": "EMP-20001", "state": "SUPPORT_MODE",
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def chatbot_on_stub(app_client, stub_llm, monkeypatch):
+    """(TestClient, faults, events) with the chatbot's LLM client pointed at a fresh stub."""
+    main, client = app_client
+    faults, url = stub_llm(faults=Faults(seed=0))
+    events = []
+    resilient = _client(url, events, deadline=0.5, failure_threshold=1, reset_after=60)
+    monkeypatch.setattr(main, "llm_client", resilient)
+    monkeypatch.setattr(main, "llm_cache", None)
+    yield client, faults, events
+    asyncio.run(resilient.aclose())
+
+
+def test_chatbot_falls_back_while_the_breaker_is_open(chatbot_on_stub):
+    client, faults, events = chatbot_on_stub
+    assert _support_turn(client)["reply"] == f"Stub reply to: {SUPPORT_MESSAGE}"
+
+    faults.update({"fail_rate": 1.0})
+    assert _support_turn(client)["reply"].startswith(SUPPORT_FALLBACK)
+    assert "circuit_open" in events
+
+    # Open: the fallback is served without calling the API, even though it has recovered
+    faults.update({"fail_rate": 0})
+    requests = faults.requests
+    turn = _support_turn(client)
+    assert turn["reply"].startswith(SUPPORT_FALLBACK)
+    assert turn["next_state"] == "SUPPORT_MODE"
+    assert faults.requests == requests
+    assert "circuit_rejected" in events
+
+
+def test_chatbot_falls_back_when_the_deadline_passes(chatbot_on_stub):
+    client, faults, events = chatbot_on_stub
+    faults.update({"hang_rate": 1.0, "hang_seconds": 3.0})
+    started = time.monotonic()
+    assert _support_turn(client)["reply"].startswith(SUPPORT_FALLBACK)
+    assert time.monotonic() - started < 2.0
+    assert "deadline_exceeded" in events
@@ -0,0 +1,81 @@
+# test_model_registry.py
+"""
+The compact artifact scores exactly like the pickled sklearn objects: on
+random features, on rows whose 0-100 score sits on an integer boundary (the
+rows `predict_proba` redoes with math.exp), and on features far enough out
+that the sigmoid saturates at 0 or 1.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+import leadership  # noqa: E402
+import leadership_model  # noqa: E402
+from model_registry import CompactLeadershipModel, export_artifact  # noqa: E402
+
+ROWS = 2000
+
+
+def _training_data(rng):
+    """Spool-shaped rows (features, is_leader, fold hash) where more promotions and skills mean a leader."""
+    days = rng.integers(30, 12000, ROWS)
+    promotions = rng.integers(0, 8, ROWS)
+    skills = rng.integers(0, 30, ROWS)
+    logit = 0.0002 * days + 0.6 * promotions + 0.08 * skills - 3.5 + rng.normal(0, 1, ROWS)
+    data = np.zeros((ROWS, leadership_model.SPOOL_COLUMNS), dtype=np.float64)
+    data[:, 0], data[:, 1], data[:, 2] = days, promotions, skills
+    data[:, 3] = logit > 0
+    data[:, 4] = np.arange(ROWS)
+    return data
+
+
+@pytest.fixture(scope="module", params=["full", "incremental"])
+def trained(request, tmp_path_factory):
+    """(model, scaler, compact) trained the way leadership_model does it, and loaded back from the exported file."""
+    data = _training_data(np.random.default_rng(3))
+    model, scaler = leadership_model.fit(request.param, data, {}, chunk_size=500, epochs=3)
+    path = str(tmp_path_factory.mktemp("artifact") / "leadership_model.json")
+    export_artifact(model, scaler, path=path, version="test")
+    return model, scaler, CompactLeadershipModel.from_file(path)
+
+
+def _assert_same_scores(trained, features):
+    model, scaler, compact = trained
+    expected = model.predict_proba(scaler.transform(features))[:, 1]
+    probabilities = compact.predict_proba(features)
+    np.testing.assert_allclose(probabilities, expected, rtol=1e-12, atol=0)
+    np.testing.assert_array_equal(compact.predict_scores(features), leadership.predict_scores(model, scaler, features))
+    return probabilities
+
+
+def _features_for_decisions(compact, decisions):
+    """Feature rows whose decision function (scaled features . coef + intercept) is `decisions`."""
+    coef = compact.coef.reshape(-1)
+    steps = (np.asarray(decisions, dtype=np.float64) - compact.intercept) / np.dot(coef, coef)
+    return compact.mean + compact.scale * np.outer(steps, coef)
+
+
+def test_random_features_score_the_same(trained):
+    rng = np.random.default_rng(11)
+    features = np.column_stack([rng.uniform(0, 15000, 5000), rng.integers(0, 10, 5000), rng.integers(0, 40, 5000)])
+    _assert_same_scores(trained, features.astype(np.float64))
+
+
+def test_integer_boundary_scores_match(trained):
+    _, _, compact = trained
+    targets = np.arange(1, 100) / 100.0
+    features = _features_for_decisions(compact, np.log(targets / (1 - targets)))
+    probabilities = _assert_same_scores(trained, features)
+    scaled = probabilities * 100
+    # These rows really are the ones the math.exp workaround handles
+    assert (np.abs(scaled - np.rint(scaled)) < 1e-9).sum() > len(targets) // 2
+
+
+def test_saturated_scores_match(trained):
+    _, _, compact = trained
+    decisions = [-1000.0, -745.0, -709.0, -40.0, 40.0, 709.0, 745.0, 1000.0]
+    features = _features_for_decisions(compact, decisions)
+    features = np.vstack([features, [[0, 0, 0], [1e9, 1e6, 1e6], [-1e9, -1e6, -1e6]]])
+    probabilities = _assert_same_scores(trained, features)
+    assert probabilities[0] == 0.0 and probabilities[len(decisions) - 1] == 1.0
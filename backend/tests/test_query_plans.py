@@ -0,0 +1,117 @@
+# test_query_plans.py
+"""
+The statements the endpoints actually run, checked with SQLite's EXPLAIN
+QUERY PLAN on the stand-in: none may read a table end to end or sort in a
+temporary B-tree. Statements that are also in migrations.HOT_QUERIES are held
+to that entry's rules (e.g. `covering`).
+
+The in-memory indexes are built first, so their one-off full reads are not
+counted; everything captured afterwards runs per request.
+"""
+import json
+import re
+
+import pytest
+
+import db
+import migrations
+
+EMPLOYEE = "EMP-20001"
+DEPARTMENT = "Finance"
+CATALOG_TABLES = ("skills", "s", "specializations", "function_areas", "sqlite_master")  # Small; scanning them is fine
+
+GET_REQUESTS = [
+    f"/api/employee/{EMPLOYEE}",
+    f"/api/employee/{EMPLOYEE}/details",
+    f"/api/employee/{EMPLOYEE}/career_recommendations",
+    f"/api/employee/{EMPLOYEE}/leadership_potential",
+    f"/api/employee/{EMPLOYEE}/dashboard",
+    f"/api/employee/{EMPLOYEE}/similar",
+    "/api/analytics/departments",
+    f"/api/analytics/departments/{DEPARTMENT}",
+    "/api/analytics/function_areas",
+    "/api/analytics/leadership",
+    "/api/export/profiles",
+    f"/api/export/profiles?after={EMPLOYEE}",
+    "/api/export/profiles?updated_since=2100-01-01T00:00:00Z",  # After the migration, so only changes are read
+]
+
+POST_REQUESTS = [
+    ("/api/career_recommendations/batch", {"department": DEPARTMENT}),
+    ("/api/career_recommendations/batch", {"employee_ids": [EMPLOYEE, "EMP-20002"]}),
+    ("/api/leadership_potential/batch", {"department": DEPARTMENT}),
+    ("/api/leadership_potential/batch", {"employee_ids": [EMPLOYEE, "EMP-20002"]}),
+    ("/api/employee/EMP-20002/update", {
+        "skills": ["Cloud Architecture"],
+        "experiences": [{"type": "Course", "organization": "PSA", "program": "Cloud", "period": {"start": "2024-01-01"},
+                         "focus": "Migration"}],
+    }),
+]
+
+IMPORT_BODY = "\n".join(json.dumps(record) for record in [
+    {"employee_id": "EMP-20003", "skills": ["Cloud Architecture"]},
+    {"employee_id": "EMP-20004", "experiences": []},
+])
+
+
+def _normalize(sql: str) -> str:
+    sql = " ".join(sql.split())
+    sql = re.sub(r"IN \(\?(?:, ?\?)*\)", "IN (?)", sql)
+    return re.sub(r"TOP \d+", "TOP n", sql)
+
+
+HOT_QUERIES = {_normalize(query.sql): query for query in migrations.HOT_QUERIES}
+
+
+@pytest.fixture(scope="module")
+def captured_statements(app_client):
+    main, client = app_client
+    with db.transaction():
+        main.warm_indexes()
+    statements = {}
+    db.observe_statements(lambda sql, phase, seconds, rows: statements.setdefault(_normalize(sql), sql)
+                          if phase in ("execute", "executemany") else None)
+    try:
+        for path in GET_REQUESTS:
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.text)
+        for path, body in POST_REQUESTS:
+            response = client.post(path, json=body)
+            assert response.status_code == 200, (path, response.text)
+        response = client.post("/api/employees/import", content=IMPORT_BODY)
+        assert response.status_code == 200 and response.json()["failed"] == 0, response.text
+    finally:
+        db.observe_statements(None)
+    return list(statements.values())
+
+
+def _rules(sql: str) -> migrations.HotQuery:
+    hot = HOT_QUERIES.get(_normalize(sql))
+    if hot is not None:
+        return hot
+    return migrations.HotQuery("captured", sql, allow_scans=CATALOG_TABLES)
+
+
+def _bounded_walk(sql: str, detail: str) -> bool:
+    """A `TOP n ... ORDER BY` without a filter walks the primary key and stops after n rows."""
+    return "TOP " in sql and " WHERE " not in f" {sql} " and "USING" in detail and "autoindex" in detail
+
+
+def test_endpoints_run_statements(captured_statements):
+    assert len(captured_statements) >= 20
+
+
+def test_captured_statements_use_indexes(app_client, captured_statements):
+    conn = db.get_pool().backend.connect()
+    try:
+        cursor = conn.cursor()
+        failures = []
+        for sql in captured_statements:
+            details = migrations.explain(cursor, sql)
+            problems = [problem for problem in migrations.plan_problems(_rules(sql), details)
+                        if not _bounded_walk(sql, problem)]
+            if problems:
+                failures.append(f"{' '.join(sql.split())}\n    " + "\n    ".join(problems))
+    finally:
+        conn.close()
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,176 @@
+# test_recommendations.py
+"""
+The in-memory catalog index against the reference RECOMMENDATIONS_SQL, on a
+copy of the stand-in with a few hundred synthetic employees added: same
+roles in the same order, same percentages, and the < 90 % filter. The
+vectorized batch path must then agree with the per-employee one.
+
+The SQL orders by percentage only, so among tied roles it may return any of
+them; the index breaks ties by specialization_id. Ties are compared as
+groups, and the roles cut off by TOP 3 must come from the same tie group.
+"""
+import random
+import shutil
+from itertools import groupby
+
+import pytest
+
+import db
+from recommendations import (MAX_OVERLAP_PERCENT, RECOMMENDATIONS_SQL, TOP_N, SkillCatalogIndex,
+                             load_employee_skill_pairs, recommend_with_sql)
+
+SYNTHETIC_EMPLOYEES = 300
+DEPARTMENT = "Synthetic"
+ALL_ROLES_SQL = RECOMMENDATIONS_SQL.replace("SELECT TOP 3", "SELECT")
+
+
+def _add_employee(raw, employee_id, skill_ids, department=DEPARTMENT):
+    raw.execute("INSERT INTO employees (employee_id, name, email, department) VALUES (?, ?, ?, ?)",
+                (employee_id, employee_id, f"{employee_id.lower()}@example.com", department))
+    raw.executemany("INSERT INTO employee_skills (employee_id, skill_id) VALUES (?, ?)",
+                    [(employee_id, skill_id) for skill_id in skill_ids])
+
+
+@pytest.fixture(scope="module")
+def catalog_db(standin_config, tmp_path_factory):
+    """(cursor, snapshot, edge cases) on a private copy of the stand-in; edge cases maps a name to an employee_id."""
+    path = str(tmp_path_factory.mktemp("recommendations") / "psa_local.db")
+    shutil.copyfile(standin_config["config"]["SQLITE_PATH"], path)
+    conn = db.SQLiteBackend(path).connect()
+    raw = conn.raw
+    skills_by_spec = {}
+    for skill_id, spec_id in raw.execute("SELECT skill_id, specialization_id FROM skills ORDER BY skill_id"):
+        skills_by_spec.setdefault(spec_id, []).append(skill_id)
+    all_skills = sorted(skill_id for skills in skills_by_spec.values() for skill_id in skills)
+    pairs = sorted(spec_id for spec_id, skills in skills_by_spec.items() if len(skills) == 2)
+    largest = max(skills_by_spec, key=lambda spec_id: (len(skills_by_spec[spec_id]), -spec_id))
+
+    rng = random.Random(7)
+    for i in range(SYNTHETIC_EMPLOYEES):
+        _add_employee(raw, f"EMP-S{i:04d}", rng.sample(all_skills, rng.randint(1, 12)))
+    edge_cases = {
+        "no_skills": [],
+        # Every match is at or above the cut-off: 100 % of a whole specialization
+        "only_full_matches": skills_by_spec[largest],
+        # One skill from each two-skill specialization: all tie at 50 %, more of them than TOP 3 keeps
+        "ties": [skills_by_spec[spec_id][0] for spec_id in pairs],
+        # The same tie with one role strictly ahead of it
+        "tie_behind_leader": skills_by_spec[largest][:-1] + [skills_by_spec[spec_id][0] for spec_id in pairs],
+    }
+    for name, skill_ids in edge_cases.items():
+        _add_employee(raw, f"EMP-X-{name}", skill_ids)
+    raw.commit()
+    try:
+        cursor = conn.cursor()
+        snapshot = SkillCatalogIndex(backend_name="sqlite").ensure_fresh(cursor)
+        yield cursor, snapshot, {name: f"EMP-X-{name}" for name in edge_cases}
+    finally:
+        conn.close()
+
+
+def _skill_ids(cursor, employee_id):
+    cursor.execute("SELECT skill_id FROM employee_skills WHERE employee_id = ?", employee_id)
+    return [row.skill_id for row in cursor.fetchall()]
+
+
+def _all_roles_with_sql(cursor, employee_id):
+    cursor.execute(ALL_ROLES_SQL, employee_id)
+    return [(row.recommended_role, row.skill_overlap_percent) for row in cursor.fetchall()]
+
+
+def _assert_matches_sql(cursor, snapshot, employee_id):
+    recommended = snapshot.recommend(_skill_ids(cursor, employee_id))
+    expected = recommend_with_sql(cursor, employee_id)
+    # Same length and percentages, position by position
+    assert [r["skill_overlap_percent"] for r in recommended] == pytest.approx(
+        [r["skill_overlap_percent"] for r in expected])
+    assert all(0 < r["skill_overlap_percent"] < MAX_OVERLAP_PERCENT for r in recommended)
+
+    # Every role the index keeps scores what the SQL gives it, and the tie cut off by TOP 3
+    # is filled from the same group of tied roles
+    all_roles = _all_roles_with_sql(cursor, employee_id)
+    percent_of = dict(all_roles)
+    for r in recommended:
+        assert percent_of[r["recommended_role"]] == pytest.approx(r["skill_overlap_percent"])
+    names_in_sql_order = [name for name, _ in all_roles]
+    for _, group in groupby(recommended, key=lambda r: round(r["skill_overlap_percent"], 9)):
+        group = [r["recommended_role"] for r in group]
+        tied = {name for name, percent in all_roles if round(percent, 9) == round(percent_of[group[0]], 9)}
+        assert set(group) <= tied
+        # Ties go in specialization_id order
+        assert group == sorted(group, key=lambda name: snapshot.spec_ids[snapshot.spec_names.index(name)])
+    return recommended, names_in_sql_order
+
+
+def test_index_matches_sql_for_a_sample_of_employees(catalog_db):
+    cursor, snapshot, _ = catalog_db
+    cursor.execute("SELECT employee_id FROM employees ORDER BY employee_id")
+    employee_ids = [row.employee_id for row in cursor.fetchall()]
+    assert len(employee_ids) > SYNTHETIC_EMPLOYEES
+    with_roles = 0
+    for employee_id in employee_ids:
+        recommended, _ = _assert_matches_sql(cursor, snapshot, employee_id)
+        with_roles += bool(recommended)
+    assert with_roles > SYNTHETIC_EMPLOYEES // 2  # The sample actually exercises the scoring
+
+
+def test_no_overlap_recommends_nothing(catalog_db):
+    cursor, snapshot, edge_cases = catalog_db
+    for name in ("no_skills", "only_full_matches"):
+        recommended, _ = _assert_matches_sql(cursor, snapshot, edge_cases[name])
+        assert recommended == []
+
+
+def test_ties_cut_off_by_top_n(catalog_db):
+    cursor, snapshot, edge_cases = catalog_db
+    recommended, all_roles = _assert_matches_sql(cursor, snapshot, edge_cases["ties"])
+    assert len(all_roles) > TOP_N
+    assert [r["skill_overlap_percent"] for r in recommended] == [50.0] * TOP_N
+
+    recommended, _ = _assert_matches_sql(cursor, snapshot, edge_cases["tie_behind_leader"])
+    assert recommended[0]["skill_overlap_percent"] > 50.0
+    assert [r["skill_overlap_percent"] for r in recommended[1:]] == [50.0] * (TOP_N - 1)
+
+
+def _assert_batch_matches_recommend(cursor, snapshot, employee_ids, pair_employee_ids, pair_skill_ids):
+    for top_n in (1, TOP_N, 10):
+        results = snapshot.recommend_batch(employee_ids, pair_employee_ids, pair_skill_ids, top_n=top_n)
+        assert list(results) == employee_ids
+        for employee_id in employee_ids:
+            assert results[employee_id] == snapshot.recommend(_skill_ids(cursor, employee_id), top_n=top_n)
+
+
+def test_batch_matches_recommend_for_a_department(catalog_db):
+    cursor, snapshot, edge_cases = catalog_db
+    employee_ids, pair_employee_ids, pair_skill_ids = load_employee_skill_pairs(cursor, department=DEPARTMENT)
+    assert len(employee_ids) == SYNTHETIC_EMPLOYEES + len(edge_cases)
+    _assert_batch_matches_recommend(cursor, snapshot, employee_ids, pair_employee_ids, pair_skill_ids)
+    # And so with the reference SQL, ties included
+    results = snapshot.recommend_batch(employee_ids, pair_employee_ids, pair_skill_ids)
+    for employee_id in edge_cases.values():
+        assert results[employee_id] == _assert_matches_sql(cursor, snapshot, employee_id)[0]
+
+
+def test_batch_matches_recommend_for_an_id_list(catalog_db):
+    cursor, snapshot, edge_cases = catalog_db
+    requested = ["EMP-S0003", edge_cases["ties"], "EMP-UNKNOWN", edge_cases["no_skills"], "EMP-S0003", "EMP-S0150"]
+    employee_ids, pair_employee_ids, pair_skill_ids = load_employee_skill_pairs(cursor, employee_ids=requested)
+    # Unknown ids dropped, duplicates collapsed, request order kept; employees without skills still listed
+    assert employee_ids == ["EMP-S0003", edge_cases["ties"], edge_cases["no_skills"], "EMP-S0150"]
+    _assert_batch_matches_recommend(cursor, snapshot, employee_ids, pair_employee_ids, pair_skill_ids)
+
+
+def test_batch_endpoint_lists_unknown_ids_as_missing(app_client):
+    _, client = app_client
+    requested = ["EMP-20002", "EMP-NOPE", "EMP-20001", "EMP-20002"]
+    response = client.post("/api/career_recommendations/batch", json={"employee_ids": requested})
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["employee_id"] for result in body["results"]] == ["EMP-20002", "EMP-20001"]
+    assert body["missing"] == ["EMP-NOPE"]
+    for result in body["results"]:
+        single = client.get(f"/api/employee/{result['employee_id']}/career_recommendations").json()
+        assert result["recommendations"] == single["recommendations"]
+
+    body = client.post("/api/career_recommendations/batch", json={"department": "Finance"}).json()
+    assert body["results"] and body["missing"] == []
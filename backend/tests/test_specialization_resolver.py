@@ -0,0 +1,73 @@
+# test_specialization_resolver.py
+"""Upskill target resolution: exact, typo and no-match lookups, and their cost per call."""
+import time
+
+import pytest
+
+import db
+from recommendations import SkillCatalogIndex
+from specialization_resolver import SpecializationResolver
+
+LEVELS = ("Associate", "Analyst", "Engineer", "Senior Engineer", "Lead", "Manager", "Senior Manager",
+          "Principal", "Head")
+MAX_SECONDS_PER_CALL = 0.1  # Scoring every label took over a second at this size
+
+
+@pytest.fixture(scope="module")
+def resolver(standin_config):
+    conn = db.SQLiteBackend(standin_config["config"]["SQLITE_PATH"]).connect()
+    try:
+        snapshot = SkillCatalogIndex(backend_name="sqlite").ensure_fresh(conn.cursor())
+    finally:
+        conn.close()
+    # About a thousand job titles, as a workforce of a few thousand has
+    job_titles = {f"{name} {level}": position for position, name in enumerate(snapshot.spec_names) for level in LEVELS}
+    return SpecializationResolver(snapshot, job_titles)
+
+
+def _typo(text: str) -> str:
+    middle = len(text) // 2
+    return text[:middle] + ("x" if text[middle] != "x" else "y") + text[middle + 1:]
+
+
+def test_exact_name_is_returned_without_fuzzy_matches(resolver):
+    name = resolver.snapshot.spec_names[0]
+    candidates = resolver.resolve(name.upper())
+    assert candidates and all(c["exact"] and c["score"] == 1.0 for c in candidates)
+    assert name in [c["specialization_name"] for c in candidates]
+
+
+def test_substring_returns_every_specialization_containing_it(resolver):
+    word = resolver.snapshot.spec_names[0].split()[0].lower()
+    expected = sorted(spec_id for spec_id, name in zip(resolver.snapshot.spec_ids, resolver.snapshot.spec_names)
+                      if word in name.lower())
+    assert [c["specialization_id"] for c in resolver.resolve(word)] == expected
+
+
+def test_typo_resolves_to_the_intended_specialization(resolver):
+    for position in range(0, len(resolver.snapshot.spec_names), 7):
+        name = resolver.snapshot.spec_names[position]
+        candidates = resolver.resolve(_typo(name))
+        assert candidates, name
+        # Names that contain all of its words score the same (e.g. "... Risk Management" for "Risk Management")
+        best = [c["specialization_id"] for c in candidates if c["score"] == candidates[0]["score"]]
+        assert resolver.snapshot.spec_ids[position] in best
+        assert not candidates[0]["exact"]
+
+
+def test_job_title_maps_to_its_specialization(resolver):
+    name = resolver.snapshot.spec_names[3]
+    candidates = resolver.resolve(f"{name} Senior Manager")
+    assert candidates[0]["specialization_id"] == resolver.snapshot.spec_ids[3]
+
+
+def test_no_match(resolver):
+    assert resolver.resolve("xyzzy qwv") == []
+
+
+def test_lookups_are_fast(resolver):
+    queries = [_typo(name) for name in resolver.snapshot.spec_names[:20]] + ["xyzzy qwv", "finacial modeling"]
+    started = time.perf_counter()
+    for query in queries:
+        resolver.resolve(query)
+    assert (time.perf_counter() - started) / len(queries) < MAX_SECONDS_PER_CALL
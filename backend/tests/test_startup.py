@@ -0,0 +1,67 @@
+# test_startup.py
+"""Cold start: importing main stays fast and keeps the heavy optional dependencies out."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from conftest import BACKEND_DIR
+from lifecycle import BackgroundLoader
+
+COLD_IMPORT_BUDGET = 5.0  # Seconds; well above the ~1 s this takes, to stay clear of slow CI machines
+HEAVY_MODULES = ("pandas", "sklearn", "pyodbc")
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def test_cold_import_is_fast_and_light(standin_config):
+    env = {key: value for key, value in os.environ.items() if not key.startswith("PSA_")}
+    env["PSA_CONFIG"] = standin_config["path"]
+    result = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["seconds"] < COLD_IMPORT_BUDGET
+
+
+def _flaky_load(attempts, failures):
+    def load():
+        attempts.append(time.monotonic())
+        if len(attempts) <= failures:
+            raise RuntimeError("not yet")
+        return "loaded"
+    return load
+
+
+def test_failed_load_waits_for_backoff_before_retrying():
+    attempts = []
+    loader = BackgroundLoader("flaky", _flaky_load(attempts, failures=1), retry_backoff=0.2)
+    assert loader.get() is None
+    assert loader.status()["attempts"] == 1
+    assert loader.get() is None  # Too soon for another attempt
+    assert len(attempts) == 1
+    time.sleep(0.25)
+    assert loader.get() == "loaded"
+    assert "error" not in loader.status()
+
+
+def test_startup_thread_retries_until_loaded():
+    attempts = []
+    loader = BackgroundLoader("flaky", _flaky_load(attempts, failures=2), retry_backoff=0.05)
+    loader.start()
+    deadline = time.monotonic() + 5
+    while loader.state != "ready" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert loader.get() == "loaded"
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= 0.1  # The backoff doubled after the second failure
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React from 'react';
 
 // A simple, reusable progress bar component for visualizing the score
 const ProgressBar = ({ value }) => {
@@ -13,31 +13,8 @@ const ProgressBar = ({ value }) => {
     );
 };
 
-function CareerRecommendations({ employeeId }) {
-    const [recommendations, setRecommendations] = useState([]);
-    const [loading, setLoading] = useState(true);
-    const [error, setError] = useState(null);
-
-    useEffect(() => {
-        const fetchRecommendations = async () => {
-            if (!employeeId) {
-                setLoading(false);
-                setError("No employee ID provided.");
-                return;
-            }
-            try {
-                const response = await fetch(`http://127.0.0.1:8000/api/employee/${employeeId}/career_recommendations`);
-                if (!response.ok) throw new Error(`Network response was not ok. Status: ${response.status}`);
-                const data = await response.json();
-                setRecommendations(data.recommendations || []);
-            } catch (err) {
-                setError(err.message);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchRecommendations();
-    }, [employeeId]);
+// The recommendations come from the dashboard's single /dashboard request (see DashboardPage).
+function CareerRecommendations({ recommendations = [], loading, error }) {
 
     // Placeholder for when a user clicks a recommendation
     const handleRecommendationClick = (role) => {
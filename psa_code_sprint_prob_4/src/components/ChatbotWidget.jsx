@@ -5,6 +5,7 @@ function ChatbotWidget({ employeeId }) {
     const [userInput, setUserInput] = useState('');
     const [isLoading, setIsLoading] = useState(true);
     const [conversationState, setConversationState] = useState('START');
+    const [sessionId, setSessionId] = useState(null);
 
     const isInitialMount = useRef(true);
     const inputRef = useRef(null);
@@ -41,6 +42,7 @@ function ChatbotWidget({ employeeId }) {
                 const data = await response.json();
                 setMessages([{ sender: 'bot', text: data.reply }]);
                 setConversationState(data.next_state);
+                setSessionId(data.session_id);
             } catch (error) {
                 setMessages([{ sender: 'bot', text: 'Sorry, I couldn\'t connect to the server right now. Please try again later.' }]);
             } finally {
@@ -69,12 +71,13 @@ function ChatbotWidget({ employeeId }) {
             const response = await fetch(`http://127.0.0.1:8000/api/chatbot`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: currentUserInput, employee_id: employeeId, state: conversationState })
+                body: JSON.stringify({ message: currentUserInput, employee_id: employeeId, state: conversationState, session_id: sessionId })
             });
             if (!response.ok) throw new Error(`Network error! Status: ${response.status}`);
             const data = await response.json();
             setMessages([...newMessages, { sender: 'bot', text: data.reply }]);
             setConversationState(data.next_state);
+            setSessionId(data.session_id);
         } catch (error) {
             setMessages([...newMessages, { sender: 'bot', text: 'Sorry, an error occurred while connecting.' }]);
         } finally {
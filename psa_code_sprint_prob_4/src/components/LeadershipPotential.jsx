@@ -1,32 +1,11 @@
-import React, { useState, useEffect } from 'react';
+import React from 'react';
 import { RadialBarChart, RadialBar, PolarAngleAxis, ResponsiveContainer } from 'recharts';
 
-const API_BASE_URL = 'http://127.0.0.1:8000';
-
-function LeadershipPotentialCard({ employeeId }) {
-    const [data, setData] = useState(null);
-    const [loading, setLoading] = useState(true);
-    const [error, setError] = useState(null);
-
-    useEffect(() => {
-        const fetchPotential = async () => {
-            if (!employeeId) return;
-            try {
-                const response = await fetch(`${API_BASE_URL}/api/employee/${employeeId}/leadership_potential`);
-                if (!response.ok) throw new Error("Could not fetch leadership data.");
-                const result = await response.json();
-                setData(result);
-            } catch (err) {
-                setError(err.message);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchPotential();
-    }, [employeeId]);
-
+// The score comes from the dashboard's single /dashboard request (see DashboardPage);
+// it is null when the model couldn't score this employee.
+function LeadershipPotentialCard({ data, loading, error }) {
     if (loading) return <div className="card"><p>Analyzing leadership potential...</p></div>;
-    if (error) return <div className="card error-message"><p>Could not load potential score.</p></div>;
+    if (error || !data) return <div className="card error-message"><p>Could not load potential score.</p></div>;
 
     const chartData = [{ name: 'score', value: data.score }];
     const scoreColor = data.score > 66 ? '#00E676' : data.score > 33 ? '#FFC371' : '#FF5F6D';
@@ -1,31 +1,7 @@
-import React, { useState, useEffect } from 'react';
-
-function UserProfileCard({ employeeId }) {
-    const [employee, setEmployee] = useState(null);
-    const [loading, setLoading] = useState(true);
-    const [error, setError] = useState(null);
-
-    useEffect(() => {
-        const fetchEmployeeData = async () => {
-            if (!employeeId) {
-                setLoading(false);
-                setError("No employee ID provided.");
-                return;
-            }
-            try {
-                const response = await fetch(`http://127.0.0.1:8000/api/employee/${employeeId}`);
-                if (!response.ok) throw new Error(`Network response was not ok. Status: ${response.status}`);
-                const data = await response.json();
-                setEmployee(data);
-            } catch (err) {
-                setError(err.message);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchEmployeeData();
-    }, [employeeId]);
+import React from 'react';
 
+// The profile comes from the dashboard's single /dashboard request (see DashboardPage).
+function UserProfileCard({ employee, loading, error }) {
     return (
         <div className="card">
             <h2 className="card-title">Your Profile</h2>
@@ -8,7 +8,8 @@ function DashboardPage({ employeeId, navigateTo, theme }) {
     
     const currentStyles = getStyles(theme);
 
-    const [employee, setEmployee] = useState(null);
+    // Profile, recommendations and leadership score arrive in one /dashboard request.
+    const [dashboard, setDashboard] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
 
@@ -20,10 +21,10 @@ function DashboardPage({ employeeId, navigateTo, theme }) {
                 return;
             }
             try {
-                const response = await fetch(`http://127.0.0.1:8000/api/employee/${employeeId}`);
+                const response = await fetch(`http://127.0.0.1:8000/api/employee/${employeeId}/dashboard?fields=profile,recommendations,leadership`);
                 if (!response.ok) throw new Error(`Network response was not ok. Status: ${response.status}`);
                 const data = await response.json();
-                setEmployee(data);
+                setDashboard(data);
             } catch (err) {
                 setError(err.message);
             } finally {
@@ -33,6 +34,8 @@ function DashboardPage({ employeeId, navigateTo, theme }) {
         fetchEmployeeData();
     }, [employeeId]);
 
+    const employee = dashboard?.profile;
+
     return (
         <div class={theme} style={currentStyles.appContainer}>
         
@@ -49,14 +52,14 @@ function DashboardPage({ employeeId, navigateTo, theme }) {
                 <div style={currentStyles.topRow}>
                     <div style={currentStyles.topCard}>
                         <div style={{marginBottom: '30px'}}>
-                            <UserProfileCard employeeId={employeeId} styles={currentStyles} theme={theme} />
+                            <UserProfileCard employee={employee} loading={loading} error={error} styles={currentStyles} theme={theme} />
                         </div>
                         <div>
-                            <CareerRecommendations employeeId={employeeId} styles={currentStyles} theme={theme} />
+                            <CareerRecommendations recommendations={dashboard?.recommendations?.recommendations} loading={loading} error={error} styles={currentStyles} theme={theme} />
                         </div>
                     </div>
                     <div style={currentStyles.topCard}>
-                        <LeadershipPotentialCard employeeId={employeeId} />
+                        <LeadershipPotentialCard data={dashboard?.leadership} loading={loading} error={error} />
                     </div>
                 </div>
                 <div style={{alignItems: 'center', marginLeft: '15px'}}>
@@ -0,0 +1,102 @@
+-- SQLite stand-in for the PSA_Hackathon_2025 schema (sql/psa_db.sql).
+-- Used for local development, tests and benchmarks; keep in sync with the SQL Server script.
+-- Secondary indexes are not defined here: backend/migrations.py adds them, for both databases.
+-- Name columns use NOCASE to mirror the case-insensitive default collation on SQL Server.
+
+CREATE TABLE IF NOT EXISTS function_areas (
+    function_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    function_name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS specializations (
+    specialization_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    specialization_name VARCHAR(255) NOT NULL UNIQUE COLLATE NOCASE,
+    function_id INTEGER NOT NULL REFERENCES function_areas (function_id)
+);
+
+CREATE TABLE IF NOT EXISTS skills (
+    skill_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    skill_name VARCHAR(255) NOT NULL UNIQUE COLLATE NOCASE,
+    specialization_id INTEGER REFERENCES specializations (specialization_id)
+);
+
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id VARCHAR(20) NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    office_location VARCHAR(255),
+    line_manager VARCHAR(255),
+    job_title VARCHAR(255),
+    department VARCHAR(255),
+    unit VARCHAR(255),
+    hire_date DATE,
+    in_role_since DATE
+);
+
+CREATE TABLE IF NOT EXISTS employee_skills (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    skill_id INTEGER NOT NULL REFERENCES skills (skill_id),
+    UNIQUE (employee_id, skill_id)
+);
+
+CREATE TABLE IF NOT EXISTS employee_competencies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    competency_name VARCHAR(255) NOT NULL,
+    proficiency_level VARCHAR(20) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS employee_languages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    language VARCHAR(100) NOT NULL,
+    proficiency VARCHAR(100)
+);
+
+CREATE TABLE IF NOT EXISTS education (
+    education_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    degree VARCHAR(255),
+    institution VARCHAR(255),
+    start_date DATE,
+    end_date DATE
+);
+
+CREATE TABLE IF NOT EXISTS experiences (
+    experience_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    experience_type VARCHAR(100),
+    program_name VARCHAR(255),
+    organization VARCHAR(255),
+    start_date DATE,
+    end_date DATE,
+    focus TEXT
+);
+
+CREATE TABLE IF NOT EXISTS position_history (
+    history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    role_title VARCHAR(255) NOT NULL,
+    organization VARCHAR(255),
+    start_date DATE NOT NULL,
+    end_date DATE,
+    focus_areas TEXT
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_name VARCHAR(255) NOT NULL,
+    employee_id_lead VARCHAR(20) REFERENCES employees (employee_id),
+    start_date DATE,
+    end_date DATE,
+    description TEXT,
+    outcomes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS project_members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id INTEGER NOT NULL REFERENCES projects (project_id),
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (employee_id),
+    role_in_project VARCHAR(255)
+);